@@ -0,0 +1,79 @@
+"""
+Per-call overhead of constructing a ChatOpenAI per call (the old behaviour)
+versus the shared client registry in src.utils.llm.
+
+Runs fully offline against benchmarks.fake_llm_server:
+
+    python -m benchmarks.bench_llm_clients --calls 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.fake_llm_server import FakeLLMHandler, start_fake_server
+
+MODEL = "openai/gpt-4o-mini"
+
+def _report(label: str, durations: list, connections: int):
+    durations_ms = sorted(d * 1000 for d in durations)
+    p95 = durations_ms[int(len(durations_ms) * 0.95) - 1]
+    print(f"{label:<28} mean={statistics.mean(durations_ms):7.3f}ms  "
+          f"p50={statistics.median(durations_ms):7.3f}ms  p95={p95:7.3f}ms  connections={connections}")
+
+def bench_sync(make_llm, calls: int) -> list:
+    durations = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        make_llm().invoke("ping")
+        durations.append(time.perf_counter() - start)
+    return durations
+
+async def bench_async(make_llm, calls: int) -> list:
+    durations = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await make_llm().ainvoke("ping")
+        durations.append(time.perf_counter() - start)
+    return durations
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server()
+    os.environ["OPENAI_API_BASE"] = base_url
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    from langchain_openai import ChatOpenAI
+    from src.utils.llm import get_llm, reset_llm_clients
+
+    per_call = lambda: ChatOpenAI(model=MODEL, temperature=0)
+    shared = lambda: get_llm(MODEL, temperature=0)
+
+    print(f"{args.calls} sequential calls against {base_url}\n")
+
+    for label, make_llm in [("sync  / new client per call", per_call), ("sync  / shared registry", shared)]:
+        FakeLLMHandler.connections = 0
+        _report(label, bench_sync(make_llm, args.calls), FakeLLMHandler.connections)
+
+    reset_llm_clients()
+    for label, make_llm in [("async / new client per call", per_call), ("async / shared registry", shared)]:
+        FakeLLMHandler.connections = 0
+        _report(label, asyncio.run(bench_async(make_llm, args.calls)), FakeLLMHandler.connections)
+        reset_llm_clients()
+
+    construct = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        per_call()
+        construct.append(time.perf_counter() - start)
+    print(f"\nChatOpenAI construction alone: {statistics.mean(construct) * 1000:.3f}ms per call")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
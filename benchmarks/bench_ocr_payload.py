@@ -0,0 +1,275 @@
+"""
+OCR accuracy versus bytes sent, across image preprocessing settings.
+
+Renders synthetic resume pages at 300 DPI (a scan: off-white paper,
+sensor noise, colored headings, 7pt small print), or loads real samples
+from --samples DIR (page images, each with a same-named .txt transcript).
+Lower render DPIs are simulated by resampling the 300 DPI page. Every
+preset goes through src.utils.image_prep.prepare_image and reports
+preprocessing time, JPEG and base64 payload size, and the image tokens
+gpt-4o bills for it.
+
+Accuracy:
+  --ocr proxy (default, offline): ink IoU. The sent JPEG is scaled back
+      to 300 DPI and its dark pixels are compared with the original's;
+      strokes blurred away by downscaling or JPEG artifacts lower it.
+      glyph_px is the height of a 10pt capital in sent pixels; vision
+      models start misreading below ~10px.
+  --ocr live: sends each page to the configured vision models through
+      aextract_text_from_image and reports word accuracy against the
+      transcript. Needs OPENROUTER_API_KEY / OPENAI_API_KEY, and costs
+      one OCR call per page per preset.
+
+    python -m benchmarks.bench_ocr_payload --pages 3
+    python -m benchmarks.bench_ocr_payload --ocr live --presets baseline,default,768px
+"""
+import argparse
+import asyncio
+import base64
+import difflib
+import glob
+import io
+import json
+import math
+import os
+import random
+import re
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from src.utils import image_prep
+from src.utils.image_prep import content_box, prepare_image
+
+SCAN_DPI = 300
+PAGE_INCHES = (8.5, 11)
+BODY_PT = 10
+CAP_HEIGHT = 0.73  # of the point size, DejaVu Sans
+INK = 160  # binarization threshold for the ink IoU
+
+@dataclass
+class Preset:
+    name: str
+    dpi: int
+    grayscale: bool
+    max_dimension: int
+    crop: bool
+    quality: int
+
+PRESETS = [
+    # What the pipeline sent before preprocessing: pdf2image defaults, PIL's default JPEG quality
+    Preset("baseline", 200, False, 0, False, 75),
+    Preset("gray", 200, True, 0, False, 75),
+    Preset("gray+crop", 200, True, 0, True, 75),
+    Preset("default", image_prep.OCR_RENDER_DPI, image_prep.OCR_GRAYSCALE, image_prep.OCR_MAX_DIMENSION,
+           image_prep.OCR_CROP_WHITESPACE, image_prep.OCR_JPEG_QUALITY),
+    Preset("1024px", 150, True, 1024, True, 75),
+    Preset("768px", 150, True, 768, True, 75),
+    Preset("768px-q50", 150, True, 768, True, 50),
+    Preset("100dpi", 100, True, 0, True, 75),
+]
+
+FIRST = ["Jane", "Arjun", "Maria", "Chen", "Olu", "Sofia", "Liam", "Aiko"]
+LAST = ["Doe", "Sharma", "Garcia", "Wei", "Adeyemi", "Rossi", "Murphy", "Tanaka"]
+SKILLS = ["Python", "FastAPI", "Docker", "Kubernetes", "PostgreSQL", "AWS", "Terraform", "React",
+          "TypeScript", "LangGraph", "PyTorch", "Kafka", "Redis", "GraphQL", "Go", "Airflow"]
+COMPANIES = ["Northwind Labs", "Globex Analytics", "Initech Cloud", "Umbrella Health", "Stark Logistics"]
+VERBS = ["Built", "Led", "Migrated", "Designed", "Reduced", "Automated", "Scaled", "Shipped"]
+OBJECTS = ["the billing pipeline", "a real-time fraud model", "12 microservices to Kubernetes",
+           "p99 latency by 38%", "the CI/CD release process", "an LLM document parser",
+           "ETL jobs processing 4TB/day", "the on-call runbook"]
+
+def sample_resume(seed: int) -> List[Tuple[str, str]]:
+    """
+    (style, line) pairs of a synthetic one-page resume.
+    """
+    rng = random.Random(seed)
+    first, last = rng.choice(FIRST), rng.choice(LAST)
+    lines = [
+        ("title", f"{first} {last}"),
+        ("body", f"{first.lower()}.{last.lower()}@example.com | +1 (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)} | github.com/{first.lower()}{seed}"),
+        ("heading", "Summary"),
+        ("body", f"Backend engineer with {rng.randint(2, 15)} years of experience in distributed systems and ML platforms."),
+        ("heading", "Skills"),
+        ("body", ", ".join(rng.sample(SKILLS, 9))),
+        ("heading", "Experience"),
+    ]
+    year = 2025
+    for company in rng.sample(COMPANIES, 3):
+        start = year - rng.randint(1, 4)
+        lines.append(("bold", f"Senior Engineer, {company}  {start}-{year}"))
+        for _ in range(3):
+            lines.append(("body", f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)} and {rng.choice(SKILLS)}."))
+        year = start
+    lines += [
+        ("heading", "Education"),
+        ("body", f"B.Sc. Computer Science, State University, {year - 4}"),
+        ("small", f"References available on request. Last updated 03/{rng.randint(10, 28)}/2026. Ref #{rng.randint(10000, 99999)}"),
+    ]
+    return lines
+
+def _font(bold: bool, pt: float):
+    px = round(pt * SCAN_DPI / 72)
+    for path in ("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+                 "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(path, px)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=px)
+
+STYLES = {
+    # style: (bold, point size, color, space after in pt)
+    "title": (True, 18, (20, 40, 110), 6),
+    "heading": (True, 12, (20, 70, 150), 3),
+    "bold": (True, BODY_PT, (0, 0, 0), 2),
+    "body": (False, BODY_PT, (30, 30, 30), 2),
+    "small": (False, 7, (90, 90, 90), 0),
+}
+
+def render_scan(lines: List[Tuple[str, str]], noise: float, seed: int) -> Image.Image:
+    width, height = (round(inches * SCAN_DPI) for inches in PAGE_INCHES)
+    page = Image.new("RGB", (width, height), (248, 246, 240))
+    draw = ImageDraw.Draw(page)
+    x = y = round(0.75 * SCAN_DPI)
+    for style, text in lines:
+        bold, pt, color, after = STYLES[style]
+        if style == "small":
+            y = height - round(0.9 * SCAN_DPI)
+        draw.text((x, y), text, font=_font(bold, pt), fill=color)
+        y += round((pt * 1.35 + after) * SCAN_DPI / 72)
+    if noise:
+        pixels = np.asarray(page, dtype=np.float32)
+        pixels += np.random.default_rng(seed).normal(0, noise, pixels.shape[:2])[..., None]
+        page = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return page
+
+def load_samples(directory: Optional[str], pages: int, noise: float) -> List[Tuple[str, Image.Image, str]]:
+    if directory:
+        samples = []
+        for path in sorted(glob.glob(os.path.join(directory, "*"))):
+            stem, ext = os.path.splitext(path)
+            if ext.lower() in (".png", ".jpg", ".jpeg") and os.path.exists(stem + ".txt"):
+                with open(stem + ".txt") as f:
+                    samples.append((os.path.basename(path), Image.open(path).convert("RGB"), f.read()))
+        return samples[:pages] if pages else samples
+    samples = []
+    for seed in range(pages):
+        lines = sample_resume(seed)
+        samples.append((f"synthetic-{seed}", render_scan(lines, noise, seed), "\n".join(text for _, text in lines)))
+    return samples
+
+def gpt4o_image_tokens(width: int, height: int) -> int:
+    # High detail: fit in 2048x2048, shortest side to 768, then 170 tokens per 512px tile + 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+def ink_iou(scan: Image.Image, box: Tuple[int, int, int, int], dpi: int, sent: Image.Image) -> float:
+    # Scale what was sent back over the region of the 300 DPI scan it covers, compare dark pixels
+    factor = SCAN_DPI / dpi
+    region = tuple(v * factor for v in box)
+    size = (round(region[2] - region[0]), round(region[3] - region[1]))
+    reference = np.asarray(scan.convert("L").resize(size, Image.Resampling.BILINEAR, box=region)) < INK
+    restored = np.asarray(sent.convert("L").resize(size, Image.Resampling.BICUBIC)) < INK
+    union = np.logical_or(reference, restored).sum()
+    return float(np.logical_and(reference, restored).sum() / union) if union else 1.0
+
+def word_accuracy(truth: str, text: str) -> float:
+    words = lambda s: re.findall(r"[a-z0-9@.+#/-]+", s.lower())
+    expected = words(truth)
+    matcher = difflib.SequenceMatcher(None, expected, words(text), autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / max(1, len(expected))
+
+def measure(preset: Preset, samples, ocr: str) -> Dict:
+    rows = []
+    for name, scan, truth in samples:
+        factor = preset.dpi / SCAN_DPI
+        render = scan.resize((round(scan.width * factor), round(scan.height * factor)), Image.Resampling.LANCZOS)
+        start = time.perf_counter()
+        payload = prepare_image(render, preset.grayscale, preset.max_dimension, preset.crop, preset.quality)
+        seconds = time.perf_counter() - start
+        sent = Image.open(io.BytesIO(payload))
+        # Part of the render that was sent (prepare_image crops to the same box)
+        box = (content_box(render) if preset.crop else None) or (0, 0, render.width, render.height)
+        row = {
+            "prepare_ms": seconds * 1000,
+            "bytes": len(payload),
+            "base64_bytes": len(base64.b64encode(payload)),
+            "size": f"{sent.width}x{sent.height}",
+            "tokens": gpt4o_image_tokens(*sent.size),
+            "glyph_px": CAP_HEIGHT * BODY_PT / 72 * preset.dpi * sent.width / (box[2] - box[0]),
+        }
+        if ocr == "live":
+            from src.utils.ocr import aextract_text_from_image
+            start = time.perf_counter()
+            text = asyncio.run(aextract_text_from_image(payload))
+            row["ocr_s"] = time.perf_counter() - start
+            row["accuracy"] = word_accuracy(truth, text)
+        else:
+            row["accuracy"] = ink_iou(scan, box, preset.dpi, sent)
+        rows.append(row)
+    mean = lambda key: statistics.mean(r[key] for r in rows)
+    result = {
+        **asdict(preset),
+        "pages": len(rows),
+        "size": rows[0]["size"],
+        "prepare_ms": mean("prepare_ms"),
+        "bytes": mean("bytes"),
+        "base64_bytes": mean("base64_bytes"),
+        "tokens": mean("tokens"),
+        "glyph_px": mean("glyph_px"),
+        "accuracy": mean("accuracy"),
+    }
+    if ocr == "live":
+        result["ocr_s"] = mean("ocr_s")
+    return result
+
+def print_row(row: Dict, baseline: Optional[Dict], metric: str):
+    ratio = f"{row['bytes'] / baseline['bytes']:6.1%}" if baseline else "     -"
+    ocr = f" ocr={row['ocr_s']:5.2f}s" if "ocr_s" in row else ""
+    print(f"{row['name']:<10} dpi={row['dpi']:<3} gray={int(row['grayscale'])} crop={int(row['crop'])} "
+          f"max={row['max_dimension']:<4} q={row['quality']:<3} {row['size']:>9}  "
+          f"prep={row['prepare_ms']:6.1f}ms  {row['bytes'] / 1024:7.1f}KiB ({ratio} of baseline)  "
+          f"b64={row['base64_bytes'] / 1024:7.1f}KiB  tokens={row['tokens']:6.0f}  "
+          f"glyph={row['glyph_px']:4.1f}px  {metric}={row['accuracy']:.3f}{ocr}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ocr", choices=["proxy", "live"], default="proxy")
+    parser.add_argument("--pages", type=int, default=3, help="synthetic pages (or max samples from --samples)")
+    parser.add_argument("--samples", help="directory of page images, each with a same-named .txt transcript")
+    parser.add_argument("--noise", type=float, default=6.0, help="std-dev of simulated scanner noise (0-255)")
+    parser.add_argument("--presets", help="comma-separated subset of: " + ", ".join(p.name for p in PRESETS))
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    presets = PRESETS
+    if args.presets:
+        wanted = args.presets.split(",")
+        presets = [p for p in PRESETS if p.name in wanted]
+    samples = load_samples(args.samples, args.pages, args.noise)
+    if not samples:
+        parser.error("no samples found")
+
+    metric = "word_acc" if args.ocr == "live" else "ink_iou"
+    print(f"{len(samples)} pages, accuracy: {metric}")
+    rows, baseline = [], None
+    for preset in presets:
+        row = measure(preset, samples, args.ocr)
+        baseline = baseline or (row if preset.name == "baseline" else None)
+        print_row(row, baseline, metric)
+        rows.append(row)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
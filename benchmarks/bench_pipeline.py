@@ -0,0 +1,196 @@
+"""
+End-to-end throughput/latency benchmark for the recruitment pipeline.
+
+Drives run_analysis() on the compiled graph and/or the /analyze endpoint
+(in-process via httpx's ASGI transport) at several concurrency levels,
+against benchmarks.fake_llm_server. No network access or API keys needed.
+--mode debate,fast compares the full three-agent debate with the single
+call fast mode on latency, LLM calls and tokens per request.
+
+    python -m benchmarks.bench_pipeline --target graph,api --concurrency 1,8,32 \\
+        --requests 64 --latency-ms 200 --jitter-ms 50 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.fake_llm_server import FakeLLMConfig, spawn_fake_server
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+    return ordered[index]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def sample_inputs(i: int) -> Dict:
+    # Unique text per request so nothing is served from the parse cache
+    return {
+        "resume_blob_id": None,
+        "resume_filename": None,
+        "resume_text": f"Candidate #{i}. Jane Doe. Skills: Python, Docker, LangGraph. 6 years experience.",
+        "jd_blob_id": None,
+        "jd_filename": None,
+        "jd_text": f"Requisition #{i}. Senior Python Engineer with LangGraph, Docker and Kubernetes.",
+        "resume_data": {},
+        "jd_data": {},
+    }
+
+async def llm_requests_served(client, base_url: str) -> int:
+    response = await client.get(base_url.removesuffix("/v1") + "/stats")
+    return response.json()["requests"]
+
+def llm_tokens_used() -> float:
+    # Prompt + completion tokens recorded by the in-process LLM metrics callback
+    from src.utils.metrics import LLM_TOKENS
+    return LLM_TOKENS.total()
+
+async def run_level(call: Callable[[int], Awaitable[bool]], requests: int, concurrency: int, stats) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            ok = await call(i)
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    llm_requests_before = await stats()
+    tokens_before = llm_tokens_used()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "rps": requests / elapsed,
+        "llm_calls_per_request": (await stats() - llm_requests_before) / requests,
+        "tokens_per_request": (llm_tokens_used() - tokens_before) / requests,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def make_graph_call(extra_inputs: Dict) -> Callable[[int], Awaitable[bool]]:
+    from src.graph import run_analysis
+
+    async def call(i: int) -> bool:
+        state = await run_analysis({**sample_inputs(i), **extra_inputs})
+        return not state.get("error") and bool(state.get("analysis"))
+    return call
+
+def make_api_call(client, extra_form: Dict) -> Callable[[int], Awaitable[bool]]:
+    async def call(i: int) -> bool:
+        inputs = sample_inputs(i)
+        form = {"resume_text": inputs["resume_text"], "jd_text": inputs["jd_text"], **extra_form}
+        response = await client.post("/analyze", data=form)
+        return response.status_code == 200
+    return call
+
+def print_row(row: Dict):
+    print(f"{row['target']:<6} {row['mode']:<7} c={row['concurrency']:<4} n={row['requests']:<5} err={row['errors']:<3} "
+          f"p50={row['p50_ms']:8.1f}ms p95={row['p95_ms']:8.1f}ms p99={row['p99_ms']:8.1f}ms "
+          f"rps={row['rps']:7.2f} llm/req={row['llm_calls_per_request']:4.1f} "
+          f"tok/req={row['tokens_per_request']:7.1f} rss={row['peak_rss_mb']:6.1f}MB")
+
+async def main_async(args, base_url: str) -> List[Dict]:
+    import httpx
+    from src.api import app as api_app
+
+    rows = []
+    levels = [int(c) for c in args.concurrency.split(",")]
+    targets = args.target.split(",")
+    modes = args.mode.split(",")
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=api_app), base_url="http://bench", timeout=None
+    ) as client, httpx.AsyncClient() as stats_client:
+        stats = lambda: llm_requests_served(stats_client, base_url)
+        for target in targets:
+            for mode in modes:
+                extra = {"mode": mode}
+                call = make_graph_call(extra) if target == "graph" else make_api_call(client, extra)
+                for concurrency in levels:
+                    row = {"target": target, "mode": mode, **await run_level(call, args.requests, concurrency, stats)}
+                    print_row(row)
+                    rows.append(row)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="graph,api", help="comma-separated: graph, api")
+    parser.add_argument("--mode", default="debate", help="comma-separated: debate, fast")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="fake LLM latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM calls failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of LLM calls answered with 429")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of LLM calls that are --slow-ms slower")
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    parser.add_argument("--hedge", action="store_true", help="enable hedged agent calls (LLM_HEDGE_* env settings apply)")
+    parser.add_argument("--rpm", type=float, default=0, help="scheduler requests/min per model (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=0, help="scheduler tokens/min per model (0 = unlimited)")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(
+        args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate, args.slow_rate, args.slow_ms
+    )
+    server, base_url = spawn_fake_server(config)
+
+    # Must be set before src.* is imported
+    os.environ["OPENAI_API_BASE"] = base_url
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "sk-fake"
+    os.environ["PARSE_CACHE_ENABLED"] = "false"
+    os.environ["ANALYSIS_CACHE_ENABLED"] = "false"
+    os.environ["CANDIDATE_STORE_ENABLED"] = "false"
+    os.environ["LLM_RPM"] = str(args.rpm)
+    os.environ["LLM_TPM"] = str(args.tpm)
+    os.environ["LANGSMITH_TRACING"] = "false"
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    os.environ["LLM_HEDGE_ENABLED"] = "true" if args.hedge else "false"
+
+    import logging
+    logging.disable(logging.INFO)
+
+    print(f"Fake LLM at {base_url}: latency={args.latency_ms}ms jitter={args.jitter_ms}ms "
+          f"errors={args.error_rate} 429s={args.rate_limit_rate} slow={args.slow_rate}x{args.slow_ms}ms "
+          f"rpm={args.rpm or 'unlimited'} tpm={args.tpm or 'unlimited'} hedging={args.hedge}\n")
+    try:
+        rows = asyncio.run(main_async(args, base_url))
+    finally:
+        server.terminate()
+
+    if args.hedge:
+        from src.utils.hedging import hedger
+        for agent, stats in hedger.stats()["agents"].items():
+            print(f"hedging {agent:<13} calls={stats['calls']:<5} hedged={stats['hedged']:<4} "
+                  f"rate={stats['hedge_rate']:.1%} wins={stats['hedge_wins']} delay={stats['hedge_delay_s']}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+OpenAI-compatible chat completions stand-in for offline benchmarks.
+
+Returns canned JSON for the resume parser (ResumeData), JD parser
+(JobDescriptionData), Mediator (RankingOutput) and fast debate
+(FastDebateOutput), prose for the debate agents and plain text for OCR
+requests. Latency and error rates are
+configurable so benchmarks can exercise retries and tail latency.
+
+    python -m benchmarks.fake_llm_server --port 8100 --latency-ms 300 --error-rate 0.02
+"""
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+RESUME = {
+    "name": "Jane Doe",
+    "email": "jane@example.com",
+    "skills": ["Python", "Docker", "LangGraph", "FastAPI", "PostgreSQL"],
+    "experience_years": 6,
+    "education": ["BSc Computer Science, Example University"],
+    "recent_role": "Senior Backend Engineer",
+}
+
+JOB_DESCRIPTION = {
+    "job_title": "Senior Python Engineer",
+    "required_skills": ["Python", "LangGraph", "Docker", "Kubernetes"],
+    "min_experience_years": 5,
+    "preferred_qualifications": ["Multi-agent systems", "Observability"],
+}
+
+RANKING = {
+    "score": 82,
+    "reasoning": "Strong Python and LangGraph background; Kubernetes is not demonstrated.",
+    "missing_skills": ["Kubernetes"],
+}
+
+FAST_DEBATE = {
+    **RANKING,
+    "pros": ["Six years of backend Python", "Hands-on LangGraph and Docker"],
+    "cons": ["No Kubernetes experience listed"],
+}
+
+OPINION = "The candidate's backend experience maps well onto the role, with some gaps in orchestration tooling."
+OCR_TEXT = "Jane Doe - Senior Backend Engineer. Skills: Python, Docker, LangGraph. 6 years experience."
+
+@dataclass
+class FakeLLMConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    # Heavy tail: this fraction of calls takes slow_ms longer
+    slow_rate: float = 0.0
+    slow_ms: float = 0.0
+
+def _request_text(request: dict) -> str:
+    parts = []
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            parts.extend(p.get("text", "") for p in content if isinstance(p, dict))
+        elif content:
+            parts.append(str(content))
+    return "\n".join(parts)
+
+def canned_content(request: dict) -> str:
+    """
+    Picks a response based on which agent's prompt / schema the request carries.
+    """
+    text = _request_text(request)
+    if any(isinstance(m.get("content"), list) for m in request.get("messages", [])):
+        return OCR_TEXT
+    if '"pros"' in text and '"cons"' in text:
+        return json.dumps(FAST_DEBATE)
+    if '"score"' in text and '"missing_skills"' in text:
+        return json.dumps(RANKING)
+    if '"required_skills"' in text:
+        return json.dumps(JOB_DESCRIPTION)
+    if '"experience_years"' in text:
+        return json.dumps(RESUME)
+    return OPINION
+
+def _completion(model: str, content: str, prompt_tokens: int) -> dict:
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+def _chunk(model: str, delta: dict, finish_reason: Optional[str] = None) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real providers
+    config = FakeLLMConfig()
+    connections = 0  # TCP connections accepted, to observe pooling
+    requests = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        type(self).connections += 1
+        super().setup()
+        # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls.
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # Counters for benchmarks that run the server in a separate process
+        self._send_json(200, {"requests": type(self).requests, "connections": type(self).connections})
+
+    def do_POST(self):
+        type(self).requests += 1
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config = type(self).config
+
+        delay_ms = random.gauss(config.latency_ms, config.jitter_ms) if config.jitter_ms else config.latency_ms
+        if config.slow_rate and random.random() < config.slow_rate:
+            delay_ms += config.slow_ms
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            self._send_json(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}}, {"Retry-After": "0.2"})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._send_json(500, {"error": {"message": "Injected failure", "type": "server_error"}})
+            return
+
+        model = request.get("model", "fake")
+        content = canned_content(request)
+        prompt_tokens = max(1, len(_request_text(request)) // 4)
+
+        if not request.get("stream"):
+            self._send_json(200, _completion(model, content, prompt_tokens))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = [_chunk(model, {"role": "assistant", "content": ""})]
+        events += [_chunk(model, {"content": content[i:i + 16]}) for i in range(0, len(content), 16)]
+        events.append(_chunk(model, {}, "stop"))
+        for event in events:
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # benchmarks open many connections at once
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on calls they cancelled (e.g. a hedged call's loser)
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+def start_fake_server(
+    host: str = "127.0.0.1", port: int = 0, config: Optional[FakeLLMConfig] = None
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Starts the server on a daemon thread and returns it with its /v1 base URL.
+    """
+    if config is not None:
+        FakeLLMHandler.config = config
+    server = FakeLLMServer((host, port), FakeLLMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+def spawn_fake_server(config: FakeLLMConfig, host: str = "127.0.0.1") -> Tuple[subprocess.Popen, str]:
+    """
+    Runs the server in a child process so it doesn't compete for the GIL
+    with the code under test. Returns the process and its /v1 base URL.
+    """
+    with socket.socket() as probe:
+        probe.bind((host, 0))
+        port = probe.getsockname()[1]
+
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_llm_server", "--host", host, "--port", str(port),
+        "--latency-ms", str(config.latency_ms), "--jitter-ms", str(config.jitter_ms),
+        "--error-rate", str(config.error_rate), "--rate-limit-rate", str(config.rate_limit_rate),
+        "--slow-rate", str(config.slow_rate), "--slow-ms", str(config.slow_ms),
+    ], stdout=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return process, f"http://{host}:{port}/v1"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Fake LLM server did not start")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    FakeLLMHandler.config = FakeLLMConfig(
+        args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate, args.slow_rate, args.slow_ms
+    )
+    server = FakeLLMServer((args.host, args.port), FakeLLMHandler)
+    print(f"Fake LLM server listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
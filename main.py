@@ -1,7 +1,9 @@
 import os
+import sys
 import asyncio
 from dotenv import load_dotenv
-from src.graph import app as graph_app
+from src.graph import run_cached_analysis
+from src.utils.blobs import blob_store
 from src.utils.logger import setup_logger
 
 # Load environment variables
@@ -18,36 +20,34 @@ async def main():
         return
     
     # Load data
+    resume_blob_id = jd_blob_id = None
     try:
-        # Try reading files as bytes correctly
+        # Register open file handles as blobs; ingestion reads them from disk
         if os.path.exists("resume.txt"):
-             with open("resume.txt", "rb") as f:
-                resume_bytes = f.read()
+             resume_blob_id = blob_store.put(open("resume.txt", "rb"))
              resume_filename = "resume.txt"
         else:
              logger.warning("resume.txt not found.")
-             resume_bytes = None
              resume_filename = None
 
         if os.path.exists("job_description.txt"):
-             with open("job_description.txt", "rb") as f:
-                jd_bytes = f.read()
+             jd_blob_id = blob_store.put(open("job_description.txt", "rb"))
              jd_filename = "job_description.txt"
         else:
              logger.warning("job_description.txt not found.")
-             jd_bytes = None
              jd_filename = None
              
     except Exception as e:
         logger.error(f"Error reading files: {e}")
+        blob_store.release(resume_blob_id)
         return
 
     # Prepare Input
     inputs = {
-        "resume_file_bytes": resume_bytes,
+        "resume_blob_id": resume_blob_id,
         "resume_filename": resume_filename,
         "resume_text": None, # Could pass string directly if needed
-        "jd_file_bytes": jd_bytes,
+        "jd_blob_id": jd_blob_id,
         "jd_filename": jd_filename,
         "jd_text": None,
         "resume_data": {},
@@ -56,10 +56,13 @@ async def main():
 
     # Run Graph
     try:
-        final_state = await graph_app.ainvoke(inputs)
+        # Unchanged files are answered from the analysis cache; --no-cache forces a fresh run
+        final_state = await run_cached_analysis(inputs, bypass_cache="--no-cache" in sys.argv)
     except Exception as e:
         logger.error(f"Graph Execution Error: {e}")
         return
+    finally:
+        blob_store.release(resume_blob_id, jd_blob_id)
 
     if final_state.get("error"):
         print(f"Error: {final_state['error']}")
@@ -76,6 +79,8 @@ async def main():
     print(f"Match Score: {result.get('score')}/100")
     print(f"Reasoning: {result.get('reasoning')}")
     print(f"Missing Skills: {', '.join(result.get('missing_skills', []))}")
+    if final_state.get("cached"):
+        print("(cached result)")
     print("="*50 + "\n")
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from pydantic import Field
+from src.agents.ranker import RankingOutput
+from src.utils.hedging import hedged_acall
+from src.utils.llm import call, error_result, get_llm
+from src.utils.logger import setup_logger
+from src.utils.metrics import instrument_agent
+from src.utils.prompting import serialize_jd, serialize_resume
+from langsmith import traceable
+
+logger = setup_logger(__name__)
+
+MODEL_NAME = "openai/gpt-4o-mini"
+# Bump whenever the prompt below changes so cached analyses are invalidated.
+PROMPT_VERSION = "1"
+
+class FastDebateOutput(RankingOutput):
+    pros: list[str] = Field(description="The Optimist's strongest arguments for hiring the candidate")
+    cons: list[str] = Field(description="The Skeptic's strongest arguments against hiring the candidate")
+
+def _build_chain(model: str = MODEL_NAME):
+    llm = get_llm(model, temperature=0)
+
+    parser = JsonOutputParser(pydantic_object=FastDebateOutput)
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", (
+            "You are an expert Hiring Manager running a condensed candidate review. In a single pass, "
+            "first argue as 'The Optimist' (transferable skills, growth, potential), then as 'The Skeptic' "
+            "(missing hard requirements, experience gaps, risks), and finally weigh both sides as "
+            "'The Mediator' to reach a fair, balanced decision.\n{format_instructions}"
+        )),
+        ("human", (
+            # JD first: the system prompt + JD prefix is shared by every candidate for this job
+            "JOB DESCRIPTION DATA:\n{jd_data}\n\n"
+            "RESUME DATA:\n{resume_data}\n\n"
+            "List the pros and cons, then provide the final matching analysis."
+        ))
+    ])
+
+    return prompt | llm | parser, parser
+
+@traceable(name="fast_debate_agent")
+@instrument_agent("fast_debate")
+def fast_debate(resume_data: dict, jd_data: dict) -> dict:
+    """
+    Optimist, Skeptic and Mediator in one structured LLM call. Cheaper and
+    faster than the full debate; meant for high-volume first-round screening.
+    """
+    logger.info("Fast Debate Agent: Weighing pros and cons in a single pass...")
+
+    chain, parser = _build_chain()
+
+    try:
+        result = call(chain, {
+            "resume_data": serialize_resume(resume_data),
+            "jd_data": serialize_jd(jd_data),
+            "format_instructions": parser.get_format_instructions()
+        }, MODEL_NAME)
+        logger.info(f"Fast decision reached: Score {result.get('score')}")
+        return result
+    except Exception as e:
+        logger.error(f"Fast Debate Error: {e}")
+        return error_result(e)
+
+@traceable(name="fast_debate_agent")
+@instrument_agent("fast_debate")
+async def afast_debate(resume_data: dict, jd_data: dict) -> dict:
+    """
+    Async version of fast_debate.
+    """
+    logger.info("Fast Debate Agent: Weighing pros and cons in a single pass...")
+
+    chain, parser = _build_chain()
+
+    try:
+        result = await hedged_acall(chain, {
+            "resume_data": serialize_resume(resume_data),
+            "jd_data": serialize_jd(jd_data),
+            "format_instructions": parser.get_format_instructions()
+        }, MODEL_NAME, chain_for=lambda model: _build_chain(model)[0])
+        logger.info(f"Fast decision reached: Score {result.get('score')}")
+        return result
+    except Exception as e:
+        logger.error(f"Fast Debate Error: {e}")
+        return error_result(e)
@@ -1,13 +1,20 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import List
+from src.utils.hedging import hedged_acall
+from src.utils.llm import call, error_result, get_llm
 from src.utils.logger import setup_logger
+from src.utils.metrics import instrument_agent
+from src.utils.prompting import JD_MAX_TOKENS, prepare_document
 from langsmith import traceable
 
 logger = setup_logger(__name__)
 
+MODEL_NAME = "openai/gpt-4o-mini"
+# Bump whenever the prompt below changes so cached parses are invalidated.
+PROMPT_VERSION = "2"
+
 # Define the structured output for JD
 class JobDescriptionData(BaseModel):
     job_title: str = Field(description="Title of the job")
@@ -15,31 +22,56 @@ class JobDescriptionData(BaseModel):
     min_experience_years: float = Field(description="Minimum years of experience required")
     preferred_qualifications: List[str] = Field(description="List of preferred qualifications or 'nice-to-haves'")
 
+def _build_chain(model: str = MODEL_NAME):
+    llm = get_llm(model, temperature=0)
+    
+    parser = JsonOutputParser(pydantic_object=JobDescriptionData)
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert HR assistant. Extract structured requirements from the following Job Description.\n{format_instructions}"),
+        ("human", "{jd_text}")
+    ])
+    
+    return prompt | llm | parser, parser
+
 @traceable(name="parse_jd")
+@instrument_agent("parse_jd")
 def parse_jd(jd_text: str) -> dict:
     """
     Parses a job description text and extracts structured data.
     """
     logger.info("Parsing job description...")
     
-    llm = ChatOpenAI(model="openai/gpt-4o-mini", temperature=0)
+    chain, parser = _build_chain()
     
-    parser = JsonOutputParser(pydantic_object=JobDescriptionData)
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert HR assistant. Extract structured requirements from the following Job Description.\n{format_instructions}"),
-        ("human", "{jd_text}")
-    ])
+    try:
+        result = call(chain, {
+            "jd_text": prepare_document(jd_text, JD_MAX_TOKENS),
+            "format_instructions": parser.get_format_instructions()
+        }, MODEL_NAME)
+        logger.info("Job description parsed successfully.")
+        return result
+    except Exception as e:
+        logger.error(f"Error parsing JD: {e}")
+        return error_result(e)
+
+@traceable(name="parse_jd")
+@instrument_agent("parse_jd")
+async def aparse_jd(jd_text: str) -> dict:
+    """
+    Async version of parse_jd.
+    """
+    logger.info("Parsing job description...")
     
-    chain = prompt | llm | parser
+    chain, parser = _build_chain()
     
     try:
-        result = chain.invoke({
-            "jd_text": jd_text,
+        result = await hedged_acall(chain, {
+            "jd_text": prepare_document(jd_text, JD_MAX_TOKENS),
             "format_instructions": parser.get_format_instructions()
-        })
+        }, MODEL_NAME, chain_for=lambda model: _build_chain(model)[0])
         logger.info("Job description parsed successfully.")
         return result
     except Exception as e:
         logger.error(f"Error parsing JD: {e}")
-        return {"error": str(e)}
+        return error_result(e)
@@ -1,19 +1,19 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
+from src.utils.hedging import hedged_acall
+from src.utils.llm import call, get_llm
 from src.utils.logger import setup_logger
+from src.utils.metrics import instrument_agent
+from src.utils.prompting import serialize_jd, serialize_resume
 from langsmith import traceable
 
 logger = setup_logger(__name__)
 
-@traceable(name="optimist_agent")
-def get_optimist_opinion(resume_data: dict, jd_data: dict) -> str:
-    """
-    Analyzes the candidate from an optimistic perspective, focusing on 
-    potential, transferrable skills, and growth.
-    """
-    logger.info("Optimist Agent: Analyzing candidate potential...")
-    
-    llm = ChatOpenAI(model="openai/gpt-4o-mini", temperature=0.7)
+MODEL_NAME = "openai/gpt-4o-mini"
+# Bump whenever the prompt below changes so cached analyses are invalidated.
+PROMPT_VERSION = "1"
+
+def _build_chain(model: str = MODEL_NAME):
+    llm = get_llm(model, temperature=0.7)
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", (
@@ -23,19 +23,51 @@ def get_optimist_opinion(resume_data: dict, jd_data: dict) -> str:
             "Even if they lack a specific skill, explain how their existing experience suggests they can learn it quickly."
         )),
         ("human", (
-            "Resume Details: {resume_data}\n\n"
-            "Job Requirements: {jd_data}\n\n"
+            # JD first: the system prompt + JD prefix is shared by every candidate for this job
+            "Job Requirements:\n{jd_data}\n\n"
+            "Resume Details:\n{resume_data}\n\n"
             "Provide your optimistic evaluation of why this candidate is a great fit."
         ))
     ])
     
-    chain = prompt | llm
+    return prompt | llm
+
+@traceable(name="optimist_agent")
+@instrument_agent("optimist")
+def get_optimist_opinion(resume_data: dict, jd_data: dict) -> str:
+    """
+    Analyzes the candidate from an optimistic perspective, focusing on 
+    potential, transferrable skills, and growth.
+    """
+    logger.info("Optimist Agent: Analyzing candidate potential...")
+    
+    chain = _build_chain()
+    
+    try:
+        response = call(chain, {
+            "resume_data": serialize_resume(resume_data),
+            "jd_data": serialize_jd(jd_data)
+        }, MODEL_NAME)
+        return response.content
+    except Exception as e:
+        logger.error(f"Optimist Agent Error: {e}")
+        return f"Error in optimistic evaluation: {str(e)}"
+
+@traceable(name="optimist_agent")
+@instrument_agent("optimist")
+async def aget_optimist_opinion(resume_data: dict, jd_data: dict) -> str:
+    """
+    Async version of get_optimist_opinion.
+    """
+    logger.info("Optimist Agent: Analyzing candidate potential...")
+    
+    chain = _build_chain()
     
     try:
-        response = chain.invoke({
-            "resume_data": str(resume_data),
-            "jd_data": str(jd_data)
-        })
+        response = await hedged_acall(chain, {
+            "resume_data": serialize_resume(resume_data),
+            "jd_data": serialize_jd(jd_data)
+        }, MODEL_NAME, chain_for=_build_chain)
         return response.content
     except Exception as e:
         logger.error(f"Optimist Agent Error: {e}")
@@ -1,26 +1,26 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
+from src.utils.hedging import hedged_acall
+from src.utils.llm import call, error_result, get_llm
 from src.utils.logger import setup_logger
+from src.utils.metrics import instrument_agent
+from src.utils.prompting import serialize_jd, serialize_resume
 from langsmith import traceable
 
 logger = setup_logger(__name__)
 
+MODEL_NAME = "openai/gpt-4o-mini"
+# Bump whenever the prompt below changes so cached analyses are invalidated.
+PROMPT_VERSION = "1"
+
 class RankingOutput(BaseModel):
     score: int = Field(description="Match score between 0 and 100")
     reasoning: str = Field(description="Detailed reasoning for the score, comparing skills and experience")
     missing_skills: list[str] = Field(description="List of required skills missing from the candidate's profile")
 
-@traceable(name="mediator_rank_candidate")
-def rank_candidate(resume_data: dict, jd_data: dict, optimist_opinion: str = "", skeptic_opinion: str = "") -> dict:
-    """
-    Acts as a Mediator, analyzing the candidate by considering both 
-    Optimistic and Skeptical perspectives to reach a fair final score.
-    """
-    logger.info("Mediator Agent: Analyzing debate to reach consensus...")
-    
-    llm = ChatOpenAI(model="openai/gpt-4o-mini", temperature=0)
+def _build_chain(model: str = MODEL_NAME):
+    llm = get_llm(model, temperature=0)
     
     parser = JsonOutputParser(pydantic_object=RankingOutput)
     
@@ -32,8 +32,9 @@ def rank_candidate(resume_data: dict, jd_data: dict, optimist_opinion: str = "",
             "Your task is to reach a final, balanced decision based on all evidence.\n{format_instructions}"
         )),
         ("human", (
-            "RESUME DATA:\n{resume_data}\n\n"
+            # JD first: the system prompt + JD prefix is shared by every candidate for this job
             "JOB DESCRIPTION DATA:\n{jd_data}\n\n"
+            "RESUME DATA:\n{resume_data}\n\n"
             "--- AGENT DEBATE ---\n"
             "OPTIMIST'S VIEW: {optimist_opinion}\n\n"
             "SKEPTIC'S VIEW: {skeptic_opinion}\n\n"
@@ -41,18 +42,53 @@ def rank_candidate(resume_data: dict, jd_data: dict, optimist_opinion: str = "",
         ))
     ])
     
-    chain = prompt | llm | parser
+    return prompt | llm | parser, parser
+
+@traceable(name="mediator_rank_candidate")
+@instrument_agent("mediator")
+def rank_candidate(resume_data: dict, jd_data: dict, optimist_opinion: str = "", skeptic_opinion: str = "") -> dict:
+    """
+    Acts as a Mediator, analyzing the candidate by considering both 
+    Optimistic and Skeptical perspectives to reach a fair final score.
+    """
+    logger.info("Mediator Agent: Analyzing debate to reach consensus...")
+    
+    chain, parser = _build_chain()
+    
+    try:
+        result = call(chain, {
+            "resume_data": serialize_resume(resume_data),
+            "jd_data": serialize_jd(jd_data),
+            "optimist_opinion": optimist_opinion,
+            "skeptic_opinion": skeptic_opinion,
+            "format_instructions": parser.get_format_instructions()
+        }, MODEL_NAME)
+        logger.info(f"Final Decision reached: Score {result.get('score')}")
+        return result
+    except Exception as e:
+        logger.error(f"Mediator Error: {e}")
+        return error_result(e)
+
+@traceable(name="mediator_rank_candidate")
+@instrument_agent("mediator")
+async def arank_candidate(resume_data: dict, jd_data: dict, optimist_opinion: str = "", skeptic_opinion: str = "") -> dict:
+    """
+    Async version of rank_candidate.
+    """
+    logger.info("Mediator Agent: Analyzing debate to reach consensus...")
+    
+    chain, parser = _build_chain()
     
     try:
-        result = chain.invoke({
-            "resume_data": str(resume_data),
-            "jd_data": str(jd_data),
+        result = await hedged_acall(chain, {
+            "resume_data": serialize_resume(resume_data),
+            "jd_data": serialize_jd(jd_data),
             "optimist_opinion": optimist_opinion,
             "skeptic_opinion": skeptic_opinion,
             "format_instructions": parser.get_format_instructions()
-        })
+        }, MODEL_NAME, chain_for=lambda model: _build_chain(model)[0])
         logger.info(f"Final Decision reached: Score {result.get('score')}")
         return result
     except Exception as e:
         logger.error(f"Mediator Error: {e}")
-        return {"error": str(e)}
+        return error_result(e)
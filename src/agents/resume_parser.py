@@ -1,13 +1,20 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import List, Optional
+from src.utils.hedging import hedged_acall
+from src.utils.llm import call, error_result, get_llm
 from src.utils.logger import setup_logger
+from src.utils.metrics import instrument_agent
+from src.utils.prompting import RESUME_MAX_TOKENS, prepare_document
 from langsmith import traceable
 
 logger = setup_logger(__name__)
 
+MODEL_NAME = "openai/gpt-4o-mini"
+# Bump whenever the prompt below changes so cached parses are invalidated.
+PROMPT_VERSION = "2"
+
 # Define the structured output for Resume
 class ResumeData(BaseModel):
     name: Optional[str] = Field(description="Name of the candidate")
@@ -17,31 +24,56 @@ class ResumeData(BaseModel):
     education: List[str] = Field(description="List of degrees and universities")
     recent_role: Optional[str] = Field(description="Most recent job title")
 
+def _build_chain(model: str = MODEL_NAME):
+    llm = get_llm(model, temperature=0)
+    
+    parser = JsonOutputParser(pydantic_object=ResumeData)
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert HR assistant. Extract structured information from the following resume text.\n{format_instructions}"),
+        ("human", "{resume_text}")
+    ])
+    
+    return prompt | llm | parser, parser
+
 @traceable(name="parse_resume")
+@instrument_agent("parse_resume")
 def parse_resume(resume_text: str) -> dict:
     """
     Parses a resume text and extracts structured data.
     """
     logger.info("Parsing resume...")
     
-    llm = ChatOpenAI(model="openai/gpt-4o-mini", temperature=0)
+    chain, parser = _build_chain()
     
-    parser = JsonOutputParser(pydantic_object=ResumeData)
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert HR assistant. Extract structured information from the following resume text.\n{format_instructions}"),
-        ("human", "{resume_text}")
-    ])
+    try:
+        result = call(chain, {
+            "resume_text": prepare_document(resume_text, RESUME_MAX_TOKENS),
+            "format_instructions": parser.get_format_instructions()
+        }, MODEL_NAME)
+        logger.info("Resume parsed successfully.")
+        return result
+    except Exception as e:
+        logger.error(f"Error parsing resume: {e}")
+        return error_result(e)
+
+@traceable(name="parse_resume")
+@instrument_agent("parse_resume")
+async def aparse_resume(resume_text: str) -> dict:
+    """
+    Async version of parse_resume.
+    """
+    logger.info("Parsing resume...")
     
-    chain = prompt | llm | parser
+    chain, parser = _build_chain()
     
     try:
-        result = chain.invoke({
-            "resume_text": resume_text,
+        result = await hedged_acall(chain, {
+            "resume_text": prepare_document(resume_text, RESUME_MAX_TOKENS),
             "format_instructions": parser.get_format_instructions()
-        })
+        }, MODEL_NAME, chain_for=lambda model: _build_chain(model)[0])
         logger.info("Resume parsed successfully.")
         return result
     except Exception as e:
         logger.error(f"Error parsing resume: {e}")
-        return {"error": str(e)}
+        return error_result(e)
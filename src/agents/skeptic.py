@@ -1,19 +1,19 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
+from src.utils.hedging import hedged_acall
+from src.utils.llm import call, get_llm
 from src.utils.logger import setup_logger
+from src.utils.metrics import instrument_agent
+from src.utils.prompting import serialize_jd, serialize_resume
 from langsmith import traceable
 
 logger = setup_logger(__name__)
 
-@traceable(name="skeptic_agent")
-def get_skeptic_opinion(resume_data: dict, jd_data: dict) -> str:
-    """
-    Analyzes the candidate from a skeptical perspective, focusing on 
-    skill gaps, risks, and missing requirements.
-    """
-    logger.info("Skeptic Agent: Identifying risks and gaps...")
-    
-    llm = ChatOpenAI(model="openai/gpt-4o-mini", temperature=0)
+MODEL_NAME = "openai/gpt-4o-mini"
+# Bump whenever the prompt below changes so cached analyses are invalidated.
+PROMPT_VERSION = "1"
+
+def _build_chain(model: str = MODEL_NAME):
+    llm = get_llm(model, temperature=0)
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", (
@@ -24,19 +24,51 @@ def get_skeptic_opinion(resume_data: dict, jd_data: dict) -> str:
             "Be critical but professional."
         )),
         ("human", (
-            "Resume Details: {resume_data}\n\n"
-            "Job Requirements: {jd_data}\n\n"
+            # JD first: the system prompt + JD prefix is shared by every candidate for this job
+            "Job Requirements:\n{jd_data}\n\n"
+            "Resume Details:\n{resume_data}\n\n"
             "Provide your skeptical evaluation of the risks and missing skills for this candidate."
         ))
     ])
     
-    chain = prompt | llm
+    return prompt | llm
+
+@traceable(name="skeptic_agent")
+@instrument_agent("skeptic")
+def get_skeptic_opinion(resume_data: dict, jd_data: dict) -> str:
+    """
+    Analyzes the candidate from a skeptical perspective, focusing on 
+    skill gaps, risks, and missing requirements.
+    """
+    logger.info("Skeptic Agent: Identifying risks and gaps...")
+    
+    chain = _build_chain()
+    
+    try:
+        response = call(chain, {
+            "resume_data": serialize_resume(resume_data),
+            "jd_data": serialize_jd(jd_data)
+        }, MODEL_NAME)
+        return response.content
+    except Exception as e:
+        logger.error(f"Skeptic Agent Error: {e}")
+        return f"Error in skeptical evaluation: {str(e)}"
+
+@traceable(name="skeptic_agent")
+@instrument_agent("skeptic")
+async def aget_skeptic_opinion(resume_data: dict, jd_data: dict) -> str:
+    """
+    Async version of get_skeptic_opinion.
+    """
+    logger.info("Skeptic Agent: Identifying risks and gaps...")
+    
+    chain = _build_chain()
     
     try:
-        response = chain.invoke({
-            "resume_data": str(resume_data),
-            "jd_data": str(jd_data)
-        })
+        response = await hedged_acall(chain, {
+            "resume_data": serialize_resume(resume_data),
+            "jd_data": serialize_jd(jd_data)
+        }, MODEL_NAME, chain_for=_build_chain)
         return response.content
     except Exception as e:
         logger.error(f"Skeptic Agent Error: {e}")
@@ -1,15 +1,67 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from pydantic import BaseModel
-from typing import Optional
+import os
+import json
+import asyncio
+import hashlib
+import shutil
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Request, Response, UploadFile, File, Form
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from dotenv import load_dotenv
-from src.graph import app as graph_app
-from src.utils.logger import setup_logger
+from src.graph import (
+    compile_graphs, get_app, lookup_analysis, run_cached_analysis, screen_batch, screen_shortlist,
+    store_analysis, BATCH_CONCURRENCY, DEBATE_MODES,
+)
+from src.agents.jd_parser import JobDescriptionData
+from src.jobs import JOB_WORKERS, job_store, job_workers
+from src.utils.blobs import blob_store
+from src.utils.cache import analysis_cache, parse_cache_stats
+from src.utils.doc_pool import doc_pool
+from src.utils.candidates import CANDIDATE_STORE_ENABLED, SHORTLIST_SIZE, candidate_store
+from src.utils.hedging import hedger
+from src.utils.llm import preload_llm_libraries
+from src.utils.metrics import render_metrics
+from src.utils.ocr import ocr_router, payload_stats
+from src.utils.prompting import load_encoding
+from src.utils.scheduler import scheduler
+from src.utils.uploads import MAX_UPLOAD_BYTES, UploadTooLarge, checked_upload, save_upload
+from src.utils.logger import log_context, new_id, setup_logger
 
 load_dotenv()
 
 logger = setup_logger(__name__)
 
-app = FastAPI(title="AI Recruitment Engine", version="2.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compiled here rather than at import, so importing the app (workers, tests, tooling) stays fast
+    compile_graphs()
+    # Warm-up work runs off the event loop; kept on app.state so it isn't garbage
+    # collected mid-flight and so shutdown can wait for it
+    app.state.startup_tasks = [
+        asyncio.create_task(asyncio.to_thread(preload_llm_libraries)),
+        asyncio.create_task(asyncio.to_thread(load_encoding)),
+    ]
+    # Background workers for POST /jobs; queued jobs from a previous run resume here
+    if JOB_WORKERS > 0:
+        job_workers.start()
+    if CANDIDATE_STORE_ENABLED:
+        app.state.startup_tasks.append(asyncio.create_task(asyncio.to_thread(candidate_store.warm)))
+    yield
+    await _stop_startup_tasks(app.state.startup_tasks)
+    await job_workers.stop()
+    doc_pool.shutdown()
+
+async def _stop_startup_tasks(tasks: List[asyncio.Task]):
+    # A cancelled task stops waiting; its thread finishes on its own (warm-up is read-only)
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.warning(f"Startup task failed: {result}")
+
+app = FastAPI(title="AI Recruitment Engine", version="2.0.0", lifespan=lifespan)
 
 class AnalysisResponse(BaseModel):
     candidate_name: str | None = None
@@ -18,42 +70,187 @@ class AnalysisResponse(BaseModel):
     reasoning: str | None = None
     missing_skills: list[str] | None = None
     error: str | None = None
+    cached: bool = False
+
+class BatchItem(AnalysisResponse):
+    index: int
+    filename: str | None = None
+
+class BatchAnalysisResponse(BaseModel):
+    job_title: str | None = None
+    total: int
+    results: list[BatchItem]
+
+class JobResponse(BaseModel):
+    id: str
+    status: str
+    attempts: int
+    created_at: float
+    updated_at: float
+    result: AnalysisResponse | None = None
+    error: str | None = None
+
+class CandidateSearchRequest(BaseModel):
+    jd: JobDescriptionData
+    top_k: int = Field(SHORTLIST_SIZE, ge=1, le=1000)
+    min_coverage: float = Field(0.0, ge=0, le=1)
+    min_years: float | None = None
+
+class CandidateMatch(BaseModel):
+    id: int
+    name: str | None = None
+    score: float
+    skill_coverage: float
+    experience_years: float
+    matched_skills: list[str]
+    missing_skills: list[str]
+
+class CandidateSearchResponse(BaseModel):
+    pool_size: int
+    candidates: list[CandidateMatch]
+
+class ShortlistRequest(CandidateSearchRequest):
+    mode: str | None = None
+    concurrency: int = BATCH_CONCURRENCY
+
+class ShortlistItem(AnalysisResponse):
+    candidate_id: int
+    skill_coverage: float
+
+class ShortlistResponse(BaseModel):
+    job_title: str | None = None
+    total: int
+    results: list[ShortlistItem]
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "64"))
+# Whole request body limit, checked against Content-Length before the multipart body is parsed
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(10 * MAX_UPLOAD_BYTES)))
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_REQUEST_BYTES:
+        return JSONResponse(
+            status_code=413, content={"detail": f"Request exceeds the {MAX_REQUEST_BYTES} byte limit"}
+        )
+    return await call_next(request)
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # Every log line written while serving the request carries its ID; clients may supply one
+    request_id = request.headers.get("x-request-id") or new_id()
+    with log_context(request_id=request_id):
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
-@app.post("/analyze", response_model=AnalysisResponse)
-async def analyze(
-    resume_file: Optional[UploadFile] = File(None),
-    jd_file: Optional[UploadFile] = File(None),
-    resume_text: Optional[str] = Form(None),
-    jd_text: Optional[str] = Form(None)
-):
-    logger.info("Received analysis request via Graph")
-    
-    # Read file content if provided
-    resume_bytes = await resume_file.read() if resume_file else None
-    jd_bytes = await jd_file.read() if jd_file else None
+@app.get("/cache/stats")
+def cache_stats():
+    return parse_cache_stats()
+
+@app.delete("/cache/analysis")
+def clear_analysis_cache():
+    """
+    Drops every cached analysis, e.g. after changing scoring criteria that
+    are not part of the cache key.
+    """
+    analysis_cache.clear()
+    return {"status": "cleared"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ocr/stats")
+def ocr_stats():
+    return {**ocr_router.stats(), "payload": payload_stats()}
+
+@app.get("/scheduler/stats")
+def scheduler_stats():
+    return scheduler.stats()
+
+@app.get("/hedging/stats")
+def hedging_stats():
+    # Per-agent hedge rate, hedge wins and current hedge delay
+    return hedger.stats()
+
+async def _spool(upload: Optional[UploadFile]) -> Optional[str]:
+    # The size-checked upload file, registered as a blob; 413 if it's too large
+    if upload is None:
+        return None
+    digest = hashlib.sha256()
+    try:
+        return blob_store.put(await checked_upload(upload, digest=digest), sha256=digest.hexdigest())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+def _check_mode(mode: Optional[str]):
+    if mode is not None and mode not in DEBATE_MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {', '.join(DEBATE_MODES)}")
+
+async def _build_inputs(
+    resume_file: Optional[UploadFile],
+    jd_file: Optional[UploadFile],
+    resume_text: Optional[str],
+    jd_text: Optional[str],
+    prescreen_threshold: Optional[float],
+    mode: Optional[str] = None
+) -> dict:
+    _check_mode(mode)
+
+    # Spool uploads in chunks; the graph reads them by blob ID
+    resume_blob_id = await _spool(resume_file)
+    try:
+        jd_blob_id = await _spool(jd_file)
+    except HTTPException:
+        blob_store.release(resume_blob_id)
+        raise
     
     resume_filename = resume_file.filename if resume_file else None
     jd_filename = jd_file.filename if jd_file else None
 
     # Prepare State Input
-    inputs = {
-        "resume_file_bytes": resume_bytes,
+    return {
+        "resume_blob_id": resume_blob_id,
         "resume_filename": resume_filename,
         "resume_text": resume_text,
-        "jd_file_bytes": jd_bytes,
+        "jd_blob_id": jd_blob_id,
         "jd_filename": jd_filename,
         "jd_text": jd_text,
         "resume_data": {},
-        "jd_data": {}
+        "jd_data": {},
+        "prescreen_threshold": prescreen_threshold,
+        "mode": mode
     }
 
+@app.post("/analyze", response_model=AnalysisResponse)
+async def analyze(
+    resume_file: Optional[UploadFile] = File(None),
+    jd_file: Optional[UploadFile] = File(None),
+    resume_text: Optional[str] = Form(None),
+    jd_text: Optional[str] = Form(None),
+    prescreen_threshold: Optional[float] = Form(None),
+    mode: Optional[str] = Form(None),
+    bypass_cache: bool = Form(False)
+):
+    """
+    Runs the full analysis. `mode` selects the full three-agent debate
+    ("debate", default) or a single combined LLM call ("fast").
+    Results are cached by document content and pipeline version; set
+    `bypass_cache` to force a fresh run.
+    """
+    logger.info("Received analysis request via Graph")
+    
+    inputs = await _build_inputs(resume_file, jd_file, resume_text, jd_text, prescreen_threshold, mode)
+
     try:
         # Invoke Graph
-        final_state = await graph_app.ainvoke(inputs)
+        final_state = await run_cached_analysis(inputs, bypass_cache)
         
         if final_state.get("error"):
             raise HTTPException(status_code=500, detail=final_state["error"])
@@ -62,11 +259,242 @@ async def analyze(
         if not analysis:
              raise HTTPException(status_code=500, detail="Analysis failed to produce results.")
              
-        return analysis
+        return {**analysis, "cached": final_state.get("cached", False)}
         
     except Exception as e:
         logger.error(f"API Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Normally released by ingestion already; covers runs aborted before that
+        blob_store.release(inputs["resume_blob_id"], inputs["jd_blob_id"])
+
+# State keys surfaced as SSE events, in the order they usually become available
+STREAM_EVENTS = {
+    "resume_data": "resume",
+    "jd_data": "jd",
+    "prescreen": "prescreen",
+    "optimist_opinion": "optimist",
+    "skeptic_opinion": "skeptic",
+    "analysis": "result",
+}
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/analyze/stream")
+async def analyze_stream(
+    resume_file: Optional[UploadFile] = File(None),
+    jd_file: Optional[UploadFile] = File(None),
+    resume_text: Optional[str] = Form(None),
+    jd_text: Optional[str] = Form(None),
+    prescreen_threshold: Optional[float] = Form(None),
+    mode: Optional[str] = Form(None),
+    bypass_cache: bool = Form(False)
+):
+    """
+    Same analysis as /analyze, streamed as Server-Sent Events. One event is
+    pushed as each stage completes (resume, jd, prescreen, optimist, skeptic,
+    result), plus `token` events while the Mediator is writing its verdict.
+    A cached analysis is sent as a single `result` event.
+    """
+    logger.info("Received streaming analysis request via Graph")
+
+    inputs = await _build_inputs(resume_file, jd_file, resume_text, jd_text, prescreen_threshold, mode)
+
+    key, cached = await lookup_analysis(inputs, bypass_cache)
+
+    async def events():
+        if cached is not None:
+            yield _sse("result", {**cached, "cached": True})
+            yield _sse("done", {})
+            return
+        try:
+            async for stream_mode, chunk in get_app().astream(inputs, stream_mode=["updates", "messages"]):
+                if stream_mode == "messages":
+                    message, metadata = chunk
+                    if metadata.get("langgraph_node") == "rank" and message.content:
+                        yield _sse("token", {"content": message.content})
+                    continue
+
+                for node, update in chunk.items():
+                    if not update:
+                        continue
+                    for field, event in STREAM_EVENTS.items():
+                        if update.get(field) is not None:
+                            yield _sse(event, update[field])
+                    await store_analysis(key, update)
+
+            yield _sse("done", {})
+        except Exception as e:
+            logger.error(f"API Error: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(blob_store.release, inputs["resume_blob_id"], inputs["jd_blob_id"]),
+    )
+
+@app.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_batch(
+    resume_files: Optional[List[UploadFile]] = File(None),
+    resume_texts: Optional[List[str]] = Form(None),
+    jd_file: Optional[UploadFile] = File(None),
+    jd_text: Optional[str] = Form(None),
+    concurrency: int = Form(BATCH_CONCURRENCY),
+    prescreen_threshold: Optional[float] = Form(None),
+    mode: Optional[str] = Form(None)
+):
+    """
+    Ranks many resumes against a single job description. The JD is parsed
+    once and the resumes are analyzed concurrently.
+    """
+    logger.info("Received batch analysis request via Graph")
+
+    if not resume_files and not resume_texts:
+        raise HTTPException(status_code=400, detail="No resumes provided")
+    _check_mode(mode)
+
+    resume_inputs = []
+    jd_inputs = {"jd_blob_id": None, "jd_filename": jd_file.filename if jd_file else None, "jd_text": jd_text}
+    try:
+        for upload in resume_files or []:
+            resume_inputs.append({
+                "resume_blob_id": await _spool(upload),
+                "resume_filename": upload.filename,
+                "resume_text": None,
+            })
+        for text in resume_texts or []:
+            resume_inputs.append({"resume_blob_id": None, "resume_filename": None, "resume_text": text})
+        jd_inputs["jd_blob_id"] = await _spool(jd_file)
+
+        concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+        batch = await screen_batch(
+            resume_inputs, jd_inputs, concurrency=concurrency, prescreen_threshold=prescreen_threshold, mode=mode
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"API Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        blob_store.release(jd_inputs["jd_blob_id"], *(r["resume_blob_id"] for r in resume_inputs))
+
+    if batch.get("error"):
+        raise HTTPException(status_code=500, detail=batch["error"])
+
+    return {
+        "job_title": batch["jd_data"].get("job_title"),
+        "total": len(batch["results"]),
+        "results": batch["results"],
+    }
+
+def _job_response(job: dict) -> dict:
+    return {key: job[key] for key in ("id", "status", "attempts", "created_at", "updated_at", "result", "error")}
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(
+    response: Response,
+    resume_file: Optional[UploadFile] = File(None),
+    jd_file: Optional[UploadFile] = File(None),
+    resume_text: Optional[str] = Form(None),
+    jd_text: Optional[str] = Form(None),
+    prescreen_threshold: Optional[float] = Form(None),
+    mode: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Form(None),
+    idempotency_header: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Queues an analysis (same fields as /analyze) and returns immediately
+    with a job ID to poll at GET /jobs/{id}. Re-submitting with the same
+    idempotency key (form field or `Idempotency-Key` header) returns the
+    existing job instead of running it again.
+    """
+    _check_mode(mode)
+    key = idempotency_key or idempotency_header
+    if key:
+        existing = await asyncio.to_thread(job_store.get_by_key, key)
+        if existing:
+            response.status_code = 200
+            return _job_response(existing)
+
+    if not (resume_file or resume_text) or not (jd_file or jd_text):
+        raise HTTPException(status_code=400, detail="A resume and a job description are required")
+
+    job_id = job_store.new_id()
+    files_dir = job_store.files_dir(job_id)
+    inputs = {
+        "resume_filename": resume_file.filename if resume_file else None,
+        "resume_text": resume_text,
+        "jd_filename": jd_file.filename if jd_file else None,
+        "jd_text": jd_text,
+        "prescreen_threshold": prescreen_threshold,
+        "mode": mode,
+    }
+    try:
+        # Files must outlive the request, so they are copied to the job's directory
+        for prefix, upload in (("resume", resume_file), ("jd", jd_file)):
+            if upload is not None:
+                os.makedirs(files_dir, exist_ok=True)
+                path = os.path.abspath(os.path.join(files_dir, prefix + os.path.splitext(upload.filename or "")[1]))
+                await save_upload(upload, path)
+                inputs[f"{prefix}_path"] = path
+        job, created = await asyncio.to_thread(job_store.create, job_id, inputs, key)
+    except UploadTooLarge as e:
+        shutil.rmtree(files_dir, ignore_errors=True)
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        shutil.rmtree(files_dir, ignore_errors=True)
+        raise
+
+    if created:
+        logger.info(f"Queued job {job_id}")
+        job_workers.notify()
+    else:
+        # Lost a race with a concurrent submission using the same key
+        shutil.rmtree(files_dir, ignore_errors=True)
+        response.status_code = 200
+    return _job_response(job)
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+@app.get("/candidates/stats")
+def candidates_stats():
+    return candidate_store.stats()
+
+@app.post("/candidates/search", response_model=CandidateSearchResponse)
+def search_candidates(request: CandidateSearchRequest):
+    """
+    Ranks every stored candidate against a parsed JD by required-skill
+    coverage and experience, using the candidate index only (no LLM calls).
+    """
+    matches = candidate_store.search(request.jd.model_dump(), request.top_k, request.min_coverage, request.min_years)
+    return {"pool_size": len(candidate_store), "candidates": matches}
+
+@app.post("/candidates/shortlist", response_model=ShortlistResponse)
+async def shortlist_candidates(request: ShortlistRequest):
+    """
+    Same selection as /candidates/search, then the debate runs on the
+    top `top_k` candidates only, from their stored parsed resumes.
+    """
+    _check_mode(request.mode)
+    concurrency = max(1, min(request.concurrency, BATCH_MAX_CONCURRENCY))
+    shortlist = await screen_shortlist(
+        request.jd.model_dump(), request.top_k, concurrency, request.mode, request.min_coverage, request.min_years
+    )
+    return {"job_title": request.jd.job_title, "total": len(shortlist["results"]), "results": shortlist["results"]}
+
+@app.delete("/candidates/{candidate_id}")
+def delete_candidate(candidate_id: int):
+    if not candidate_store.delete(candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    return {"status": "deleted"}
 
 if __name__ == "__main__":
     import uvicorn
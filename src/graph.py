@@ -1,23 +1,51 @@
-from typing import TypedDict, Optional, Dict
-from langgraph.graph import StateGraph, END
-from src.utils.ocr import extract_text_from_file
-from src.agents.resume_parser import parse_resume
-from src.agents.jd_parser import parse_jd
-from src.agents.optimist import get_optimist_opinion
-from src.agents.skeptic import get_skeptic_opinion
-from src.agents.ranker import rank_candidate
-from src.utils.logger import setup_logger
+import asyncio
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, TypedDict, Optional, Dict, List, Tuple
+from langgraph.constants import END
+from src.utils.ocr import aextract_text_from_file
+from src.agents import resume_parser, jd_parser, optimist, skeptic, ranker, fast_debate
+from src.agents.resume_parser import aparse_resume, ResumeData
+from src.agents.jd_parser import aparse_jd, JobDescriptionData
+from src.agents.optimist import aget_optimist_opinion
+from src.agents.skeptic import aget_skeptic_opinion
+from src.agents.ranker import arank_candidate
+from src.agents.fast_debate import afast_debate
+from src.utils.blobs import blob_store
+from src.utils.candidates import SHORTLIST_SIZE, aremember_candidate, candidate_store
+from src.utils.cache import (
+    ANALYSIS_CACHE_ENABLED, CACHE_ENABLED, analysis_cache, analysis_cache_key, parse_cache_key,
+    resume_parse_cache, jd_parse_cache, schema_fingerprint, text_hash,
+)
+from src.utils.hedging import hedger
+from src.utils.logger import log_context, new_id, setup_logger
+from src.utils.metrics import instrument_node
+from src.utils.prescreen import PRESCREEN_THRESHOLD, prescreen, prescreen_analysis
+from src.utils.prompting import JD_MAX_TOKENS, RESUME_MAX_TOKENS
+from src.utils.scheduler import BATCH, priority_class
+from src.utils.skills import SKILL_EMBED_DIM, SKILL_MATCH_THRESHOLD
+
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
 
 logger = setup_logger(__name__)
 
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# "debate": Optimist + Skeptic + Mediator (3 LLM calls); "fast": one combined call
+DEBATE_MODES = ("debate", "fast")
+DEBATE_MODE = os.getenv("DEBATE_MODE", "debate")
+
 # 1. Define State
 class RecruitmentState(TypedDict):
-    # Inputs
-    resume_file_bytes: Optional[bytes]
+    # Inputs. Files are referenced by blob_store ID, never held in state;
+    # the blob is released as soon as its text has been extracted.
+    resume_blob_id: Optional[str]
     resume_filename: Optional[str]
     resume_text: Optional[str]
     
-    jd_file_bytes: Optional[bytes]
+    jd_blob_id: Optional[str]
     jd_filename: Optional[str]
     jd_text: Optional[str]
     
@@ -25,6 +53,13 @@ class RecruitmentState(TypedDict):
     resume_data: Optional[Dict]
     jd_data: Optional[Dict]
     
+    # Pre-screen (deterministic, before the debate)
+    prescreen_threshold: Optional[float]
+    prescreen: Optional[Dict]
+    
+    # Debate mode: "debate" (default) or "fast"
+    mode: Optional[str]
+    
     # Opinions (Debate Node)
     optimist_opinion: Optional[str]
     skeptic_opinion: Optional[str]
@@ -34,13 +69,33 @@ class RecruitmentState(TypedDict):
     error: Optional[str]
 
 # 2. Define Nodes
-def ingest_resume(state: RecruitmentState):
+# Nodes are async so the graph never parks LLM waits on worker threads;
+# the sync agent functions remain available for scripts.
+class AnalysisAborted(Exception):
+    """
+    Raised by a node when the run cannot succeed. LangGraph stops scheduling
+    downstream nodes and cancels sibling tasks still in flight (e.g. the other
+    branch's OCR or parse call); run_analysis() turns it into `error`.
+    `retryable` marks a transient provider failure (timeout, 5xx, exhausted
+    429 retries) as opposed to bad input or an unusable parse.
+    """
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+@instrument_node("ingest_resume")
+async def ingest_resume(state: RecruitmentState):
     logger.info("Node: Ingest Resume")
     try:
-        if state.get("resume_file_bytes"):
-            text = extract_text_from_file(state["resume_file_bytes"], state.get("resume_filename", "resume.txt"))
+        blob_id = state.get("resume_blob_id")
+        if blob_id:
+            try:
+                text = await aextract_text_from_file(blob_store.open(blob_id), state.get("resume_filename") or "resume.txt")
+            finally:
+                blob_store.release(blob_id)
             if text.startswith("Error:"):
-                return {"error": text}
+                raise AnalysisAborted(text)
             logger.info(f"Ingested resume from file. Length: {len(text)}")
             return {"resume_text": text}
         
@@ -49,18 +104,25 @@ def ingest_resume(state: RecruitmentState):
             logger.info(f"Ingested resume from text input. Length: {len(text_input)}")
             return {"resume_text": text_input}
             
-        return {"error": "No valid resume text or file provided"}
+        raise AnalysisAborted("No valid resume text or file provided")
+    except AnalysisAborted:
+        raise
     except Exception as e:
         logger.error(f"Ingest Resume Error: {e}")
-        return {"error": str(e)}
+        raise AnalysisAborted(str(e)) from e
 
-def ingest_jd(state: RecruitmentState):
+@instrument_node("ingest_jd")
+async def ingest_jd(state: RecruitmentState):
     logger.info("Node: Ingest JD")
     try:
-        if state.get("jd_file_bytes"):
-            text = extract_text_from_file(state["jd_file_bytes"], state.get("jd_filename", "jd.txt"))
+        blob_id = state.get("jd_blob_id")
+        if blob_id:
+            try:
+                text = await aextract_text_from_file(blob_store.open(blob_id), state.get("jd_filename") or "jd.txt")
+            finally:
+                blob_store.release(blob_id)
             if text.startswith("Error:"):
-                return {"error": text}
+                raise AnalysisAborted(text)
             logger.info(f"Ingested JD from file. Length: {len(text)}")
             return {"jd_text": text}
         
@@ -69,49 +131,101 @@ def ingest_jd(state: RecruitmentState):
             logger.info(f"Ingested JD from text input. Length: {len(text_input)}")
             return {"jd_text": text_input}
             
-        return {"error": "No valid JD text or file provided"}
+        raise AnalysisAborted("No valid JD text or file provided")
+    except AnalysisAborted:
+        raise
     except Exception as e:
         logger.error(f"Ingest JD Error: {e}")
-        return {"error": str(e)}
+        raise AnalysisAborted(str(e)) from e
 
-def parse_resume_node(state: RecruitmentState):
+@instrument_node("parse_resume")
+async def parse_resume_node(state: RecruitmentState):
     logger.info("Node: Parse Resume")
-    if state.get("error"): return None
-    
-    result = parse_resume(state["resume_text"])
+    # The token budget decides how much of the text the parser sees
+    version = f"{resume_parser.PROMPT_VERSION}:{RESUME_MAX_TOKENS}"
+    key = parse_cache_key(state["resume_text"], resume_parser.MODEL_NAME, version, ResumeData)
+    cached = await resume_parse_cache.aget(key) if CACHE_ENABLED else None
+    if cached is not None:
+        logger.info("Parse cache hit for resume, skipping LLM.")
+        await aremember_candidate(cached, text_hash(state["resume_text"]))
+        return {"resume_data": cached}
+
+    result = await aparse_resume(state["resume_text"])
     if "error" in result:
-        return {"error": result["error"]}
+        raise AnalysisAborted(result["error"], retryable=result.get("retryable", False))
+    if CACHE_ENABLED:
+        await resume_parse_cache.aset(key, result)
+    await aremember_candidate(result, text_hash(state["resume_text"]))
     return {"resume_data": result}
 
-def parse_jd_node(state: RecruitmentState):
+@instrument_node("parse_jd")
+async def parse_jd_node(state: RecruitmentState):
     logger.info("Node: Parse JD")
-    if state.get("error"): return None
-    
-    result = parse_jd(state["jd_text"])
+    version = f"{jd_parser.PROMPT_VERSION}:{JD_MAX_TOKENS}"
+    key = parse_cache_key(state["jd_text"], jd_parser.MODEL_NAME, version, JobDescriptionData)
+    cached = await jd_parse_cache.aget(key) if CACHE_ENABLED else None
+    if cached is not None:
+        logger.info("Parse cache hit for JD, skipping LLM.")
+        return {"jd_data": cached}
+
+    result = await aparse_jd(state["jd_text"])
     if "error" in result:
-        return {"error": result["error"]}
+        raise AnalysisAborted(result["error"], retryable=result.get("retryable", False))
+    if CACHE_ENABLED:
+        await jd_parse_cache.aset(key, result)
     return {"jd_data": result}
 
-def optimist_node(state: RecruitmentState):
-    logger.info("Node: The Optimist")
-    if state.get("error"): return None
+@instrument_node("prescreen")
+async def prescreen_node(state: RecruitmentState):
+    logger.info("Node: Pre-screen")
+    threshold = state.get("prescreen_threshold")
+    if threshold is None:
+        threshold = PRESCREEN_THRESHOLD
     
-    opinion = get_optimist_opinion(state["resume_data"], state["jd_data"])
+    result = prescreen(state["resume_data"], state["jd_data"])
+    logger.info(f"Pre-screen score {result['score']:.2f} (threshold {threshold:.2f})")
+    if result["score"] >= threshold:
+        return {"prescreen": result}
+    
+    analysis = prescreen_analysis(state["resume_data"], state["jd_data"], result, threshold)
+    analysis["candidate_name"] = state["resume_data"].get("name", "Unknown")
+    analysis["job_title"] = state["jd_data"].get("job_title", "Unknown")
+    return {"prescreen": result, "analysis": analysis}
+
+def route_after_prescreen(state: RecruitmentState):
+    # Rejected candidates already have their final result; skip the debate
+    if state.get("analysis"):
+        return END
+    if (state.get("mode") or DEBATE_MODE) == "fast":
+        return "fast_debate"
+    return ["optimist", "skeptic"]
+
+@instrument_node("optimist")
+async def optimist_node(state: RecruitmentState):
+    logger.info("Node: The Optimist")
+    opinion = await aget_optimist_opinion(state["resume_data"], state["jd_data"])
     return {"optimist_opinion": opinion}
 
-def skeptic_node(state: RecruitmentState):
+@instrument_node("skeptic")
+async def skeptic_node(state: RecruitmentState):
     logger.info("Node: The Skeptic")
-    if state.get("error"): return None
-    
-    opinion = get_skeptic_opinion(state["resume_data"], state["jd_data"])
+    opinion = await aget_skeptic_opinion(state["resume_data"], state["jd_data"])
     return {"skeptic_opinion": opinion}
 
-def rank_node(state: RecruitmentState):
+def _finish_analysis(result: Dict, state: RecruitmentState) -> Dict:
+    result["candidate_name"] = state["resume_data"].get("name", "Unknown")
+    result["job_title"] = state["jd_data"].get("job_title", "Unknown")
+    # The pre-screen's skill matching is deterministic and alias-aware ("k8s" covers
+    # "Kubernetes"), so the same resume/JD pair always reports the same gaps
+    if state.get("prescreen"):
+        result["missing_skills"] = state["prescreen"]["missing_skills"]
+    return result
+
+@instrument_node("rank")
+async def rank_node(state: RecruitmentState):
     logger.info("Node: Mediator (Final Rank)")
-    if state.get("error"): return None
-    
     # Wait for both opinions to be present in state
-    result = rank_candidate(
+    result = await arank_candidate(
         state["resume_data"], 
         state["jd_data"], 
         state.get("optimist_opinion", ""), 
@@ -119,40 +233,306 @@ def rank_node(state: RecruitmentState):
     )
     
     if "error" in result:
-        return {"error": result["error"]}
+        raise AnalysisAborted(result["error"], retryable=result.get("retryable", False))
     
-    result["candidate_name"] = state["resume_data"].get("name", "Unknown")
-    result["job_title"] = state["jd_data"].get("job_title", "Unknown")
-    
-    return {"analysis": result}
+    return {"analysis": _finish_analysis(result, state)}
+
+@instrument_node("fast_debate")
+async def fast_debate_node(state: RecruitmentState):
+    logger.info("Node: Fast Debate (single call)")
+    result = await afast_debate(state["resume_data"], state["jd_data"])
+
+    if "error" in result:
+        raise AnalysisAborted(result["error"], retryable=result.get("retryable", False))
+
+    # Same state shape as the full debate, so API/stream consumers don't care which ran
+    pros, cons = result.pop("pros", None) or [], result.pop("cons", None) or []
+
+    return {
+        "optimist_opinion": "\n".join(f"- {p}" for p in pros),
+        "skeptic_opinion": "\n".join(f"- {c}" for c in cons),
+        "analysis": _finish_analysis(result, state),
+    }
 
 # 3. Build Graph
-workflow = StateGraph(RecruitmentState)
-
-workflow.add_node("ingest_resume", ingest_resume)
-workflow.add_node("ingest_jd", ingest_jd)
-workflow.add_node("parse_resume", parse_resume_node)
-workflow.add_node("parse_jd", parse_jd_node)
-workflow.add_node("optimist", optimist_node)
-workflow.add_node("skeptic", skeptic_node)
-workflow.add_node("rank", rank_node)
-
-# Define Edges
-workflow.set_entry_point("ingest_resume")
-workflow.set_entry_point("ingest_jd")
-
-workflow.add_edge("ingest_resume", "parse_resume")
-workflow.add_edge("ingest_jd", "parse_jd")
-
-# Once both are parsed, start the debate
-workflow.add_edge("parse_resume", "optimist")
-workflow.add_edge("parse_resume", "skeptic")
-workflow.add_edge("parse_jd", "optimist")
-workflow.add_edge("parse_jd", "skeptic")
-
-# Fan-in from debate to mediator
-workflow.add_edge("optimist", "rank")
-workflow.add_edge("skeptic", "rank")
-
-# Compile
-app = workflow.compile()
+def build_workflow(include_jd: bool = True, include_resume: bool = True) -> "StateGraph":
+    """
+    Builds the recruitment workflow. With include_jd=False the JD branch is
+    left out and `jd_data` must be supplied pre-parsed in the input state
+    (used for batch screening, where one JD is shared by many resumes).
+    include_resume=False does the same for `resume_data` (candidates from
+    the candidate store, which were parsed when they were first seen).
+    """
+    from langgraph.graph import StateGraph
+    workflow = StateGraph(RecruitmentState)
+
+    workflow.add_node("prescreen", prescreen_node)
+    workflow.add_node("optimist", optimist_node)
+    workflow.add_node("skeptic", skeptic_node)
+    workflow.add_node("rank", rank_node)
+    workflow.add_node("fast_debate", fast_debate_node)
+
+    # Define Edges
+    parsed = []
+    if include_resume:
+        workflow.add_node("ingest_resume", ingest_resume)
+        workflow.add_node("parse_resume", parse_resume_node)
+        workflow.set_entry_point("ingest_resume")
+        workflow.add_edge("ingest_resume", "parse_resume")
+        parsed.append("parse_resume")
+    if include_jd:
+        workflow.add_node("ingest_jd", ingest_jd)
+        workflow.add_node("parse_jd", parse_jd_node)
+        workflow.set_entry_point("ingest_jd")
+        workflow.add_edge("ingest_jd", "parse_jd")
+        parsed.append("parse_jd")
+
+    # Once both are parsed, pre-screen
+    if len(parsed) > 1:
+        workflow.add_edge(parsed, "prescreen")
+    elif parsed:
+        workflow.add_edge(parsed[0], "prescreen")
+    else:
+        workflow.set_entry_point("prescreen")
+
+    # Only candidates that pass the pre-screen go to the (full or fast) debate
+    workflow.add_conditional_edges("prescreen", route_after_prescreen, ["optimist", "skeptic", "fast_debate", END])
+
+    # Fan-in from debate to mediator
+    workflow.add_edge(["optimist", "skeptic"], "rank")
+    workflow.add_edge("fast_debate", END)
+
+    return workflow
+
+def build_jd_workflow() -> "StateGraph":
+    from langgraph.graph import StateGraph
+    workflow = StateGraph(RecruitmentState)
+    workflow.add_node("ingest_jd", ingest_jd)
+    workflow.add_node("parse_jd", parse_jd_node)
+    workflow.set_entry_point("ingest_jd")
+    workflow.add_edge("ingest_jd", "parse_jd")
+    workflow.add_edge("parse_jd", END)
+    return workflow
+
+# Compile. Nothing is compiled at import (langgraph alone takes ~0.5s to load):
+# the API compiles every graph at startup, scripts on first use.
+GRAPHS = {
+    "full": build_workflow,
+    "candidate": lambda: build_workflow(include_jd=False),
+    "parsed": lambda: build_workflow(include_jd=False, include_resume=False),
+    "jd": build_jd_workflow,
+}
+_compiled: Dict[str, Any] = {}
+_compile_lock = threading.Lock()
+
+def get_app(name: str = "full"):
+    """
+    The compiled graph `name` (a key of GRAPHS), compiled once per process.
+    """
+    graph = _compiled.get(name)
+    if graph is None:
+        with _compile_lock:
+            graph = _compiled.get(name)
+            if graph is None:
+                start = time.perf_counter()
+                graph = _compiled[name] = GRAPHS[name]().compile()
+                logger.info(f"Compiled {name} graph in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return graph
+
+def compile_graphs():
+    for name in GRAPHS:
+        get_app(name)
+
+_GRAPH_ATTRIBUTES = {"app": "full", "candidate_app": "candidate", "parsed_app": "parsed", "jd_app": "jd"}
+
+def __getattr__(name: str):
+    # `src.graph.app` and friends still work (e.g. for LangGraph Studio); compiled on first access
+    if name in _GRAPH_ATTRIBUTES:
+        return get_app(_GRAPH_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+async def run_analysis(inputs: Dict, graph=None) -> Dict:
+    """
+    Invokes a compiled recruitment graph and returns its final state.
+    An aborted run returns the inputs with `error` set instead of raising,
+    and `error_retryable` if a later attempt could succeed.
+    """
+    graph = graph or get_app()
+    with log_context(run_id=new_id()):
+        try:
+            return await graph.ainvoke(inputs)
+        except AnalysisAborted as e:
+            logger.warning(f"Analysis aborted: {e}")
+            return {**inputs, "error": str(e), "error_retryable": e.retryable}
+
+def pipeline_version() -> str:
+    """
+    Models, prompt versions and output schemas of every agent, plus the
+    settings that change what they see or which model answers (document
+    token budgets, the hedge fallback model). Changing any of them changes
+    the analysis cache key, so stale results are never served.
+    """
+    agents = (resume_parser, jd_parser, optimist, skeptic, ranker, fast_debate)
+    parts = [f"{agent.__name__}:{agent.MODEL_NAME}:{agent.PROMPT_VERSION}" for agent in agents]
+    parts += [schema_fingerprint(schema) for schema in (ResumeData, JobDescriptionData, fast_debate.FastDebateOutput)]
+    parts.append(f"skills:{SKILL_MATCH_THRESHOLD}:{SKILL_EMBED_DIM}")
+    parts.append(f"budgets:{RESUME_MAX_TOKENS}:{JD_MAX_TOKENS}")
+    parts.append(f"hedge_fallback:{hedger.fallback_model if hedger.enabled else ''}")
+    return "|".join(parts)
+
+def _input_hash(inputs: Dict, prefix: str) -> Optional[str]:
+    blob_id = inputs.get(f"{prefix}_blob_id")
+    if blob_id:
+        return "file:" + blob_store.sha256(blob_id)
+    text = inputs.get(f"{prefix}_text")
+    return "text:" + text_hash(text) if text else None
+
+def analysis_key(inputs: Dict) -> Optional[str]:
+    """
+    Result cache key for a single analysis, or None if the inputs can't be
+    keyed (a document is missing).
+    """
+    resume_hash, jd_hash = _input_hash(inputs, "resume"), _input_hash(inputs, "jd")
+    if not resume_hash or not jd_hash:
+        return None
+    threshold = inputs.get("prescreen_threshold")
+    options = {
+        "mode": inputs.get("mode") or DEBATE_MODE,
+        "prescreen_threshold": PRESCREEN_THRESHOLD if threshold is None else threshold,
+        # The same bytes are extracted differently as .pdf vs .txt
+        "resume_ext": os.path.splitext(inputs.get("resume_filename") or "")[1].lower(),
+        "jd_ext": os.path.splitext(inputs.get("jd_filename") or "")[1].lower(),
+    }
+    return analysis_cache_key(resume_hash, jd_hash, pipeline_version(), options)
+
+async def lookup_analysis(inputs: Dict, bypass_cache: bool = False) -> Tuple[Optional[str], Optional[Dict]]:
+    """
+    Returns (cache key, cached analysis or None). The key is None when the
+    cache is disabled or the inputs can't be keyed. `bypass_cache` skips the
+    lookup but still returns the key, so a fresh result can replace the
+    cached one.
+    """
+    key = analysis_key(inputs) if ANALYSIS_CACHE_ENABLED else None
+    if key is None or bypass_cache:
+        return key, None
+    return key, await analysis_cache.aget(key)
+
+async def store_analysis(key: Optional[str], final_state: Dict):
+    if key and final_state.get("analysis") and not final_state.get("error"):
+        await analysis_cache.aset(key, final_state["analysis"])
+
+async def run_cached_analysis(inputs: Dict, bypass_cache: bool = False, graph=None) -> Dict:
+    """
+    run_analysis behind the whole-analysis result cache. A hit returns the
+    inputs plus the cached `analysis` (and `cached=True`) without running
+    the graph. `bypass_cache` is for callers that want a fresh sample from
+    the non-deterministic debate (the Optimist runs at temperature 0.7).
+    """
+    key, cached = await lookup_analysis(inputs, bypass_cache)
+    if cached is not None:
+        logger.info("Analysis cache hit")
+        return {**inputs, "analysis": cached, "cached": True}
+
+    final_state = await run_analysis(inputs, graph)
+    await store_analysis(key, final_state)
+    return final_state
+
+# 4. Batch Screening
+async def screen_batch(
+    resume_inputs: List[Dict],
+    jd_inputs: Dict,
+    concurrency: int = BATCH_CONCURRENCY,
+    prescreen_threshold: Optional[float] = None,
+    mode: Optional[str] = None,
+) -> Dict:
+    """
+    Screens many resumes against one job description.
+    The JD is ingested and parsed once; resumes then fan out through the
+    per-candidate graph with at most `concurrency` analyses in flight.
+    Returns the parsed JD and the results sorted by score (failures last).
+    LLM calls run at batch priority, behind interactive requests.
+    """
+    with priority_class(BATCH):
+        return await _screen_batch(resume_inputs, jd_inputs, concurrency, prescreen_threshold, mode)
+
+async def _screen_batch(
+    resume_inputs: List[Dict],
+    jd_inputs: Dict,
+    concurrency: int,
+    prescreen_threshold: Optional[float],
+    mode: Optional[str],
+) -> Dict:
+    logger.info(f"Batch screening {len(resume_inputs)} resumes (concurrency={concurrency})")
+
+    jd_state = await run_analysis({**jd_inputs, "jd_data": {}}, get_app("jd"))
+    if jd_state.get("error"):
+        return {"jd_data": None, "results": [], "error": jd_state["error"]}
+    jd_data = jd_state["jd_data"]
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def screen_one(index: int, resume_input: Dict) -> Dict:
+        async with semaphore:
+            item = {"index": index, "filename": resume_input.get("resume_filename")}
+            try:
+                final_state = await run_analysis({
+                    **resume_input,
+                    "jd_text": jd_state.get("jd_text"),
+                    "jd_data": jd_data,
+                    "resume_data": {},
+                    "prescreen_threshold": prescreen_threshold,
+                    "mode": mode,
+                }, get_app("candidate"))
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {e}")
+                return {**item, "error": str(e)}
+
+            if final_state.get("error"):
+                return {**item, "error": final_state["error"]}
+            return {**item, **final_state.get("analysis", {})}
+
+    results = await asyncio.gather(*(screen_one(i, r) for i, r in enumerate(resume_inputs)))
+    results.sort(key=lambda r: (r.get("score") is None, -(r.get("score") or 0), r["index"]))
+    return {"jd_data": jd_data, "results": results}
+
+# 5. Candidate Pool
+async def screen_shortlist(
+    jd_data: Dict,
+    top_k: int = SHORTLIST_SIZE,
+    concurrency: int = BATCH_CONCURRENCY,
+    mode: Optional[str] = None,
+    min_coverage: float = 0.0,
+    min_years: Optional[float] = None,
+) -> Dict:
+    """
+    Finds the best `top_k` stored candidates for a parsed JD through the
+    candidate index (no LLM calls), then runs the debate on that shortlist
+    only, from the stored `resume_data`. Results are sorted by score.
+    """
+    matches = candidate_store.search(jd_data, top_k, min_coverage, min_years)
+    logger.info(f"Shortlisted {len(matches)} of {len(candidate_store)} stored candidates")
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def debate_one(match: Dict) -> Dict:
+        async with semaphore:
+            item = {"candidate_id": match["id"], "skill_coverage": match["skill_coverage"]}
+            try:
+                final_state = await run_analysis({
+                    "resume_data": match["resume_data"],
+                    "jd_data": jd_data,
+                    # Already selected by the index; don't let the pre-screen drop anyone
+                    "prescreen_threshold": 0.0,
+                    "mode": mode,
+                }, get_app("parsed"))
+            except Exception as e:
+                logger.error(f"Shortlist candidate {match['id']} failed: {e}")
+                return {**item, "error": str(e)}
+
+            if final_state.get("error"):
+                return {**item, "error": final_state["error"]}
+            return {**item, **final_state.get("analysis", {})}
+
+    with priority_class(BATCH):
+        results = await asyncio.gather(*(debate_one(m) for m in matches))
+    results.sort(key=lambda r: (r.get("score") is None, -(r.get("score") or 0), r["candidate_id"]))
+    return {"results": results}
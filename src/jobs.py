@@ -0,0 +1,373 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from src.graph import run_analysis
+from src.utils.blobs import blob_store
+from src.utils.logger import log_context, setup_logger
+from src.utils.scheduler import BATCH, priority_class
+
+logger = setup_logger(__name__)
+
+JOBS_DIR = os.getenv("JOBS_DIR", ".jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "5"))  # seconds, doubled per attempt
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# A running job's claim expires unless its worker renews it (every third of this)
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+class JobFailed(Exception):
+    """
+    A failure that would repeat on every attempt (an unreadable file, an
+    aborted analysis); the job fails at once instead of being retried.
+    """
+
+class JobStore:
+    """
+    Durable job queue in SQLite. Jobs survive restarts: a running job is
+    claimed by one store instance (`owner`) under a lease that its worker
+    keeps renewing, and only jobs whose lease has expired (their process
+    died) are put back in the queue, so several processes can share one
+    database. Inputs and results are stored as JSON; uploaded files live
+    next to the database under `files/<job id>/` until the job finishes.
+    """
+
+    def __init__(self, directory: str = JOBS_DIR, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.directory = directory
+        self.path = os.path.join(directory, "jobs.sqlite3")
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " idempotency_key TEXT UNIQUE,"
+                " status TEXT NOT NULL,"
+                " inputs TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " available_at REAL NOT NULL,"
+                " claimed_by TEXT,"
+                " lease_expires_at REAL)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("claimed_by", "TEXT"), ("lease_expires_at", "REAL")):
+                if column not in columns:  # databases created before leases
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, available_at, created_at)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["inputs"] = json.loads(job["inputs"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def files_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, "files", job_id)
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def create(self, job_id: str, inputs: Dict, idempotency_key: Optional[str] = None) -> Tuple[Dict, bool]:
+        """
+        Enqueues a job. If `idempotency_key` was already used, nothing is
+        enqueued and the existing job is returned with created=False.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            try:
+                db.execute(
+                    "INSERT INTO jobs (id, idempotency_key, status, inputs, created_at, updated_at, available_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, idempotency_key, QUEUED, json.dumps(inputs), now, now, now),
+                )
+                db.commit()
+                created = True
+            except sqlite3.IntegrityError:
+                db.rollback()
+                created = False
+            if created:
+                row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            else:
+                row = db.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        return self._to_dict(row), created
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def get_by_key(self, idempotency_key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db().execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self) -> Optional[Dict]:
+        """
+        Atomically moves the oldest due job from queued to running, leased
+        to this store's owner.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?, claimed_by = ?, lease_expires_at = ?"
+                " WHERE id = (SELECT id FROM jobs WHERE status = ? AND available_at <= ?"
+                "             ORDER BY created_at LIMIT 1)"
+                " RETURNING *",
+                (RUNNING, now, self.owner, now + self.lease_seconds, QUEUED, now),
+            ).fetchone()
+            db.commit()
+        return self._to_dict(row) if row else None
+
+    def complete(self, job_id: str, result: Dict) -> bool:
+        # False if the lease was lost and the job now belongs to another worker
+        with self._lock:
+            db = self._db()
+            updated = db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ?, claimed_by = NULL,"
+                " lease_expires_at = NULL WHERE id = ? AND status = ? AND claimed_by = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id, RUNNING, self.owner),
+            ).rowcount
+            db.commit()
+        return updated > 0
+
+    def fail(self, job_id: str, error: str, max_attempts: int = JOB_MAX_ATTEMPTS, retry: bool = True) -> Optional[str]:
+        """
+        Records a failed attempt. Unless `retry` is False, the job is
+        re-queued with exponential backoff until it has used `max_attempts`.
+        Returns the new status, or None if the lease was lost and the job
+        belongs to another worker.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND status = ? AND claimed_by = ?", (job_id, RUNNING, self.owner)
+            ).fetchone()
+            if row is None:
+                return None
+            attempts = row[0]
+            status = QUEUED if retry and attempts < max_attempts else FAILED
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, available_at = ?, claimed_by = NULL,"
+                " lease_expires_at = NULL WHERE id = ?",
+                (status, error, now, now + JOB_RETRY_BACKOFF * 2 ** (attempts - 1), job_id),
+            )
+            db.commit()
+        return status
+
+    def renew(self, job_ids: List[str]) -> int:
+        # Extends this owner's leases on jobs it is still running
+        if not job_ids:
+            return 0
+        placeholders = ",".join("?" * len(job_ids))
+        with self._lock:
+            db = self._db()
+            count = db.execute(
+                f"UPDATE jobs SET lease_expires_at = ? WHERE id IN ({placeholders}) AND status = ? AND claimed_by = ?",
+                (time.time() + self.lease_seconds, *job_ids, RUNNING, self.owner),
+            ).rowcount
+            db.commit()
+        return count
+
+    def requeue_expired(self, max_attempts: int = JOB_MAX_ATTEMPTS) -> Tuple[int, List[str]]:
+        """
+        Running jobs whose owner stopped renewing the lease (its process
+        died). The dead run counts as an attempt (claim() already counted
+        it), so a job that keeps killing its worker, e.g. by running out of
+        memory on a huge PDF, fails after `max_attempts` instead of being
+        requeued forever. Returns the number requeued and the IDs failed.
+        """
+        now = time.time()
+        expired = "status = ? AND (lease_expires_at IS NULL OR lease_expires_at <= ?)"
+        with self._lock:
+            db = self._db()
+            failed = [row[0] for row in db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, claimed_by = NULL, lease_expires_at = NULL"
+                f" WHERE {expired} AND attempts >= ? RETURNING id",
+                (FAILED, "Worker stopped while running the job (lease expired)", now, RUNNING, now, max_attempts),
+            ).fetchall()]
+            requeued = db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, claimed_by = NULL, lease_expires_at = NULL"
+                f" WHERE {expired}",
+                (QUEUED, now, RUNNING, now),
+            ).rowcount
+            db.commit()
+        return requeued, failed
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+async def run_job(job: Dict) -> Dict:
+    """
+    Runs one analysis job through the graph. Raises on failure: JobFailed
+    if retrying can't help, anything else is retried by the worker pool.
+    """
+    inputs = dict(job["inputs"])
+    blob_ids = []
+    try:
+        for prefix in ("resume", "jd"):
+            path = inputs.pop(f"{prefix}_path", None)
+            inputs[f"{prefix}_blob_id"] = blob_store.put(open(path, "rb")) if path else None
+            blob_ids.append(inputs[f"{prefix}_blob_id"])
+    except FileNotFoundError as e:
+        blob_store.release(*blob_ids)
+        raise JobFailed(f"Uploaded file is missing: {e.filename}") from e
+
+    try:
+        # Background work yields to interactive requests in the LLM scheduler
+        with priority_class(BATCH):
+            final_state = await run_analysis({**inputs, "resume_data": {}, "jd_data": {}})
+    finally:
+        blob_store.release(*blob_ids)
+
+    if final_state.get("error"):
+        if final_state.get("error_retryable"):
+            raise RuntimeError(final_state["error"])  # transient provider failure: retried with backoff
+        # Bad input or an unusable parse, which a rerun would repeat
+        raise JobFailed(final_state["error"])
+    if not final_state.get("analysis"):
+        raise RuntimeError("Analysis failed to produce results.")
+    return final_state["analysis"]
+
+class JobWorkerPool:
+    """
+    A fixed number of asyncio workers that claim jobs from a JobStore and
+    run them. Submissions only enqueue, so request handling is decoupled
+    from LLM latency and bursts simply wait in the queue.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        run: Callable[[Dict], Awaitable[Dict]] = run_job,
+        workers: int = JOB_WORKERS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.store = store
+        self.run = run
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Set[str] = set()  # IDs of the jobs whose leases this pool renews
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._lease_keeper()))
+        logger.info(f"Started {self.workers} job worker(s) as {self.store.owner}")
+
+    async def _requeue_expired(self):
+        recovered, failed = await asyncio.to_thread(self.store.requeue_expired, self.max_attempts)
+        if recovered:
+            logger.warning(f"Re-queued {recovered} job(s) whose worker stopped renewing its lease")
+        for job_id in failed:
+            logger.warning(f"Job {job_id} failed: its worker stopped on all {self.max_attempts} attempts")
+            await asyncio.to_thread(shutil.rmtree, self.store.files_dir(job_id), True)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        # Wake idle workers instead of waiting for the next poll
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                # Store calls run on a thread: another process may hold the SQLite write lock
+                job = await asyncio.to_thread(self.store.claim)
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. "database is locked": keep the worker alive and try again
+                logger.exception(f"Job worker {index} error: {e}")
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    async def _lease_keeper(self):
+        # Recovers jobs abandoned by dead processes (first thing at startup) and renews this pool's leases
+        while True:
+            try:
+                await self._requeue_expired()
+                await asyncio.to_thread(self.store.renew, list(self._running))
+            except Exception as e:
+                logger.exception(f"Job lease renewal error: {e}")
+            await asyncio.sleep(self.store.lease_seconds / 3)
+
+    async def _process(self, job: Dict):
+        self._running.add(job["id"])
+        try:
+            with log_context(request_id=job["id"]):
+                await self._attempt(job)
+        finally:
+            self._running.discard(job["id"])
+
+    async def _attempt(self, job: Dict):
+        logger.info(f"Job {job['id']}: attempt {job['attempts']}")
+        try:
+            result = await self.run(job)
+        except asyncio.CancelledError:
+            # Shutdown mid-run: leave it running; once the lease expires, requeue_expired() picks it up
+            raise
+        except Exception as e:
+            status = await asyncio.to_thread(
+                self.store.fail, job["id"], str(e), self.max_attempts, not isinstance(e, JobFailed),
+            )
+            if status is None:
+                logger.warning(f"Job {job['id']} attempt {job['attempts']} failed after its lease was lost: {e}")
+                return
+            logger.warning(f"Job {job['id']} attempt {job['attempts']} failed ({status}): {e}")
+            if status == FAILED:
+                await asyncio.to_thread(shutil.rmtree, self.store.files_dir(job["id"]), True)
+            return
+
+        if not await asyncio.to_thread(self.store.complete, job["id"], result):
+            logger.warning(f"Job {job['id']} finished after its lease was lost; result discarded")
+            return
+        await asyncio.to_thread(shutil.rmtree, self.store.files_dir(job["id"]), True)
+        logger.info(f"Job {job['id']} succeeded")
+
+job_store = JobStore()
+job_workers = JobWorkerPool(job_store)
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+import uuid
+from typing import BinaryIO, Dict, Optional
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class BlobStore:
+    """
+    Process-local registry of open binary files (uploads, CLI inputs),
+    referenced from graph state by ID so that state snapshots, checkpoints
+    and traces only ever carry a short string instead of file contents.
+    The store owns each file from put() until release(), which closes it.
+    """
+
+    def __init__(self):
+        self._blobs: Dict[str, BinaryIO] = {}
+        self._digests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def put(self, file: BinaryIO, sha256: Optional[str] = None) -> str:
+        """
+        Registers `file`. Pass `sha256` if the content was already hashed
+        (e.g. while spooling an upload) to save a re-read in sha256().
+        """
+        blob_id = uuid.uuid4().hex
+        with self._lock:
+            self._blobs[blob_id] = file
+            if sha256:
+                self._digests[blob_id] = sha256
+        return blob_id
+
+    def open(self, blob_id: str) -> BinaryIO:
+        """
+        Returns the file rewound to the start. Raises KeyError if the blob
+        was never stored or has already been released.
+        """
+        with self._lock:
+            file = self._blobs.get(blob_id)
+        if file is None:
+            raise KeyError(f"Unknown or released blob: {blob_id}")
+        file.seek(0)
+        return file
+
+    def sha256(self, blob_id: str) -> str:
+        """
+        Hex SHA-256 of the blob's content, computed on first use and kept.
+        """
+        with self._lock:
+            digest = self._digests.get(blob_id)
+        if digest is None:
+            file = self.open(blob_id)
+            h = hashlib.sha256()
+            while chunk := file.read(64 * 1024):
+                h.update(chunk)
+            file.seek(0)
+            digest = h.hexdigest()
+            with self._lock:
+                self._digests[blob_id] = digest
+        return digest
+
+    def release(self, *blob_ids: str):
+        # Idempotent, so both the ingest node and the request handler can call it
+        for blob_id in blob_ids:
+            if not blob_id:
+                continue
+            with self._lock:
+                file = self._blobs.pop(blob_id, None)
+                self._digests.pop(blob_id, None)
+            if file is not None:
+                file.close()
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+blob_store = BlobStore()
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from pydantic import BaseModel
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "512"))
+
+# Whole-analysis results: same content + same pipeline version -> same answer
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", str(24 * 3600)))  # seconds; 0 = no expiry
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """
+    Collapses whitespace so that trivially re-formatted copies of the same
+    document map to the same cache entry.
+    """
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+def schema_fingerprint(model: type[BaseModel]) -> str:
+    """
+    Short hash of a pydantic model's JSON schema. Changing a field changes
+    the fingerprint, which invalidates every cached parse for that schema.
+    """
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+def parse_cache_key(text: str, model_name: str, prompt_version: str, schema: type[BaseModel]) -> str:
+    """
+    Content address for a parse result: normalized text + model + prompt/schema version.
+    """
+    h = hashlib.sha256()
+    for part in (model_name, prompt_version, schema_fingerprint(schema), normalize_text(text)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+def analysis_cache_key(resume_hash: str, jd_hash: str, pipeline_version: str, options: dict) -> str:
+    """
+    Content address for a final analysis: both documents' content hashes,
+    the pipeline version (models, prompt versions, schemas) and any
+    request options that change the result (mode, thresholds).
+    """
+    h = hashlib.sha256()
+    for part in (resume_hash, jd_hash, pipeline_version, json.dumps(options, sort_keys=True)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+class TwoTierCache:
+    """
+    In-process LRU in front of a persistent SQLite table.
+    Values are JSON-serializable dicts, optionally expiring after `ttl`
+    seconds. Safe to use from multiple threads: the LRU and the SQLite
+    connection have separate locks, so memory hits never wait on disk I/O.
+    Async callers use aget/aset, which do the SQLite part on a worker thread.
+    """
+
+    def __init__(self, table: str, path: Optional[str] = None, max_entries: int = CACHE_MAX_ENTRIES,
+                 ttl: Optional[float] = None, clock: Callable[[], float] = time.time):
+        self.table = table
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl  # seconds; None = entries never expire
+        self.clock = clock
+        # key -> (value, expires_at or None)
+        self._memory: OrderedDict[str, Tuple[dict, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()  # the LRU and counters
+        self._db_lock = threading.Lock()  # the SQLite connection
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table})")]
+            if "expires_at" not in columns:
+                # Tables created before entries could expire
+                self._conn.execute(f"ALTER TABLE {self.table} ADD COLUMN expires_at REAL")
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key: str, value: dict, expires_at: Optional[float]):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _expired(self, expires_at: Optional[float]) -> bool:
+        return expires_at is not None and expires_at <= self.clock()
+
+    def _memory_get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            if key in self._memory:
+                value, expires_at = self._memory[key]
+                if not self._expired(expires_at):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+        return None
+
+    def _disk_get(self, key: str) -> Optional[dict]:
+        row = None
+        if self.path is not None:
+            try:
+                with self._db_lock:
+                    row = self._db().execute(
+                        f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                    ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache read failed ({self.table}): {e}")
+
+        with self._lock:
+            if row is None or self._expired(row[1]):
+                self.misses += 1
+                return None
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self.hits += 1
+            self.disk_hits += 1
+            return value
+
+    def _disk_write(self, action: str, sql: str, params: tuple = ()):
+        if self.path is None:
+            return
+        try:
+            with self._db_lock:
+                db = self._db()
+                db.execute(sql, params)
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache {action} failed ({self.table}): {e}")
+
+    def _put(self, key: str, value: dict) -> Optional[float]:
+        # LRU half of a set(); returns the entry's expiry for the disk half
+        expires_at = self.clock() + self.ttl if self.ttl else None
+        with self._lock:
+            self._remember(key, value, expires_at)
+        return expires_at
+
+    def _disk_set(self, key: str, value: dict, expires_at: Optional[float]):
+        self._disk_write(
+            "write", f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires_at),
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self._memory_get(key)
+        return value if value is not None else self._disk_get(key)
+
+    async def aget(self, key: str) -> Optional[dict]:
+        value = self._memory_get(key)
+        if value is None:
+            value = await asyncio.to_thread(self._disk_get, key) if self.path else self._disk_get(key)
+        return value
+
+    def set(self, key: str, value: dict):
+        self._disk_set(key, value, self._put(key, value))
+
+    async def aset(self, key: str, value: dict):
+        expires_at = self._put(key, value)
+        if self.path is not None:
+            await asyncio.to_thread(self._disk_set, key, value, expires_at)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+        self._disk_write("delete", f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        self._disk_write("clear", f"DELETE FROM {self.table}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+_PARSE_CACHE_PATH = os.path.join(CACHE_DIR, "parse_cache.sqlite3") if CACHE_ENABLED else None
+
+resume_parse_cache = TwoTierCache("resume_parse", _PARSE_CACHE_PATH)
+jd_parse_cache = TwoTierCache("jd_parse", _PARSE_CACHE_PATH)
+
+analysis_cache = TwoTierCache(
+    "analysis",
+    os.path.join(CACHE_DIR, "analysis_cache.sqlite3") if ANALYSIS_CACHE_ENABLED else None,
+    ttl=ANALYSIS_CACHE_TTL or None,
+)
+
+def parse_cache_stats() -> dict:
+    return {
+        "enabled": CACHE_ENABLED,
+        "resume": resume_parse_cache.stats(),
+        "jd": jd_parse_cache.stats(),
+        "analysis": {"enabled": ANALYSIS_CACHE_ENABLED, "ttl": ANALYSIS_CACHE_TTL, **analysis_cache.stats()},
+    }
@@ -0,0 +1,345 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set
+import numpy as np
+from src.utils.logger import setup_logger
+from src.utils.prescreen import EXPERIENCE_WEIGHT, SKILL_WEIGHT, coerce_years
+from src.utils.skills import SKILL_MATCH_THRESHOLD, SkillVocabulary, match_matrix, normalize_skill, normalize_skills
+
+logger = setup_logger(__name__)
+
+CANDIDATES_DIR = os.getenv("CANDIDATES_DIR", ".candidates")
+# Off by default: the store keeps every analyzed resume's personal data on disk
+CANDIDATE_STORE_ENABLED = os.getenv("CANDIDATE_STORE_ENABLED", "false").lower() not in ("0", "false", "no")
+# How many top matches get the LLM debate by default
+SHORTLIST_SIZE = int(os.getenv("SHORTLIST_SIZE", "20"))
+
+class CandidateStore:
+    """
+    Parsed resumes persisted in SQLite, one row per distinct resume text,
+    with an inverted index (normalized skill -> candidates) and an index on
+    experience_years.
+
+    Both indexes are mirrored in memory on first use: skill postings as
+    arrays of candidate IDs and candidate IDs sorted by experience. Ranking
+    the whole pool against a JD then costs one pass over the postings of the
+    JD's required skills plus a few vector operations, with no LLM call.
+    """
+
+    def __init__(self, directory: str = CANDIDATES_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, "candidates.sqlite3")
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self._postings: Dict[str, List[int]] = {}
+        self._posting_arrays: Dict[str, np.ndarray] = {}
+        # Every skill seen, for expanding a JD skill to its near-spellings
+        self._vocabulary = SkillVocabulary()
+        # experience_years by candidate ID; NaN where there is no candidate
+        self._years = np.full(0, np.nan)
+        # Live candidate IDs in ID order and sorted by experience; rebuilt lazily after writes
+        self._ids: Optional[np.ndarray] = None
+        self._by_years: Optional[np.ndarray] = None
+        self._sorted_years: Optional[np.ndarray] = None
+        # Content hashes stored (or found stored) by this process
+        self._known_hashes: Set[str] = set()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS candidates ("
+                " id INTEGER PRIMARY KEY,"
+                " content_hash TEXT UNIQUE NOT NULL,"
+                " name TEXT,"
+                " experience_years REAL NOT NULL,"
+                " resume_data TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS candidates_experience ON candidates (experience_years)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS candidate_skills ("
+                " skill TEXT NOT NULL,"
+                " candidate_id INTEGER NOT NULL,"
+                " PRIMARY KEY (skill, candidate_id)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS candidate_skills_candidate ON candidate_skills (candidate_id)")
+            self._conn.commit()
+        return self._conn
+
+    # In-memory index (callers hold self._lock)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        start = time.perf_counter()
+        db = self._db()
+        rows = db.execute("SELECT id, experience_years FROM candidates").fetchall()
+        if rows:
+            ids = np.array([row[0] for row in rows], dtype=np.int64)
+            self._set_years(int(ids.max()), np.nan)
+            self._years[ids] = [row[1] for row in rows]
+        # One row per skill is far cheaper to load than one row per (skill, candidate)
+        for skill, ids in db.execute("SELECT skill, group_concat(candidate_id) FROM candidate_skills GROUP BY skill"):
+            self._postings[skill] = [int(i) for i in ids.split(",")]
+            self._vocabulary.add(skill)
+        self._loaded = True
+        count = int(np.count_nonzero(~np.isnan(self._years)))
+        logger.info(f"Loaded candidate index: {count} candidates in {time.perf_counter() - start:.2f}s")
+
+    def _set_years(self, candidate_id: int, years: float):
+        if candidate_id >= len(self._years):
+            grown = np.full(max(candidate_id + 1, 2 * len(self._years), 1024), np.nan)
+            grown[:len(self._years)] = self._years
+            self._years = grown
+        self._years[candidate_id] = years
+        self._ids = self._by_years = None
+
+    def _index(self, candidate_id: int, skills: List[str], years: float):
+        self._set_years(candidate_id, years)
+        for skill in skills:
+            self._postings.setdefault(skill, []).append(candidate_id)
+            self._posting_arrays.pop(skill, None)
+            self._vocabulary.add(skill)
+
+    def _unindex(self, candidate_id: int, skills: List[str]):
+        if candidate_id < len(self._years):
+            self._years[candidate_id] = np.nan
+            self._ids = self._by_years = None
+        for skill in skills:
+            postings = self._postings.get(skill)
+            if postings and candidate_id in postings:
+                postings.remove(candidate_id)
+                self._posting_arrays.pop(skill, None)
+
+    def _posting_array(self, skill: str) -> np.ndarray:
+        array = self._posting_arrays.get(skill)
+        if array is None:
+            array = np.array(self._postings.get(skill, []), dtype=np.int64)
+            self._posting_arrays[skill] = array
+        return array
+
+    def _skill_postings(self, skill: str) -> np.ndarray:
+        # Candidates with `skill` or any stored skill similar to it, each once
+        variants = self._vocabulary.similar(skill, SKILL_MATCH_THRESHOLD)
+        if len(variants) == 1:
+            return self._posting_array(variants[0])
+        if not variants:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate([self._posting_array(v) for v in variants]))
+
+    def _live_ids(self) -> np.ndarray:
+        if self._ids is None:
+            self._ids = np.flatnonzero(~np.isnan(self._years))
+        return self._ids
+
+    def _ids_by_years(self) -> np.ndarray:
+        if self._by_years is None:
+            ids = self._live_ids()
+            self._by_years = ids[np.argsort(self._years[ids], kind="stable")]
+            self._sorted_years = self._years[self._by_years]
+        return self._by_years
+
+    # Public API
+
+    def add(self, resume_data: Dict, content_hash: str) -> int:
+        """
+        Stores a parsed resume, keyed by the hash of its text. Re-adding the
+        same text updates the stored data (e.g. after a parser change).
+        Returns the candidate ID.
+        """
+        skills = sorted(normalize_skills(resume_data.get("skills")))
+        years = coerce_years(resume_data.get("experience_years"))
+        data = json.dumps(resume_data, sort_keys=True)
+        now = time.time()
+
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT id, resume_data FROM candidates WHERE content_hash = ?", (content_hash,)).fetchone()
+            if row is not None and row["resume_data"] == data:
+                self._known_hashes.add(content_hash)
+                return row["id"]
+
+            if row is not None:
+                candidate_id = row["id"]
+                old_skills = [r[0] for r in db.execute("SELECT skill FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))]
+                db.execute(
+                    "UPDATE candidates SET name = ?, experience_years = ?, resume_data = ?, updated_at = ? WHERE id = ?",
+                    (resume_data.get("name"), years, data, now, candidate_id),
+                )
+                db.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+            else:
+                candidate_id = db.execute(
+                    "INSERT INTO candidates (content_hash, name, experience_years, resume_data, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (content_hash, resume_data.get("name"), years, data, now, now),
+                ).lastrowid
+                old_skills = []
+            db.executemany(
+                "INSERT INTO candidate_skills (skill, candidate_id) VALUES (?, ?)", [(s, candidate_id) for s in skills]
+            )
+            db.commit()
+            self._known_hashes.add(content_hash)
+
+            if self._loaded:
+                self._unindex(candidate_id, old_skills)
+                self._index(candidate_id, skills, years)
+        return candidate_id
+
+    def knows(self, content_hash: str) -> bool:
+        # In-memory only: False just means this process hasn't seen it stored yet
+        with self._lock:
+            return content_hash in self._known_hashes
+
+    def warm(self):
+        # Builds the in-memory index ahead of the first search
+        with self._lock:
+            self._ensure_loaded()
+
+    def get(self, candidate_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._db().execute("SELECT resume_data FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, candidate_id: int) -> bool:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT content_hash FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+            if row is not None:
+                self._known_hashes.discard(row[0])
+            skills = [r[0] for r in db.execute("SELECT skill FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))]
+            deleted = db.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,)).rowcount > 0
+            db.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+            db.commit()
+            if deleted and self._loaded:
+                self._unindex(candidate_id, skills)
+        return deleted
+
+    def search(
+        self,
+        jd_data: Dict,
+        top_k: int = SHORTLIST_SIZE,
+        min_coverage: float = 0.0,
+        min_years: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        Top `top_k` candidates for a parsed JD, scored like the pre-screen:
+        required-skill coverage blended with experience vs the JD minimum.
+        `min_coverage` and `min_years` are hard filters.
+        """
+        required = normalize_skills(jd_data.get("required_skills"))
+        min_experience = coerce_years(jd_data.get("min_experience_years"))
+
+        with self._lock:
+            self._ensure_loaded()
+            if min_years is None:
+                ids = self._live_ids()
+            else:
+                # Range scan on the experience-sorted IDs, back in ID order for cache-friendly gathers
+                by_years = self._ids_by_years()
+                start = np.searchsorted(self._sorted_years, min_years, side="left")
+                ids = np.sort(by_years[start:])
+
+            if required:
+                counts = np.zeros(len(self._years), dtype=np.int32)
+                for skill in required:
+                    counts[self._skill_postings(skill)] += 1
+                coverage = counts[ids] / len(required)
+            else:
+                coverage = np.ones(len(ids))
+            years = self._years[ids]
+
+        if min_coverage > 0:
+            keep = coverage >= min_coverage
+            ids, coverage, years = ids[keep], coverage[keep], years[keep]
+        if min_experience > 0:
+            experience = np.clip(years / min_experience, 0.0, 1.0)
+        else:
+            experience = np.ones(len(ids))
+        scores = SKILL_WEIGHT * coverage + EXPERIENCE_WEIGHT * experience
+
+        if len(ids) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(len(ids))
+        # Best score first; ties go to the more experienced, then the older entry
+        top = top[np.lexsort((ids[top], -years[top], -scores[top]))]
+        # Report skills as the JD wrote them, like the pre-screen does
+        written: Dict[str, str] = {}
+        for skill in jd_data.get("required_skills") or []:
+            if normalize_skill(skill):
+                written.setdefault(normalize_skill(skill), skill)
+        return self._matches(ids[top], scores[top], coverage[top], required, written)
+
+    def _matches(
+        self, ids: np.ndarray, scores: np.ndarray, coverage: np.ndarray, required: List[str], written: Dict[str, str],
+    ) -> List[Dict]:
+        if not len(ids):
+            return []
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT id, resume_data FROM candidates WHERE id IN ({placeholders})", [int(i) for i in ids]
+            ).fetchall()
+        data = {row["id"]: json.loads(row["resume_data"]) for row in rows}
+
+        found = match_matrix([data.get(i, {}).get("skills") for i in ids.tolist()], required)
+        matches = []
+        for candidate_id, score, skill_coverage, hits in zip(ids.tolist(), scores.tolist(), coverage.tolist(), found):
+            resume_data = data.get(candidate_id)
+            if resume_data is None:
+                continue  # deleted since the index snapshot
+            matches.append({
+                "id": candidate_id,
+                "name": resume_data.get("name"),
+                "score": round(score, 4),
+                "skill_coverage": round(skill_coverage, 4),
+                "experience_years": coerce_years(resume_data.get("experience_years")),
+                "matched_skills": [written.get(s, s) for s, hit in zip(required, hits) if hit],
+                "missing_skills": [written.get(s, s) for s, hit in zip(required, hits) if not hit],
+                "resume_data": resume_data,
+            })
+        return matches
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._loaded:
+                return int(np.count_nonzero(~np.isnan(self._years)))
+            return self._db().execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def stats(self) -> Dict:
+        return {"enabled": CANDIDATE_STORE_ENABLED, "candidates": len(self), "skills": len(self._postings) if self._loaded else None}
+
+def remember_candidate(resume_data: Dict, content_hash: str) -> Optional[int]:
+    """
+    Saves a freshly parsed resume to the candidate pool. Never raises: a
+    store failure must not fail the analysis that produced the data.
+    """
+    if not CANDIDATE_STORE_ENABLED:
+        return None
+    try:
+        return candidate_store.add(resume_data, content_hash)
+    except (sqlite3.Error, ValueError, TypeError) as e:
+        # TypeError/ValueError: a malformed parse (e.g. unserializable or odd-typed fields)
+        logger.warning(f"Could not save candidate: {e}")
+        return None
+
+async def aremember_candidate(resume_data: Dict, content_hash: str) -> Optional[int]:
+    """
+    remember_candidate() on a worker thread, so the SQLite write never
+    blocks the event loop. Skipped if this resume is already stored.
+    """
+    if not CANDIDATE_STORE_ENABLED or candidate_store.knows(content_hash):
+        return None
+    return await asyncio.to_thread(remember_candidate, resume_data, content_hash)
+
+candidate_store = CandidateStore()
@@ -0,0 +1,127 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Callable, Optional, Tuple, TypeVar, Union
+from src.utils.image_prep import OCR_GRAYSCALE, OCR_RENDER_DPI, prepare_image
+from src.utils.logger import setup_logger
+
+# Keep this module's imports light: every worker process imports it on start.
+
+logger = setup_logger(__name__)
+
+# CPU-bound document work (PDF decoding, page rendering, JPEG encoding) runs in
+# worker processes so it never holds the server's GIL. 0 = use threads instead.
+DOC_PROCESS_WORKERS = int(os.getenv("DOC_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Recycle a worker after this many tasks (bounds leaks in pypdf/poppler/PIL)
+DOC_MAX_TASKS_PER_CHILD = int(os.getenv("DOC_MAX_TASKS_PER_CHILD", "50"))
+DOC_TASK_TIMEOUT = float(os.getenv("DOC_TASK_TIMEOUT", "60"))  # seconds per task
+
+T = TypeVar("T")
+
+# Worker functions: take paths or bytes, return text or bytes, so nothing
+# but small picklable values crosses the process boundary.
+
+def read_pdf_text(source: Union[str, BinaryIO]) -> Tuple[str, int]:
+    """
+    Text of a digital PDF (path or seekable handle) and its page count.
+    """
+    from pypdf import PdfReader
+    if not isinstance(source, str):
+        source.seek(0)
+    reader = PdfReader(source)
+    text_parts = [page.extract_text() or "" for page in reader.pages]
+    return "\n".join(text_parts).strip(), len(reader.pages)
+
+def render_pdf_page(pdf_path: str, page_number: int, dpi: int = OCR_RENDER_DPI) -> bytes:
+    """
+    Renders a single page (1-based) at `dpi` and preprocesses it into the
+    JPEG sent for OCR, so only pages being OCRed are held in memory.
+    """
+    from pdf2image import convert_from_path
+    images = convert_from_path(
+        pdf_path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=OCR_GRAYSCALE
+    )
+    try:
+        return prepare_image(images[0])
+    finally:
+        images[0].close()
+
+class DocumentPool:
+    """
+    Lazily started process pool for document work, with worker recycling
+    and per-task timeouts. A process task can't be cancelled, so a timeout
+    replaces the whole pool (killing the stuck worker); tasks that were
+    running beside it fail with BrokenProcessPool and are retried once.
+    """
+
+    def __init__(
+        self,
+        workers: int = DOC_PROCESS_WORKERS,
+        max_tasks_per_child: int = DOC_MAX_TASKS_PER_CHILD,
+        timeout: float = DOC_TASK_TIMEOUT,
+    ):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.restarts = 0
+
+    def _get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded server is unsafe, and max_tasks_per_child requires it
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=self.max_tasks_per_child or None,
+                )
+                logger.info(f"Started document process pool ({self.workers} workers)")
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is not executor:
+                return  # another task already replaced it
+            self._executor = None
+            self.restarts += 1
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., T], *args, timeout: Optional[float] = None) -> T:
+        """
+        Runs `fn(*args)` in a worker process (or a thread if workers <= 0).
+        Raises TimeoutError if it takes longer than `timeout` seconds.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if self.workers <= 0:
+            # Threads can't be interrupted; the timeout only stops the wait
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout or None)
+
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._get()
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(executor, fn, *args), timeout or None)
+            except asyncio.TimeoutError:
+                logger.warning(f"Document task {fn.__name__} timed out after {timeout}s; restarting the pool")
+                self._discard(executor)
+                raise TimeoutError(f"{fn.__name__} timed out after {timeout}s") from None
+            except BrokenProcessPool:
+                # A worker died (crash, OOM kill, or a sibling's timeout restarted the pool)
+                self._discard(executor)
+                if attempt:
+                    raise
+                logger.warning(f"Document pool broke during {fn.__name__}; retrying once")
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+doc_pool = DocumentPool()
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+from src.utils.llm import acall
+from src.utils.logger import setup_logger
+from src.utils.metrics import LLM_HEDGES, current_agent
+from src.utils.scheduler import scheduler
+
+logger = setup_logger(__name__)
+
+# Hedged requests: if an agent's LLM call is still running at that agent's
+# recent latency percentile (provider time only, not scheduler queueing), a
+# duplicate is sent and the first valid result wins (for chains ending in a
+# JsonOutputParser, a parse error is not valid).
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() not in ("0", "false", "no")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+# Extra calls allowed, as a fraction of all agent calls; LLM_HEDGE_BURST hedges can be saved up
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+LLM_HEDGE_BURST = float(os.getenv("LLM_HEDGE_BURST", "3"))
+# No hedging for an agent until this many latencies are known; never before LLM_HEDGE_MIN_DELAY
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))  # recent latencies kept per agent
+# Send the duplicate to this model instead ("" = the same model)
+LLM_HEDGE_FALLBACK_MODEL = os.getenv("LLM_HEDGE_FALLBACK_MODEL", "")
+
+@dataclass
+class AgentHedgeStats:
+    latencies: Deque[float]
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+
+class Hedger:
+    """
+    Per-agent hedging state: recent latencies (for the hedge delay), call
+    and hedge counts, and the shared hedge budget. Credits are earned at
+    `budget` per call and spent one per hedge, so hedges never exceed
+    `budget` of all calls (plus at most `burst` saved up). No hedge is sent
+    to a model the scheduler is holding back (`throttled`).
+    """
+
+    def __init__(
+        self,
+        enabled: bool = LLM_HEDGE_ENABLED,
+        percentile: float = LLM_HEDGE_PERCENTILE,
+        budget: float = LLM_HEDGE_BUDGET,
+        burst: float = LLM_HEDGE_BURST,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        min_delay: float = LLM_HEDGE_MIN_DELAY,
+        window: int = LLM_HEDGE_WINDOW,
+        fallback_model: str = LLM_HEDGE_FALLBACK_MODEL,
+        clock: Callable[[], float] = time.perf_counter,
+        throttled: Callable[[str], bool] = scheduler.throttled,
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.window = window
+        self.fallback_model = fallback_model
+        self.clock = clock
+        self.throttled = throttled
+        self.credits = 0.0
+        self.agents: Dict[str, AgentHedgeStats] = {}
+        self._lock = threading.Lock()
+
+    def _agent(self, name: str) -> AgentHedgeStats:
+        stats = self.agents.get(name)
+        if stats is None:
+            stats = self.agents[name] = AgentHedgeStats(deque(maxlen=self.window))
+        return stats
+
+    def _delay(self, stats: AgentHedgeStats) -> Optional[float]:
+        if len(stats.latencies) < max(1, self.min_samples):
+            return None
+        ordered = sorted(stats.latencies)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))])
+
+    def _record(self, agent: str, seconds: float):
+        with self._lock:
+            self._agent(agent).latencies.append(seconds)
+
+    def _try_spend(self) -> bool:
+        with self._lock:
+            if self.credits < 1.0:
+                return False
+            self.credits -= 1.0
+            return True
+
+    async def acall(
+        self,
+        chain,
+        inputs: Any,
+        model: str,
+        est_tokens: Optional[int] = None,
+        chain_for: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        acall() with hedging for the current agent. `chain_for(model)`
+        builds the same chain for another model; without it, hedges go
+        to `model` even if a fallback model is configured.
+        """
+        if not self.enabled:
+            return await acall(chain, inputs, model, est_tokens)
+
+        agent = current_agent.get()
+        with self._lock:
+            stats = self._agent(agent)
+            stats.calls += 1
+            self.credits = min(self.burst, self.credits + self.budget)
+            delay = self._delay(stats)
+        LLM_HEDGES.inc(agent=agent, event="call")
+
+        # Latencies (and the hedge delay) count from when the scheduler lets
+        # the call through, so time queued for rate-limit quota isn't slowness
+        granted = asyncio.Event()
+        granted_at = [self.clock()]
+
+        def on_granted():
+            granted_at[0] = self.clock()
+            granted.set()
+
+        if delay is None:
+            result = await acall(chain, inputs, model, est_tokens, on_granted)
+            self._record(agent, self.clock() - granted_at[0])
+            return result
+
+        primary = asyncio.ensure_future(acall(chain, inputs, model, est_tokens, on_granted))
+        tasks = [primary]
+        try:
+            await _first_of(primary, granted)
+            remaining = max(0.0, delay - (self.clock() - granted_at[0]))
+            done, _ = await asyncio.wait(tasks, timeout=remaining)
+            hedge_model = self.fallback_model if self.fallback_model and chain_for else model
+            hedge = False
+            if not done:
+                # A throttled model would only queue the duplicate behind the same backlog
+                if self.throttled(hedge_model):
+                    LLM_HEDGES.inc(agent=agent, event="throttled")
+                elif not self._try_spend():
+                    LLM_HEDGES.inc(agent=agent, event="budget_exhausted")
+                else:
+                    hedge = True
+            if not hedge:
+                result = await primary
+                self._record(agent, self.clock() - granted_at[0])
+                return result
+
+            hedge_chain = chain_for(hedge_model) if hedge_model != model else chain
+            logger.info(f"Hedging {agent} call after {delay:.2f}s on {hedge_model}")
+            tasks.append(asyncio.ensure_future(acall(hedge_chain, inputs, hedge_model, est_tokens)))
+            with self._lock:
+                stats.hedged += 1
+            LLM_HEDGES.inc(agent=agent, event="hedged")
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Primary first, in case both finished together
+                for task in (t for t in tasks if t in done):
+                    if task.exception() is not None:
+                        continue
+                    if task is primary:
+                        LLM_HEDGES.inc(agent=agent, event="primary_won")
+                    else:
+                        LLM_HEDGES.inc(agent=agent, event="hedge_won")
+                        with self._lock:
+                            stats.hedge_wins += 1
+                    # A hedge win still records how long the primary had taken (a lower bound)
+                    self._record(agent, self.clock() - granted_at[0])
+                    return task.result()
+            raise primary.exception()
+        finally:
+            # Cancels the loser, or both if this call itself was cancelled
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # a loser's error was expected; don't warn about it
+
+    def stats(self) -> Dict:
+        with self._lock:
+            agents = {}
+            for name, stats in self.agents.items():
+                delay = self._delay(stats)
+                agents[name] = {
+                    "calls": stats.calls,
+                    "hedged": stats.hedged,
+                    "hedge_rate": round(stats.hedged / stats.calls, 4) if stats.calls else 0.0,
+                    "hedge_wins": stats.hedge_wins,
+                    "win_rate": round(stats.hedge_wins / stats.hedged, 3) if stats.hedged else None,
+                    "hedge_delay_s": round(delay, 3) if delay is not None else None,
+                    "samples": len(stats.latencies),
+                }
+            return {
+                "enabled": self.enabled,
+                "budget": self.budget,
+                "credits": round(self.credits, 2),
+                "fallback_model": self.fallback_model or None,
+                "agents": agents,
+            }
+
+async def _first_of(task: asyncio.Future, event: asyncio.Event):
+    # Returns once `event` is set or `task` has finished, whichever is first
+    waiter = asyncio.ensure_future(event.wait())
+    try:
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+
+hedger = Hedger()
+
+async def hedged_acall(chain, inputs: Any, model: str, est_tokens: Optional[int] = None, chain_for=None):
+    return await hedger.acall(chain, inputs, model, est_tokens, chain_for)
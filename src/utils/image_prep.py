@@ -0,0 +1,89 @@
+import io
+import os
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+from src.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Imported by document pool workers; PIL is only imported inside the functions.
+
+logger = setup_logger(__name__)
+
+# Vision models downscale large images themselves (gpt-4o-mini fits the short side
+# to 768px), so pixels beyond that cost upload time and tokens without adding accuracy.
+OCR_RENDER_DPI = int(os.getenv("OCR_RENDER_DPI", "150"))  # scanned PDF pages; pdf2image's default is 200
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "true").lower() not in ("0", "false", "no")
+OCR_MAX_DIMENSION = int(os.getenv("OCR_MAX_DIMENSION", "1600"))  # longest side in px, 0 = no limit
+OCR_CROP_WHITESPACE = os.getenv("OCR_CROP_WHITESPACE", "true").lower() not in ("0", "false", "no")
+OCR_JPEG_QUALITY = int(os.getenv("OCR_JPEG_QUALITY", "75"))
+
+# Pixels darker than this (0-255) count as content when cropping margins
+INK_THRESHOLD = 235
+CROP_MARGIN = 0.02  # of the longest side, kept around the content
+
+def content_box(image) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Bounding box (left, upper, right, lower) of everything darker than
+    INK_THRESHOLD, padded by CROP_MARGIN; None for a blank page.
+    """
+    gray = image if image.mode == "L" else image.convert("L")
+    # Averaging 4x4 blocks first smooths out scanner noise and speckles
+    # (text strokes stay dark) and makes the scan 16x cheaper
+    factor = 4 if min(gray.size) >= 64 else 1
+    box = gray.reduce(factor).point(lambda p: 255 if p < INK_THRESHOLD else 0).getbbox()
+    if box is None:
+        return None
+    pad = int(max(image.size) * CROP_MARGIN)
+    left, upper, right, lower = (v * factor for v in box)
+    return max(0, left - pad), max(0, upper - pad), min(image.width, right + pad), min(image.height, lower + pad)
+
+def _flatten(image):
+    # Transparent PNGs would turn black in JPEG; put them on white first
+    from PIL import Image
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, "white")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    if image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    return image
+
+def prepare_image(
+    image: Union[bytes, "Image.Image"],
+    grayscale: bool = OCR_GRAYSCALE,
+    max_dimension: int = OCR_MAX_DIMENSION,
+    crop: bool = OCR_CROP_WHITESPACE,
+    quality: int = OCR_JPEG_QUALITY,
+) -> bytes:
+    """
+    Shrinks an image (encoded bytes or a PIL image) to what a vision
+    model needs to read it: flattened, optionally grayscale, margins
+    cropped, longest side capped at `max_dimension`, saved as JPEG at
+    `quality`. Raises if `image` is bytes PIL can't decode.
+    """
+    from PIL import Image, ImageOps
+
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+        image = ImageOps.exif_transpose(image)  # phone photos are often stored sideways
+
+    image = _flatten(image)
+    if grayscale and image.mode != "L":
+        image = image.convert("L")
+
+    if crop:
+        box = content_box(image)
+        if box is not None:
+            image = image.crop(box)
+
+    if max_dimension and max(image.size) > max_dimension:
+        scale = max_dimension / max(image.size)
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        # reducing_gap: cheap integer box reduction first, LANCZOS only for the last step
+        image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
@@ -0,0 +1,231 @@
+import asyncio
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Set, Tuple
+from src.utils.logger import setup_logger
+from src.utils.metrics import llm_metrics_callback, record_http_response, arecord_http_response
+from src.utils.scheduler import (
+    LLM_RATE_LIMIT_RETRIES, LLM_TRANSIENT_RETRIES, arecord_rate_limit, backoff_delay, current_model, parse_retry_after,
+    record_rate_limit, scheduler,
+)
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+# httpx, openai and langchain_openai are imported when the first client is
+# created, not at import time: together they take ~0.7s to load.
+
+logger = setup_logger(__name__)
+
+# Connection pool limits shared by every LLM client in the process.
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+# Scheduler token estimate: prompt text + fixed allowance for system prompt/format instructions + completion
+PROMPT_OVERHEAD_TOKENS = 400
+LLM_EST_COMPLETION_TOKENS = int(os.getenv("LLM_EST_COMPLETION_TOKENS", "512"))
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, float, int], "ChatOpenAI"] = {}
+_http_client: Optional["httpx.Client"] = None
+_http_async_client: Optional["httpx.AsyncClient"] = None
+
+def _limits() -> "httpx.Limits":
+    import httpx
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+def _get_http_clients() -> Tuple["httpx.Client", "httpx.AsyncClient"]:
+    global _http_client, _http_async_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(
+            limits=_limits(), timeout=LLM_TIMEOUT,
+            event_hooks={"response": [record_http_response, record_rate_limit]},
+        )
+        _http_async_client = httpx.AsyncClient(
+            limits=_limits(), timeout=LLM_TIMEOUT,
+            event_hooks={"response": [arecord_http_response, arecord_rate_limit]},
+        )
+    return _http_client, _http_async_client
+
+def get_llm(model: str, temperature: float = 0, max_retries: int = 0) -> "ChatOpenAI":
+    """
+    Returns the shared ChatOpenAI client for (model, temperature, max_retries).
+    All clients reuse one sync and one async keep-alive connection pool, so
+    repeated calls skip client construction and TLS handshakes.
+    The SDK's own retries are off by default: call()/acall() retry through
+    the scheduler, and SDK retries inside each attempt would multiply them.
+    """
+    key = (model, float(temperature), max_retries)
+    llm = _clients.get(key)
+    if llm is not None:
+        return llm
+
+    with _lock:
+        llm = _clients.get(key)
+        if llm is None:
+            from langchain_openai import ChatOpenAI
+            http_client, http_async_client = _get_http_clients()
+            llm = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                max_retries=max_retries,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                callbacks=[llm_metrics_callback],
+            )
+            _clients[key] = llm
+            logger.info(f"Created shared LLM client for {model} (temperature={temperature}, retries={max_retries})")
+    return llm
+
+def preload_llm_libraries():
+    """
+    Imports the client libraries without creating a client. The API runs
+    it in the background after startup, so neither readiness nor the
+    first request waits for it.
+    """
+    import httpx  # noqa: F401
+    import langchain_openai  # noqa: F401
+
+def reset_llm_clients():
+    """
+    Drops all shared clients and connection pools. Needed after forking or
+    when switching to a new event loop (async pools are bound to the loop
+    that opened their connections).
+    Called from a running loop, the async pool is closed on that loop in
+    the background. Without one it is only dropped: its connections belong
+    to a loop that has already stopped, and can't be closed from another.
+    """
+    global _http_client, _http_async_client
+    with _lock:
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+        if _http_async_client is not None:
+            _close_in_background(_http_async_client)
+        _http_client = None
+        _http_async_client = None
+
+_closing: Set["asyncio.Task"] = set()
+
+def _close_in_background(client: "httpx.AsyncClient"):
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(client.aclose())
+    # Keep a reference until it finishes, or the task can be garbage collected mid-close
+    _closing.add(task)
+    task.add_done_callback(_closed)
+
+def _closed(task: "asyncio.Task"):
+    _closing.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Closing the LLM connection pool failed: {task.exception()}")
+
+def estimate_tokens(inputs: Any) -> int:
+    # Cheap chars/4 estimate; only used to pace calls against tokens/min limits
+    if isinstance(inputs, dict):
+        chars = sum(len(str(v)) for v in inputs.values() if v)
+    else:
+        chars = len(str(inputs))
+    return chars // 4 + PROMPT_OVERHEAD_TOKENS + LLM_EST_COMPLETION_TOKENS
+
+def _retry_after(error) -> float:
+    response = getattr(error, "response", None)
+    return parse_retry_after(response.headers if response is not None else None)
+
+async def acall(
+    runnable, inputs: Any, model: str, est_tokens: Optional[int] = None, on_granted: Optional[Callable[[], None]] = None,
+):
+    """
+    Runs `runnable.ainvoke(inputs)` (a chain or client for `model`) through
+    the process-wide scheduler: waits for rate-limit quota at the caller's
+    priority, and on a 429 pauses the model and retries with jittered
+    backoff (at least the provider's Retry-After). Other transient failures
+    are retried with the same backoff. `on_granted` is called each time the
+    scheduler lets an attempt through to the provider.
+    """
+    tokens = est_tokens or estimate_tokens(inputs)
+    attempts = {"rate_limited": 0, "failed": 0}
+    while True:
+        await scheduler.acquire(model, tokens)
+        if on_granted is not None:
+            on_granted()
+        token = current_model.set(model)
+        try:
+            return await runnable.ainvoke(inputs)
+        except Exception as e:
+            delay = _retry_delay(e, model, attempts)
+            if delay is None:
+                raise
+        finally:
+            current_model.reset(token)
+        await asyncio.sleep(delay)
+
+def _retry_delay(error: Exception, model: str, attempts: Dict[str, int]) -> Optional[float]:
+    """
+    The retry policy shared by call() and acall(). A 429 pauses `model` in
+    the scheduler (up to LLM_RATE_LIMIT_RETRIES times) and the next attempt
+    waits for it there; other transient errors back off this call only (up
+    to LLM_TRANSIENT_RETRIES times). Returns the delay before the next
+    attempt, or None to give up.
+    """
+    from openai import RateLimitError  # already loaded by the client that raised
+    if isinstance(error, RateLimitError):
+        if attempts["rate_limited"] == LLM_RATE_LIMIT_RETRIES:
+            return None
+        scheduler.penalize(model, backoff_delay(attempts["rate_limited"], _retry_after(error)))
+        attempts["rate_limited"] += 1
+        return 0.0
+
+    if attempts["failed"] == LLM_TRANSIENT_RETRIES or not is_transient_error(error):
+        return None
+    delay = backoff_delay(attempts["failed"], _retry_after(error))
+    attempts["failed"] += 1
+    logger.warning(f"LLM call to {model} failed ({error}); retrying in {delay:.1f}s")
+    return delay
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    True for provider failures that may succeed on a later attempt: timeouts,
+    dropped connections, 429s left after our retries, 408/409 and 5xx.
+    """
+    import httpx
+    from openai import APIConnectionError, APIStatusError
+    if isinstance(error, (APIConnectionError, httpx.TransportError, TimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+def error_result(error: BaseException) -> Dict[str, Any]:
+    # What the agents return instead of raising; `retryable` tells a job worker whether to try again
+    return {"error": str(error), "retryable": is_transient_error(error)}
+
+def call(runnable, inputs: Any, model: str, est_tokens: Optional[int] = None):
+    """
+    Sync version of acall (rate limited, but without priority ordering).
+    """
+    tokens = est_tokens or estimate_tokens(inputs)
+    attempts = {"rate_limited": 0, "failed": 0}
+    while True:
+        scheduler.acquire_blocking(model, tokens)
+        token = current_model.set(model)
+        try:
+            return runnable.invoke(inputs)
+        except Exception as e:
+            delay = _retry_delay(e, model, attempts)
+            if delay is None:
+                raise
+        finally:
+            current_model.reset(token)
+        time.sleep(delay)
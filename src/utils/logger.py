@@ -1,12 +1,165 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Callers only enqueue records; one background thread per process formats them
+# and writes to stdout, so a slow or blocked stdout never stalls the event loop.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text | json
+# Records waiting for the writer thread; beyond this, new records are dropped (and counted)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of below-WARNING records kept per logger name prefix, e.g. '{"src.utils.llm": 0.1}'
+LOG_SAMPLE_RATES: Dict[str, float] = {k: float(v) for k, v in json.loads(os.getenv("LOG_SAMPLE_RATES", "{}")).items()}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+run_id: ContextVar[Optional[str]] = ContextVar("run_id", default=None)
+CONTEXT_VARS = {"request_id": request_id, "run_id": run_id}
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+@contextmanager
+def log_context(**ids: Optional[str]):
+    """
+    Tags every record logged by the enclosed work (and any tasks it
+    spawns) with the given request_id / run_id.
+    """
+    tokens = [(CONTEXT_VARS[field], CONTEXT_VARS[field].set(value)) for field, value in ids.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+class ContextFilter(logging.Filter):
+    """
+    Runs in the logging thread: samples records by logger name and stamps
+    the survivors with the current request/run IDs, which the writer
+    thread couldn't see.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.sample_rates = dict(sample_rates or {})
+        self._rates: Dict[str, float] = {}  # logger name -> rate of its longest matching prefix
+        self.sampled_out = 0
+
+    def _rate(self, name: str) -> float:
+        rate = self._rates.get(name)
+        if rate is None:
+            matches = [p for p in self.sample_rates if name == p or name.startswith(p + ".")]
+            rate = self._rates[name] = self.sample_rates[max(matches, key=len)] if matches else 1.0
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Warnings and errors are never sampled out
+        if self.sample_rates and record.levelno < logging.WARNING:
+            rate = self._rate(record.name)
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return False
+        for field, var in CONTEXT_VARS.items():
+            setattr(record, field, var.get())
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks and does no formatting in the caller:
+    records are enqueued as they are and dropped if the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process, so no need to copy or pre-format; only bind %-args
+        # now, as their objects may change before the writer gets to them
+        if record.args:
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail if stop() comes while the queue is full
+        self.queue.put(self._sentinel)
+
+class TextFormatter(logging.Formatter):
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        ids = " ".join(f"{field}={value}" for field in CONTEXT_VARS if (value := getattr(record, field, None)))
+        return f"{line} [{ids}]" if ids else line
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_VARS:
+            if value := getattr(record, field, None):
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_lock = threading.Lock()
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+def _queue_handler() -> NonBlockingQueueHandler:
+    global _handler, _listener
+    with _lock:
+        if _handler is None:
+            stream = logging.StreamHandler(sys.stdout)
+            stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter(TEXT_FORMAT))
+            log_queue = queue.Queue(LOG_QUEUE_SIZE)
+            _handler = NonBlockingQueueHandler(log_queue)
+            _handler.addFilter(ContextFilter(LOG_SAMPLE_RATES))
+            _listener = _Listener(log_queue, stream)
+            _listener.start()
+            atexit.register(_listener.stop)  # writes out whatever is still queued
+        return _handler
 
 def setup_logger(name: str):
+    """
+    Logger for `name` writing through the shared background queue.
+    Idempotent: calling it again never adds a second handler.
+    """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    
-    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+
+    handler = _queue_handler()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
     return logger
+
+def log_stats() -> dict:
+    handler = _queue_handler()
+    return {
+        "queued": handler.queue.qsize(),
+        "dropped": handler.dropped,
+        "sampled_out": sum(f.sampled_out for f in handler.filters if isinstance(f, ContextFilter)),
+    }
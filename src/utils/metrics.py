@@ -0,0 +1,269 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from src.utils.logger import log_stats
+
+# Minimal in-process Prometheus metrics: no client library, no push gateway.
+# Everything is rendered in the text exposition format by render_metrics().
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+BYTE_BUCKETS = (16_384, 32_768, 65_536, 131_072, 262_144, 524_288, 1_048_576, 2_097_152, 4_194_304)
+
+# USD per 1M (prompt, completion) tokens. Override with LLM_PRICES_PER_1M='{"model": [in, out]}'.
+LLM_PRICES_PER_1M: Dict[str, Tuple[float, float]] = {
+    "openai/gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o-mini": (0.15, 0.60),
+    **{k: tuple(v) for k, v in json.loads(os.getenv("LLM_PRICES_PER_1M", "{}")).items()},
+}
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels.get(n, "")) for n in self.labels), 0.0)
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return "\n".join(lines)
+
+class CollectedCounter:
+    """
+    A counter kept elsewhere (e.g. inside the logging handler), read at
+    scrape time. `collect` returns {label values: total}.
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.collect = collect
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in self.collect().items():
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return "\n".join(lines)
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[list, list]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(tuple(str(labels.get(n, "")) for n in self.labels))
+        return sum(entry[0]) if entry else 0
+
+    def sum(self, **labels) -> float:
+        entry = self._values.get(tuple(str(labels.get(n, "")) for n in self.labels))
+        return entry[1][0] if entry else 0.0
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+                cumulative += counts[-1]
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total[0]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return "\n".join(lines)
+
+NODE_DURATION = Histogram("recruitment_node_duration_seconds", "Wall time per graph node", ["node"])
+NODE_FAILURES = Counter("recruitment_node_failures_total", "Graph node invocations that raised", ["node"])
+AGENT_DURATION = Histogram("recruitment_agent_duration_seconds", "Wall time per agent call, including retries/fallbacks", ["agent"])
+LLM_CALLS = Counter("llm_calls_total", "LLM calls by agent, model and outcome", ["agent", "model", "status"])
+LLM_DURATION = Histogram("llm_call_duration_seconds", "Wall time per LLM call", ["agent", "model"])
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens by agent, model and kind (prompt/completion)", ["agent", "model", "kind"])
+LLM_PROMPT_TOKENS = Histogram("llm_prompt_tokens", "Prompt tokens per LLM call", ["agent"], buckets=TOKEN_BUCKETS)
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend in USD", ["agent", "model"])
+LLM_RETRIES = Counter("llm_retries_total", "Retryable HTTP responses from the LLM provider (429/5xx/timeouts)", ["status"])
+LLM_RATE_LIMITED = Counter("llm_rate_limited_total", "429s that paused the scheduler for a model", ["model"])
+SCHEDULER_WAIT = Histogram("llm_scheduler_wait_seconds", "Time LLM calls spent queued in the scheduler", ["priority"])
+LLM_HEDGES = Counter("llm_hedges_total", "Hedging of agent LLM calls by event (call, hedged, hedge_won, primary_won, budget_exhausted, throttled)", ["agent", "event"])
+OCR_PAGE_BYTES = Histogram("ocr_page_bytes", "Image bytes per OCR page, before and after preprocessing", ["source", "stage"], buckets=BYTE_BUCKETS)
+OCR_PREPARE_DURATION = Histogram("ocr_page_prepare_seconds", "Render + preprocessing time per OCR page", ["source"])
+LOG_RECORDS_DISCARDED = CollectedCounter(
+    "log_records_discarded_total", "Log records not written, by reason (dropped: queue full, sampled_out: LOG_SAMPLE_RATES)",
+    ["reason"], lambda: {(reason,): float(log_stats()[reason]) for reason in ("dropped", "sampled_out")},
+)
+
+REGISTRY = [
+    NODE_DURATION, NODE_FAILURES, AGENT_DURATION,
+    LLM_CALLS, LLM_DURATION, LLM_TOKENS, LLM_PROMPT_TOKENS, LLM_COST, LLM_RETRIES,
+    LLM_RATE_LIMITED, SCHEDULER_WAIT, LLM_HEDGES, OCR_PAGE_BYTES, OCR_PREPARE_DURATION, LOG_RECORDS_DISCARDED,
+]
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+# The agent currently running in this task/thread, used to label LLM calls.
+current_agent: contextvars.ContextVar[str] = contextvars.ContextVar("current_agent", default="unknown")
+
+def _timed(histogram: Histogram, label: str, name: str, failures: Optional[Counter] = None, set_agent: bool = False):
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token = current_agent.set(name) if set_agent else None
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    # Cancelled by a sibling's early abort, not a failure of this node
+                    raise
+                except BaseException:
+                    if failures:
+                        failures.inc(**{label: name})
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start, **{label: name})
+                    if token is not None:
+                        current_agent.reset(token)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = current_agent.set(name) if set_agent else None
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except BaseException:
+                if failures:
+                    failures.inc(**{label: name})
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start, **{label: name})
+                if token is not None:
+                    current_agent.reset(token)
+        return wrapper
+    return decorator
+
+def instrument_node(name: str):
+    """
+    Records wall time (and failures) of a graph node.
+    """
+    return _timed(NODE_DURATION, "node", name, failures=NODE_FAILURES)
+
+def instrument_agent(name: str):
+    """
+    Records wall time of an agent call and labels the LLM calls it makes.
+    """
+    return _timed(AGENT_DURATION, "agent", name, set_agent=True)
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    Attached to every shared LLM client; records per-call latency, tokens,
+    estimated cost and model, labelled with the calling agent.
+    """
+
+    run_inline = True  # cheap bookkeeping, don't hop to a thread for async runs
+
+    def __init__(self):
+        self._starts: Dict[UUID, Tuple[float, str, str]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or "unknown"
+        self._starts[run_id] = (time.perf_counter(), model, current_agent.get())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        start, model, agent = self._starts.pop(run_id, (None, "unknown", current_agent.get()))
+        if start is not None:
+            LLM_DURATION.observe(time.perf_counter() - start, agent=agent, model=model)
+        LLM_CALLS.inc(agent=agent, model=model, status="ok")
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        if prompt_tokens or completion_tokens:
+            LLM_TOKENS.inc(prompt_tokens, agent=agent, model=model, kind="prompt")
+            LLM_TOKENS.inc(completion_tokens, agent=agent, model=model, kind="completion")
+            LLM_PROMPT_TOKENS.observe(prompt_tokens, agent=agent)
+            price = LLM_PRICES_PER_1M.get(model)
+            if price:
+                LLM_COST.inc((prompt_tokens * price[0] + completion_tokens * price[1]) / 1e6, agent=agent, model=model)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        start, model, agent = self._starts.pop(run_id, (None, "unknown", current_agent.get()))
+        if start is not None:
+            LLM_DURATION.observe(time.perf_counter() - start, agent=agent, model=model)
+        LLM_CALLS.inc(agent=agent, model=model, status="error")
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+
+    # Streaming responses carry usage on the message instead of llm_output
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("input_tokens", 0), metadata.get("output_tokens", 0)
+    return 0, 0
+
+RETRYABLE_STATUSES = {408, 409, 429}
+
+def record_http_response(response):
+    """
+    httpx response hook for the shared LLM clients. call()/acall() retry
+    these statuses, so each one is (up to their retry limits) one extra attempt.
+    """
+    if response.status_code in RETRYABLE_STATUSES or response.status_code >= 500:
+        LLM_RETRIES.inc(status=response.status_code)
+
+async def arecord_http_response(response):
+    record_http_response(response)
+
+llm_metrics_callback = LLMMetricsCallback()
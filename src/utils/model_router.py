@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+@dataclass
+class ModelHealth:
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    latency_ewma: Optional[float] = None
+    outcomes: Deque[bool] = field(default_factory=lambda: deque(maxlen=20))
+    recent_errors: Deque[str] = field(default_factory=lambda: deque(maxlen=5))
+    opened_at: Optional[float] = None
+    probe_started: Optional[float] = None
+
+    def success_rate(self) -> float:
+        # Laplace-smoothed over the recent window so one result doesn't dominate
+        return (sum(self.outcomes) + 1) / (len(self.outcomes) + 2)
+
+class ModelRouter:
+    """
+    Orders fallback models by observed health instead of a fixed list.
+
+    Each model is ranked by expected latency / recent success rate. After
+    `failure_threshold` consecutive failures its circuit opens and it is
+    skipped for `cooldown` seconds; after that one probe request is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        latency_prior: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.models = list(models)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency_prior = latency_prior
+        self._clock = clock
+        self._health: Dict[str, ModelHealth] = {m: ModelHealth() for m in self.models}
+        self._lock = threading.Lock()
+
+    def _state(self, health: ModelHealth, now: float) -> str:
+        if health.opened_at is None:
+            return "closed"
+        if now - health.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def _expected_cost(self, health: ModelHealth) -> float:
+        latency = health.latency_ewma if health.latency_ewma is not None else self.latency_prior
+        return latency / health.success_rate()
+
+    def _order(self, now: float, claim_probes: bool) -> List[str]:
+        probes, healthy, tripped = [], [], []
+        for model in self.models:
+            health = self._health[model]
+            state = self._state(health, now)
+            probe_free = health.probe_started is None or now - health.probe_started >= self.cooldown
+            if state == "half_open" and probe_free:
+                if claim_probes:
+                    health.probe_started = now
+                probes.append(model)
+            elif state == "closed":
+                healthy.append(model)
+            else:
+                tripped.append(model)
+
+        healthy.sort(key=lambda m: self._expected_cost(self._health[m]))
+        tripped.sort(key=lambda m: self._health[m].opened_at or 0)
+        return probes + healthy + tripped
+
+    def candidates(self) -> List[str]:
+        """
+        Models to try, in order. Half-open models get a single probe ahead of
+        the healthy ones; open circuits are only tried as a last resort.
+        """
+        with self._lock:
+            return self._order(self._clock(), claim_probes=True)
+
+    def _observe_latency(self, health: ModelHealth, latency: float):
+        if health.latency_ewma is None:
+            health.latency_ewma = latency
+        else:
+            health.latency_ewma = 0.8 * health.latency_ewma + 0.2 * latency
+
+    def record_success(self, model: str, latency: float):
+        with self._lock:
+            health = self._health[model]
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.outcomes.append(True)
+            health.opened_at = None
+            health.probe_started = None
+            self._observe_latency(health, latency)
+
+    def record_failure(self, model: str, latency: float, error: str):
+        with self._lock:
+            health = self._health[model]
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.outcomes.append(False)
+            health.recent_errors.append(error[:200])
+            self._observe_latency(health, latency)
+
+            if health.probe_started is not None or health.consecutive_failures >= self.failure_threshold:
+                health.opened_at = self._clock()
+            health.probe_started = None
+
+    def stats(self) -> dict:
+        now = self._clock()
+        with self._lock:
+            return {
+                "order": self._order(now, claim_probes=False),
+                "models": {
+                    model: {
+                        "state": self._state(health, now),
+                        "successes": health.successes,
+                        "failures": health.failures,
+                        "success_rate": round(health.success_rate(), 3),
+                        "latency_ewma_s": round(health.latency_ewma, 3) if health.latency_ewma is not None else None,
+                        "recent_errors": list(health.recent_errors),
+                    }
+                    for model, health in self._health.items()
+                },
+            }
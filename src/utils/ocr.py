@@ -1,120 +1,318 @@
 import io
-from typing import List
-from langchain_core.documents import Document
-from langchain_community.document_loaders import PyPDFLoader
+import os
+import asyncio
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import IO, BinaryIO, List, Optional, Tuple, Union
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
+from src.utils.doc_pool import doc_pool, read_pdf_text, render_pdf_page
+from src.utils.image_prep import prepare_image
+from src.utils.llm import acall, call, get_llm
+from src.utils.model_router import ModelRouter
 from src.utils.logger import setup_logger
+from src.utils.metrics import AGENT_DURATION, OCR_PAGE_BYTES, OCR_PREPARE_DURATION, instrument_agent
 import base64
 
 logger = setup_logger(__name__)
 
+# Max scanned pages rendered + OCRed at once per document
+OCR_PAGE_CONCURRENCY = int(os.getenv("OCR_PAGE_CONCURRENCY", "4"))
+
+# Using slugs without :free often works better as OpenRouter routes to free ones if available
+OCR_MODELS = [
+    "meta-llama/llama-3.2-11b-vision-instruct",
+    "google/gemini-2.0-flash-001",
+    "qwen/qwen-2-vl-7b-instruct",
+    "google/gemini-flash-1.5",
+    "openai/gpt-4o-mini" # Last resort confirmed working for this user
+]
+
+# Circuit breaker: skip a model after this many consecutive failures, re-probe after the cooldown
+OCR_BREAKER_FAILURES = int(os.getenv("OCR_BREAKER_FAILURES", "3"))
+OCR_BREAKER_COOLDOWN = float(os.getenv("OCR_BREAKER_COOLDOWN", "60"))
+
+ocr_router = ModelRouter(OCR_MODELS, failure_threshold=OCR_BREAKER_FAILURES, cooldown=OCR_BREAKER_COOLDOWN)
+
+# Scheduler estimate for one page: image tokens (~765 for a 1024px tile) + prompt + transcription
+OCR_EST_TOKENS = 1500
+
+OCR_PROMPT = "Transcribe the text from this image exactly as it appears. Focus on technical skills, experience, projects, and contact info. Do not include any other commentary."
+
 def encode_image(image_bytes):
     return base64.b64encode(image_bytes).decode('utf-8')
 
-def extract_text_from_file(file_content: bytes, filename: str) -> str:
+def _as_stream(file_content: Union[bytes, BinaryIO]) -> BinaryIO:
+    # Callers may pass raw bytes (scripts) or a seekable file handle (uploads spooled to disk)
+    if isinstance(file_content, (bytes, bytearray)):
+        return io.BytesIO(file_content)
+    file_content.seek(0)
+    return file_content
+
+def _pdf_on_disk(stream: BinaryIO) -> Tuple[str, Optional[IO[bytes]]]:
+    # pdf2image shells out to poppler with a path. Reuse the file's own path when
+    # it has one, otherwise copy it to disk in chunks once and render pages from it.
+    # Returns the path and the temp file to close afterwards (if one was created).
+    name = getattr(stream, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name, None
+
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf")
+    stream.seek(0)
+    shutil.copyfileobj(stream, tmp)
+    tmp.flush()
+    return tmp.name, tmp
+
+@contextmanager
+def _pdf_path(stream: BinaryIO):
+    path, tmp = _pdf_on_disk(stream)
+    try:
+        yield path
+    finally:
+        if tmp is not None:
+            tmp.close()
+
+def _record_page(source: str, seconds: float, prepared: bytes, original: Optional[bytes] = None):
+    OCR_PREPARE_DURATION.observe(seconds, source=source)
+    OCR_PAGE_BYTES.observe(len(prepared), source=source, stage="prepared")
+    if original is not None:
+        OCR_PAGE_BYTES.observe(len(original), source=source, stage="original")
+        logger.info(f"Prepared {source} for OCR: {len(original)} -> {len(prepared)} bytes in {seconds * 1000:.0f}ms")
+    else:
+        logger.info(f"Rendered {source} page for OCR: {len(prepared)} bytes in {seconds * 1000:.0f}ms")
+
+def _prepare_upload(image_bytes: bytes) -> bytes:
+    # Uploaded images are preprocessed like rendered pages; if PIL can't read one, send it as is
+    start = time.perf_counter()
+    try:
+        prepared = prepare_image(image_bytes)
+    except Exception as e:
+        logger.warning(f"Image preprocessing failed, sending the original: {e}")
+        return image_bytes
+    _record_page("image", time.perf_counter() - start, prepared, image_bytes)
+    return prepared
+
+async def _aprepare_upload(image_bytes: bytes) -> bytes:
+    start = time.perf_counter()
+    try:
+        prepared = await doc_pool.run(prepare_image, image_bytes)
+    except Exception as e:
+        logger.warning(f"Image preprocessing failed, sending the original: {e}")
+        return image_bytes
+    _record_page("image", time.perf_counter() - start, prepared, image_bytes)
+    return prepared
+
+def payload_stats() -> dict:
+    """
+    Per-page preprocessing time and bytes sent for OCR, by source
+    (uploaded image or scanned PDF page), plus mean OCR call latency.
+    """
+    stats = {}
+    for source in ("image", "pdf"):
+        pages = OCR_PREPARE_DURATION.count(source=source)
+        if not pages:
+            continue
+        stats[source] = {
+            "pages": pages,
+            "avg_prepare_ms": round(OCR_PREPARE_DURATION.sum(source=source) / pages * 1000, 1),
+            "avg_bytes_sent": round(OCR_PAGE_BYTES.sum(source=source, stage="prepared") / pages),
+        }
+        originals = OCR_PAGE_BYTES.count(source=source, stage="original")
+        if originals:
+            stats[source]["avg_bytes_original"] = round(OCR_PAGE_BYTES.sum(source=source, stage="original") / originals)
+    calls = AGENT_DURATION.count(agent="ocr")
+    if calls:
+        stats["ocr_calls"] = calls
+        stats["avg_ocr_s"] = round(AGENT_DURATION.sum(agent="ocr") / calls, 3)
+    return stats
+
+def _combine_pages(page_texts: List[str]) -> str:
+    full_text = [f"--- Page {i+1} ---\n{text}" for i, text in enumerate(page_texts)]
+    combined_text = "\n".join(full_text)
+    logger.info(f"OCR extracted {len(combined_text)} chars.")
+
+    if not combined_text.strip():
+        return "Error: OCR succeeded but returned no text."
+    return combined_text
+
+def extract_text_from_file(file_content: Union[bytes, BinaryIO], filename: str) -> str:
     """
-    Extracts text from a file (TXT, PDF, or Image).
+    Extracts text from a file (TXT, PDF, or Image), given as bytes or a
+    seekable binary file handle. PDFs are read from the handle, never
+    copied into memory as a whole.
     For Images and PDFs, it uses GPT-4o Vision capabilities for best results.
     """
     logger.info(f"Extracting text from {filename}...")
-    
+
     file_ext = filename.split('.')[-1].lower()
-    
+    stream = _as_stream(file_content)
+
     if file_ext == 'txt':
-        return file_content.decode('utf-8')
-        
+        return stream.read().decode('utf-8')
+
     elif file_ext in ['jpg', 'jpeg', 'png']:
-        return extract_text_from_image(file_content)
-        
+        return extract_text_from_image(_prepare_upload(stream.read()))
+
     elif file_ext == 'pdf':
         try:
-            # First attempt: Try extracting text directly (for digital PDFs)
-            from pypdf import PdfReader
-            reader = PdfReader(io.BytesIO(file_content))
-            text_parts = []
-            for page in reader.pages:
-                text_parts.append(page.extract_text() or "")
-            
-            digital_text = "\n".join(text_parts).strip()
-            
+            digital_text, page_count = read_pdf_text(stream)
+
             if len(digital_text) > 50:
                 logger.info(f"Successfully extracted {len(digital_text)} chars from digital PDF.")
                 return digital_text
-            
+
             logger.info("Digital PDF extraction yielded little text. Attempting OCR...")
-            
-            # Second attempt: Convert to images and use VLM (for scanned documents)
-            from pdf2image import convert_from_bytes
-            images = convert_from_bytes(file_content)
-            
-            full_text = []
-            for i, img in enumerate(images):
-                img_byte_arr = io.BytesIO()
-                img.save(img_byte_arr, format='JPEG')
-                img_bytes = img_byte_arr.getvalue()
-                
-                logger.info(f"OCRing page {i+1}...")
-                text = extract_text_from_image(img_bytes)
-                full_text.append(f"--- Page {i+1} ---\n{text}")
-                
-            combined_text = "\n".join(full_text)
-            logger.info(f"OCR extracted {len(combined_text)} chars.")
-            
-            if not combined_text.strip():
-                return "Error: OCR succeeded but returned no text."
-            return combined_text
-            
+
+            page_texts = []
+            with _pdf_path(stream) as pdf_path:
+                for page_number in range(1, page_count + 1):
+                    start = time.perf_counter()
+                    img_bytes = render_pdf_page(pdf_path, page_number)
+                    _record_page("pdf", time.perf_counter() - start, img_bytes)
+                    logger.info(f"OCRing page {page_number}...")
+                    page_texts.append(extract_text_from_image(img_bytes))
+
+            return _combine_pages(page_texts)
+
+        except Exception as e:
+            logger.error(f"Error parsing PDF: {e}")
+            return f"Error extracting text from PDF: {str(e)}"
+
+    else:
+        return "Unsupported file format."
+
+async def aextract_text_from_file(file_content: Union[bytes, BinaryIO], filename: str) -> str:
+    """
+    Async version of extract_text_from_file. PDF decoding, page rendering
+    and image preprocessing run in the document process pool, so they don't hold
+    the event loop's GIL; only text and page JPEGs come back. Scanned pages
+    are rendered lazily and OCRed concurrently (bounded by
+    OCR_PAGE_CONCURRENCY), then reassembled in order.
+    """
+    logger.info(f"Extracting text from {filename}...")
+
+    file_ext = filename.split('.')[-1].lower()
+    stream = _as_stream(file_content)
+
+    if file_ext == 'txt':
+        return (await asyncio.to_thread(stream.read)).decode('utf-8')
+
+    elif file_ext in ['jpg', 'jpeg', 'png']:
+        return await aextract_text_from_image(await _aprepare_upload(await asyncio.to_thread(stream.read)))
+
+    elif file_ext == 'pdf':
+        try:
+            # Worker processes open the PDF by path, never receive the file contents
+            pdf_path, tmp = await asyncio.to_thread(_pdf_on_disk, stream)
+            try:
+                digital_text, page_count = await doc_pool.run(read_pdf_text, pdf_path)
+
+                if len(digital_text) > 50:
+                    logger.info(f"Successfully extracted {len(digital_text)} chars from digital PDF.")
+                    return digital_text
+
+                logger.info("Digital PDF extraction yielded little text. Attempting OCR...")
+
+                semaphore = asyncio.Semaphore(max(1, OCR_PAGE_CONCURRENCY))
+
+                async def ocr_page(page_number: int) -> str:
+                    # Render inside the semaphore so at most OCR_PAGE_CONCURRENCY pages are in memory
+                    async with semaphore:
+                        start = time.perf_counter()
+                        img_bytes = await doc_pool.run(render_pdf_page, pdf_path, page_number)
+                        _record_page("pdf", time.perf_counter() - start, img_bytes)
+                        logger.info(f"OCRing page {page_number}...")
+                        return await aextract_text_from_image(img_bytes)
+
+                # gather() preserves page order regardless of completion order
+                page_texts = await asyncio.gather(*(ocr_page(n) for n in range(1, page_count + 1)))
+            finally:
+                if tmp is not None:
+                    tmp.close()
+
+            return _combine_pages(page_texts)
+
         except Exception as e:
             logger.error(f"Error parsing PDF: {e}")
             return f"Error extracting text from PDF: {str(e)}"
-            
+
     else:
         return "Unsupported file format."
 
+def _ocr_message(base64_image: str) -> HumanMessage:
+    return HumanMessage(
+        content=[
+            {"type": "text", "text": OCR_PROMPT},
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{base64_image}"
+                }
+            }
+        ]
+    )
+
+@instrument_agent("ocr")
 def extract_text_from_image(image_bytes: bytes) -> str:
     """
     Uses a vision model via OpenRouter to extract text from an image.
-    Tries several models including free options and confirmed working fallbacks.
+    Tries several models including free options and confirmed working fallbacks,
+    in the order chosen by `ocr_router` from their recent health.
     """
-    # Using slugs without :free often works better as OpenRouter routes to free ones if available
-    models = [
-        "meta-llama/llama-3.2-11b-vision-instruct",
-        "google/gemini-2.0-flash-001",
-        "qwen/qwen-2-vl-7b-instruct",
-        "google/gemini-flash-1.5",
-        "openai/gpt-4o-mini" # Last resort confirmed working for this user
-    ]
-    
-    base64_image = encode_image(image_bytes)
-    
-    for model_name in models:
+    message = _ocr_message(encode_image(image_bytes))
+
+    for model_name in ocr_router.candidates():
+        start = time.perf_counter()
         try:
             logger.info(f"Starting Image OCR via {model_name}...")
-            llm = ChatOpenAI(model=model_name, temperature=0, max_retries=1)
-            
-            message = HumanMessage(
-                content=[
-                    {"type": "text", "text": "Transcribe the text from this image exactly as it appears. Focus on technical skills, experience, projects, and contact info. Do not include any other commentary."},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}"
-                        }
-                    }
-                ]
-            )
-            
-            response = llm.invoke([message])
+            llm = get_llm(model_name, temperature=0)
+
+            response = call(llm, [message], model_name, est_tokens=OCR_EST_TOKENS)
             extracted_text = response.content.strip()
-            
+
             if extracted_text and len(extracted_text) > 10:
+                ocr_router.record_success(model_name, time.perf_counter() - start)
                 logger.info(f"OCR complete using {model_name}. Extracted {len(extracted_text)} characters.")
                 return extracted_text
-                
+
+            ocr_router.record_failure(model_name, time.perf_counter() - start, "Empty or too short response")
+
         except Exception as e:
+            ocr_router.record_failure(model_name, time.perf_counter() - start, str(e))
             logger.warning(f"Failed to use model {model_name}: {e}")
             continue
-            
+
     logger.error("All OCR models failed to extract text from image.")
     return ""  # Return empty string on failure instead of error message
+
+@instrument_agent("ocr")
+async def aextract_text_from_image(image_bytes: bytes) -> str:
+    """
+    Async version of extract_text_from_image.
+    """
+    message = _ocr_message(encode_image(image_bytes))
+
+    for model_name in ocr_router.candidates():
+        start = time.perf_counter()
+        try:
+            logger.info(f"Starting Image OCR via {model_name}...")
+            llm = get_llm(model_name, temperature=0)
+
+            response = await acall(llm, [message], model_name, est_tokens=OCR_EST_TOKENS)
+            extracted_text = response.content.strip()
+
+            if extracted_text and len(extracted_text) > 10:
+                ocr_router.record_success(model_name, time.perf_counter() - start)
+                logger.info(f"OCR complete using {model_name}. Extracted {len(extracted_text)} characters.")
+                return extracted_text
+
+            ocr_router.record_failure(model_name, time.perf_counter() - start, "Empty or too short response")
+
+        except Exception as e:
+            ocr_router.record_failure(model_name, time.perf_counter() - start, str(e))
+            logger.warning(f"Failed to use model {model_name}: {e}")
+            continue
+
+    logger.error("All OCR models failed to extract text from image.")
+    return ""
@@ -0,0 +1,90 @@
+import math
+import os
+import re
+from typing import Any, Dict, List
+import numpy as np
+from src.utils.logger import setup_logger
+from src.utils.skills import match_matrix, missing_skills, normalize_skills
+
+logger = setup_logger(__name__)
+
+# Candidates scoring below this (0-1) skip the LLM debate. 0 disables the pre-screen.
+PRESCREEN_THRESHOLD = float(os.getenv("PRESCREEN_THRESHOLD", "0"))
+SKILL_WEIGHT = float(os.getenv("PRESCREEN_SKILL_WEIGHT", "0.7"))
+EXPERIENCE_WEIGHT = 1.0 - SKILL_WEIGHT
+
+_LEADING_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+def coerce_years(value: Any) -> float:
+    """
+    Years of experience from an LLM parse, which doesn't always follow the
+    schema: 5, "5", "5+ years" and "approx. 3.5" all work; anything without
+    a number (None, "N/A") counts as 0.
+    """
+    if isinstance(value, bool):
+        return 0.0
+    if isinstance(value, (int, float)):
+        years = float(value)
+    else:
+        match = _LEADING_NUMBER.search(str(value or ""))
+        years = float(match.group()) if match else 0.0
+    return years if math.isfinite(years) and years > 0 else 0.0
+
+def prescreen_scores(resumes: List[Dict], jd_data: Dict) -> Dict[str, np.ndarray]:
+    """
+    Scores many parsed resumes against one parsed JD without any LLM call.
+
+    Builds a (candidates x required_skills) boolean match matrix, where a
+    skill matches if it is similar enough to the requirement ("k8s" ~
+    "Kubernetes"), and an experience ratio vector, so a whole batch is
+    scored with a handful of array operations. All scores are in [0, 1].
+    """
+    required = normalize_skills(jd_data.get("required_skills"))
+    min_years = coerce_years(jd_data.get("min_experience_years"))
+
+    matches = match_matrix([r.get("skills") for r in resumes], required)
+    skill_scores = matches.mean(axis=1) if required else np.ones(len(resumes))
+
+    years = np.array([coerce_years(r.get("experience_years")) for r in resumes])
+    if min_years > 0:
+        experience_scores = np.clip(years / min_years, 0.0, 1.0)
+    else:
+        experience_scores = np.ones(len(resumes))
+
+    return {
+        "score": SKILL_WEIGHT * skill_scores + EXPERIENCE_WEIGHT * experience_scores,
+        "skill_score": skill_scores,
+        "experience_score": experience_scores,
+        "matches": matches,
+    }
+
+def prescreen(resume_data: Dict, jd_data: Dict) -> Dict:
+    """
+    Deterministic skill-overlap / experience score for a single candidate.
+    """
+    scores = prescreen_scores([resume_data], jd_data)
+    missing = missing_skills(resume_data.get("skills"), jd_data.get("required_skills"))
+
+    return {
+        "score": float(scores["score"][0]),
+        "skill_score": float(scores["skill_score"][0]),
+        "experience_score": float(scores["experience_score"][0]),
+        "missing_skills": missing,
+    }
+
+def prescreen_analysis(resume_data: Dict, jd_data: Dict, result: Dict, threshold: float) -> Dict:
+    """
+    The cheap final result returned for candidates rejected by the pre-screen.
+    """
+    required = jd_data.get("required_skills") or []
+    matched = len(required) - len(result["missing_skills"])
+    return {
+        "score": int(round(result["score"] * 100)),
+        "reasoning": (
+            f"Rejected by pre-screen (score {result['score']:.2f} < threshold {threshold:.2f}). "
+            f"Matched {matched} of {len(required)} required skills; "
+            f"{coerce_years(resume_data.get('experience_years')):g} years of experience vs "
+            f"{coerce_years(jd_data.get('min_experience_years')):g} required."
+        ),
+        "missing_skills": result["missing_skills"],
+    }
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Upper bounds on the raw document text sent to the parsers
+RESUME_MAX_TOKENS = int(os.getenv("RESUME_MAX_TOKENS", "6000"))
+JD_MAX_TOKENS = int(os.getenv("JD_MAX_TOKENS", "3000"))
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "o200k_base")  # gpt-4o family
+
+# Lines at least this long are dropped when repeated (page headers/footers, sections OCRed twice)
+DEDUPE_MIN_CHARS = 30
+CHARS_PER_TOKEN = 4  # estimate used when the tiktoken encoding can't be loaded
+
+_BOILERPLATE = re.compile(
+    r"^(?:-+ ?page \d+ ?-+|page \d+(?: of \d+)?|curriculum vitae|r[eé]sum[eé]|cv"
+    r"|references (?:are )?available (?:up)?on request\.?)$",
+    re.IGNORECASE,
+)
+_INLINE_SPACE = re.compile(r"[ \t ]+")
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+_fallback_logged = False
+
+def load_encoding():
+    """
+    Loads the tiktoken encoding, which may download its BPE file on first
+    use. The API calls it on a thread at startup; scripts load it on first
+    use. Returns None (and token counts are estimated from length) if it
+    can't be loaded.
+    """
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+                except Exception as e:
+                    _encoding_failed = True
+                    logger.warning(f"tiktoken encoding {TOKEN_ENCODING} unavailable ({e}); estimating tokens from length")
+    return _encoding
+
+def _get_encoding():
+    global _fallback_logged
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return load_encoding()
+    # On the event loop a download would stall every request; estimate until the startup load finishes
+    if not _fallback_logged:
+        _fallback_logged = True
+        logger.info(f"tiktoken encoding {TOKEN_ENCODING} not loaded yet; estimating tokens from length")
+    return None
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text or "") // CHARS_PER_TOKEN)
+    return len(encoding.encode(text or "", disallowed_special=()))
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Truncates text to at most `max_tokens`, keeping the beginning (resumes
+    and job posts lead with the most relevant content).
+    """
+    if max_tokens <= 0 or not text:
+        return text
+    encoding = _get_encoding()
+    if encoding is None:
+        limit = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= limit:
+            return text
+        truncated = text[:limit]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        truncated = encoding.decode(tokens[:max_tokens])
+
+    logger.info(f"Truncated text to {max_tokens} tokens ({len(text)} -> {len(truncated)} chars)")
+    return truncated
+
+def clean_document_text(text: str) -> str:
+    """
+    Removes what costs tokens without carrying information: page markers
+    and numbers, "Curriculum Vitae"-style headings, repeated long lines
+    (headers/footers on every page, sections duplicated by OCR) and runs of
+    whitespace/blank lines.
+    """
+    lines: List[str] = []
+    seen = set()
+    for raw in (text or "").splitlines():
+        line = _INLINE_SPACE.sub(" ", raw).strip()
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if _BOILERPLATE.match(line):
+            continue
+        if len(line) >= DEDUPE_MIN_CHARS:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+def prepare_document(text: str, max_tokens: int) -> str:
+    return fit_to_budget(clean_document_text(text), max_tokens)
+
+def _unique(items: Optional[Iterable]) -> List[str]:
+    out, seen = [], set()
+    for item in items or []:
+        value = str(item).strip()
+        if value and value.lower() not in seen:
+            seen.add(value.lower())
+            out.append(value)
+    return out
+
+def _format_years(years) -> str:
+    try:
+        years = float(years)
+    except (TypeError, ValueError):
+        return str(years)
+    return f"{years:g} years"
+
+def _render(fields: List[tuple]) -> str:
+    return "\n".join(f"{label}: {value}" for label, value in fields if value not in (None, "", []))
+
+def serialize_resume(resume_data: Dict) -> str:
+    """
+    Compact, canonical text form of ResumeData for the debate/ranking
+    prompts: stable field order, no dict punctuation, de-duplicated lists.
+    Contact details are left out; they don't bear on fit.
+    """
+    data = resume_data or {}
+    return _render([
+        ("Name", data.get("name")),
+        ("Recent role", data.get("recent_role")),
+        ("Experience", _format_years(data["experience_years"]) if data.get("experience_years") is not None else None),
+        ("Skills", ", ".join(_unique(data.get("skills")))),
+        ("Education", "; ".join(_unique(data.get("education")))),
+    ])
+
+def serialize_jd(jd_data: Dict) -> str:
+    """
+    Compact, canonical text form of JobDescriptionData. Identical for every
+    candidate screened against the same JD, so it can sit in the cached
+    prompt prefix.
+    """
+    data = jd_data or {}
+    return _render([
+        ("Job title", data.get("job_title")),
+        ("Required skills", ", ".join(_unique(data.get("required_skills")))),
+        ("Minimum experience", _format_years(data["min_experience_years"]) if data.get("min_experience_years") is not None else None),
+        ("Preferred", "; ".join(_unique(data.get("preferred_qualifications")))),
+    ])
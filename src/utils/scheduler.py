@@ -0,0 +1,292 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from src.utils.logger import setup_logger
+from src.utils.metrics import LLM_RATE_LIMITED, SCHEDULER_WAIT, current_agent
+
+logger = setup_logger(__name__)
+
+# Default per-model limits (requests and tokens per minute); 0 disables a limit.
+# Per-model overrides: LLM_RATE_LIMITS='{"openai/gpt-4o-mini": [500, 200000]}'
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))
+LLM_TPM = float(os.getenv("LLM_TPM", "200000"))
+LLM_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    k: tuple(v) for k, v in json.loads(os.getenv("LLM_RATE_LIMITS", "{}")).items()
+}
+# Bucket capacity in seconds of quota: how far a burst may run ahead of the steady rate
+LLM_BURST_SECONDS = float(os.getenv("LLM_BURST_SECONDS", "10"))
+
+# Backoff for 429s: exponential with jitter, never shorter than the provider's Retry-After
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "4"))
+# Same backoff for timeouts, dropped connections and 5xx (this call only; the model isn't paused)
+LLM_TRANSIENT_RETRIES = int(os.getenv("LLM_TRANSIENT_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+
+# Priorities: lower runs first. Interactive requests beat batch work; within
+# a class, finishing an analysis (rank) beats the debate, parsing and OCR.
+INTERACTIVE, BATCH = "interactive", "batch"
+PRIORITY_CLASSES = {INTERACTIVE: 0, BATCH: 10}
+AGENT_PRIORITIES = {
+    "mediator": 0, "fast_debate": 0,
+    "optimist": 1, "skeptic": 1,
+    "parse_resume": 2, "parse_jd": 2,
+    "ocr": 3,
+}
+DEFAULT_AGENT_PRIORITY = 4
+
+request_priority: contextvars.ContextVar[str] = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+# Model of the LLM call in flight in this task, so HTTP hooks can attribute 429s
+current_model: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_model", default=None)
+
+@contextmanager
+def priority_class(level: str):
+    """
+    Runs the enclosed work (and any tasks it spawns) at `level` priority.
+    """
+    token = request_priority.set(level)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+def current_priority() -> int:
+    return PRIORITY_CLASSES.get(request_priority.get(), 0) + AGENT_PRIORITIES.get(current_agent.get(), DEFAULT_AGENT_PRIORITY)
+
+def parse_retry_after(headers) -> float:
+    """
+    Seconds to wait according to Retry-After / retry-after-ms, 0 if absent.
+    """
+    if headers is None:
+        return 0.0
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return 0.0
+
+def backoff_delay(attempt: int, retry_after: float = 0.0) -> float:
+    # "Equal jitter" exponential backoff, floored at the provider's Retry-After
+    ceiling = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt)
+    return max(retry_after, random.uniform(ceiling / 2, ceiling))
+
+class TokenBucket:
+    """
+    Classic token bucket refilled at `per_minute` / 60 per second, holding
+    at most `burst_seconds` worth of quota. `per_minute <= 0` means unlimited.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = LLM_BURST_SECONDS, now: float = 0.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        # A request bigger than the bucket may go once the bucket is full
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def consume(self, amount: float, now: float):
+        if self.rate <= 0:
+            return
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued: float = field(compare=False)
+
+@dataclass
+class _ModelLimiter:
+    requests: TokenBucket
+    tokens: TokenBucket
+    blocked_until: float = 0.0
+    waiters: List[_Waiter] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+    granted: int = 0
+    rate_limited: int = 0
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM calls. Each model has a
+    requests/min and a tokens/min bucket (token counts are estimates made
+    before the call). Async callers queue by priority and are released
+    strictly in priority order (FIFO within a priority) as quota becomes
+    available; a 429 blocks the model for its Retry-After so every caller
+    backs off together instead of producing an error storm.
+    """
+
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        tpm: float = LLM_TPM,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        burst_seconds: float = LLM_BURST_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rpm, self.tpm = rpm, tpm
+        self.limits = dict(LLM_RATE_LIMITS if limits is None else limits)
+        self.burst_seconds = burst_seconds
+        self.clock = clock
+        self._models: Dict[str, _ModelLimiter] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _limiter(self, model: str) -> _ModelLimiter:
+        limiter = self._models.get(model)
+        if limiter is None:
+            rpm, tpm = self.limits.get(model, (self.rpm, self.tpm))
+            now = self.clock()
+            limiter = _ModelLimiter(TokenBucket(rpm, self.burst_seconds, now), TokenBucket(tpm, self.burst_seconds, now))
+            self._models[model] = limiter
+        return limiter
+
+    def _wait_time(self, limiter: _ModelLimiter, tokens: float, now: float) -> float:
+        return max(
+            limiter.blocked_until - now,
+            limiter.requests.wait_time(1, now),
+            limiter.tokens.wait_time(tokens, now),
+        )
+
+    def _grant(self, limiter: _ModelLimiter, tokens: float, now: float):
+        limiter.requests.consume(1, now)
+        limiter.tokens.consume(tokens, now)
+        limiter.granted += 1
+
+    async def acquire(self, model: str, tokens: float, priority: Optional[int] = None):
+        """
+        Waits until `model` has quota for one request of ~`tokens` tokens
+        and no higher-priority caller is ahead.
+        """
+        priority = current_priority() if priority is None else priority
+        start = self.clock()
+        with self._lock:
+            limiter = self._limiter(model)
+            if not limiter.waiters and self._wait_time(limiter, tokens, start) <= 0:
+                self._grant(limiter, tokens, start)
+                SCHEDULER_WAIT.observe(0.0, priority=priority)
+                return
+            waiter = _Waiter(priority, next(self._seq), tokens, asyncio.get_running_loop().create_future(), start)
+            heapq.heappush(limiter.waiters, waiter)
+        self._dispatch(model)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Leave the entry in the heap; _dispatch skips finished futures
+            if not waiter.future.done():
+                waiter.future.cancel()
+            self._dispatch(model)
+            raise
+        SCHEDULER_WAIT.observe(self.clock() - start, priority=priority)
+
+    def _dispatch(self, model: str):
+        # Releases waiters in priority order while there is quota, then sleeps until the head can go
+        with self._lock:
+            limiter = self._models[model]
+            if limiter.timer is not None:
+                limiter.timer.cancel()
+                limiter.timer = None
+            while limiter.waiters:
+                head = limiter.waiters[0]
+                if head.future.done():
+                    heapq.heappop(limiter.waiters)
+                    continue
+                now = self.clock()
+                wait = self._wait_time(limiter, head.tokens, now)
+                if wait > 0:
+                    limiter.timer = head.future.get_loop().call_later(wait, self._dispatch, model)
+                    return
+                heapq.heappop(limiter.waiters)
+                self._grant(limiter, head.tokens, now)
+                head.future.set_result(None)
+
+    def acquire_blocking(self, model: str, tokens: float):
+        """
+        Blocking variant for the sync agent functions (scripts, CLI): no
+        priority queue, just rate limiting by reservation.
+        """
+        with self._lock:
+            limiter = self._limiter(model)
+            now = self.clock()
+            wait = self._wait_time(limiter, tokens, now)
+            # Reserve now (buckets may go negative) so concurrent threads queue up behind us
+            self._grant(limiter, tokens, now)
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, model: str, seconds: float):
+        """
+        Blocks new calls to `model` for `seconds` (after a 429).
+        """
+        with self._lock:
+            limiter = self._limiter(model)
+            limiter.blocked_until = max(limiter.blocked_until, self.clock() + seconds)
+            limiter.rate_limited += 1
+        LLM_RATE_LIMITED.inc(model=model)
+        logger.warning(f"Rate limited on {model}; pausing new calls for {seconds:.2f}s")
+
+    def throttled(self, model: str) -> bool:
+        """
+        True while `model` is paused after a 429 or has calls queued for quota.
+        """
+        with self._lock:
+            limiter = self._models.get(model)
+            if limiter is None:
+                return False
+            return limiter.blocked_until > self.clock() or any(not w.future.done() for w in limiter.waiters)
+
+    def stats(self) -> Dict:
+        now = self.clock()
+        with self._lock:
+            return {
+                model: {
+                    "waiting": sum(1 for w in limiter.waiters if not w.future.done()),
+                    "granted": limiter.granted,
+                    "rate_limited": limiter.rate_limited,
+                    "blocked_for": round(max(0.0, limiter.blocked_until - now), 3),
+                    "request_budget": round(limiter.requests.level, 2) if limiter.requests.rate > 0 else None,
+                    "token_budget": round(limiter.tokens.level, 2) if limiter.tokens.rate > 0 else None,
+                }
+                for model, limiter in self._models.items()
+            }
+
+def record_rate_limit(response):
+    """
+    httpx response hook: a 429 seen by the OpenAI client (including the
+    ones it retries internally) pauses every caller of that model.
+    """
+    if response.status_code == 429:
+        model = current_model.get()
+        if model:
+            scheduler.penalize(model, max(parse_retry_after(response.headers), LLM_BACKOFF_BASE))
+
+async def arecord_rate_limit(response):
+    record_rate_limit(response)
+
+scheduler = LLMScheduler()
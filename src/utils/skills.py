@@ -0,0 +1,192 @@
+import json
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Cosine similarity (0-1) at which two skills count as the same
+SKILL_MATCH_THRESHOLD = float(os.getenv("SKILL_MATCH_THRESHOLD", "0.75"))
+SKILL_EMBED_DIM = int(os.getenv("SKILL_EMBED_DIM", "1024"))
+NGRAM = 3
+
+# Spellings that character n-grams can't relate. Extend with SKILL_ALIASES='{"alias": "canonical"}'.
+SKILL_ALIASES: Dict[str, str] = {
+    "k8s": "kubernetes", "kube": "kubernetes",
+    "torch": "pytorch",
+    "tf": "tensorflow",
+    "sklearn": "scikit-learn", "scikit learn": "scikit-learn",
+    "js": "javascript", "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "golang": "go",
+    "postgres": "postgresql", "psql": "postgresql",
+    "mongo": "mongodb",
+    "nodejs": "node.js", "node": "node.js",
+    "reactjs": "react", "react.js": "react",
+    "vuejs": "vue", "vue.js": "vue",
+    "amazon web services": "aws",
+    "google cloud platform": "gcp", "google cloud": "gcp",
+    "microsoft azure": "azure",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "ci/cd": "ci cd", "cicd": "ci cd",
+    "c sharp": "c#", "csharp": "c#",
+    "cpp": "c++",
+    "dotnet": ".net",
+    "gen ai": "generative ai", "genai": "generative ai",
+    "llms": "llm", "large language models": "llm",
+    **{k.lower(): v.lower() for k, v in json.loads(os.getenv("SKILL_ALIASES", "{}")).items()},
+}
+
+_SEPARATORS = re.compile(r"[\s_\-]+")
+# "Python 3.11", "Java 17" -> base skill; only after a space, so "S3" / "EC2" survive
+_VERSION_SUFFIX = re.compile(r" v?\d+(\.\d+)*$")
+
+def normalize_skill(skill) -> str:
+    """
+    Canonical form of a skill name: lower case, separators collapsed,
+    trailing version numbers dropped, known aliases resolved.
+    """
+    text = _SEPARATORS.sub(" ", str(skill).strip().lower()).strip(" .,;:")
+    text = _VERSION_SUFFIX.sub("", text)
+    return SKILL_ALIASES.get(text, text)
+
+def normalize_skills(skills) -> List[str]:
+    # Normalized, de-duplicated, order-preserving
+    return list(dict.fromkeys(s for s in map(normalize_skill, skills or []) if s))
+
+@lru_cache(maxsize=65536)
+def _sparse_embedding(skill: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Bag of hashed character trigrams (with word-boundary markers), L2-normalized,
+    # as (bucket indices, weights); a few dozen bytes per skill instead of a dense row
+    padded = f"#{skill}#"
+    grams = [padded[i:i + NGRAM] for i in range(max(1, len(padded) - NGRAM + 1))]
+    buckets, counts = np.unique([zlib.crc32(g.encode("utf-8")) % SKILL_EMBED_DIM for g in grams], return_counts=True)
+    return buckets, (counts / np.linalg.norm(counts)).astype(np.float32)
+
+def embed_skills(skills: Sequence[str]) -> np.ndarray:
+    """
+    (len(skills), SKILL_EMBED_DIM) matrix of unit vectors for already
+    normalized skill names.
+    """
+    matrix = np.zeros((len(skills), SKILL_EMBED_DIM), dtype=np.float32)
+    for row, skill in enumerate(skills):
+        buckets, weights = _sparse_embedding(skill)
+        matrix[row, buckets] = weights
+    return matrix
+
+def similarity_matrix(skills_a: Sequence[str], skills_b: Sequence[str]) -> np.ndarray:
+    """
+    Cosine similarities between every pair of normalized skills, as one
+    matrix product. Identical names always score exactly 1.
+    """
+    if not len(skills_a) or not len(skills_b):
+        return np.zeros((len(skills_a), len(skills_b)), dtype=np.float32)
+    sims = embed_skills(skills_a) @ embed_skills(skills_b).T
+    sims[np.asarray(skills_a, dtype=object)[:, None] == np.asarray(skills_b, dtype=object)[None, :]] = 1.0
+    return sims
+
+def match_matrix(resumes_skills: Sequence[Sequence[str]], required_skills, threshold: float = SKILL_MATCH_THRESHOLD) -> np.ndarray:
+    """
+    Boolean (resumes x required skills) matrix: True where a resume has a
+    skill similar enough to the requirement. Every distinct skill in the
+    batch is embedded once and compared with the requirements in a single
+    matrix product, so thousands of resumes are scored per call.
+    """
+    required = normalize_skills(required_skills)
+    resumes = [normalize_skills(skills) for skills in resumes_skills]
+    matches = np.zeros((len(resumes), len(required)), dtype=bool)
+    if not required or not resumes:
+        return matches
+
+    vocabulary = list(dict.fromkeys(s for skills in resumes for s in skills))
+    if not vocabulary:
+        return matches
+    position = {skill: i for i, skill in enumerate(vocabulary)}
+    hits = similarity_matrix(vocabulary, required) >= threshold  # (vocabulary x required)
+
+    # Rows of `hits` for every (resume, skill) entry, OR-reduced per resume
+    lengths = np.array([len(skills) for skills in resumes])
+    entries = np.array([position[s] for skills in resumes for s in skills], dtype=np.int64)
+    nonempty = lengths > 0
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))[nonempty]
+    matches[nonempty] = np.logical_or.reduceat(hits[entries], starts, axis=0)
+    return matches
+
+def coverage(resumes_skills: Sequence[Sequence[str]], required_skills, threshold: float = SKILL_MATCH_THRESHOLD) -> np.ndarray:
+    """
+    Fraction of the required skills each resume covers (1.0 if none are required).
+    """
+    matches = match_matrix(resumes_skills, required_skills, threshold)
+    return matches.mean(axis=1) if matches.shape[1] else np.ones(len(matches))
+
+def missing_skills(candidate_skills, required_skills, threshold: float = SKILL_MATCH_THRESHOLD) -> List[str]:
+    """
+    Required skills (as written in the JD) with no similar candidate skill.
+    """
+    required = [s for s in (required_skills or []) if normalize_skill(s)]
+    # Duplicate spellings in the JD collapse in match_matrix; map back per original entry
+    normalized = normalize_skills(required)
+    matched = dict(zip(normalized, match_matrix([candidate_skills or []], normalized, threshold)[0]))
+    return [s for s in required if not matched[normalize_skill(s)]]
+
+class SkillVocabulary:
+    """
+    A growing set of normalized skills with an inverted index from
+    embedding bucket to skill. similar() scores a query against the whole
+    vocabulary with the same cosine as similarity_matrix(), without
+    materializing a (vocabulary x dim) matrix. Not thread-safe; the owner
+    serializes access.
+    """
+
+    def __init__(self):
+        self.skills: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[int, Tuple[List[int], List[float]]] = {}
+        self._arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def add(self, skill: str) -> int:
+        skill_id = self._ids.get(skill)
+        if skill_id is None:
+            skill_id = self._ids[skill] = len(self.skills)
+            self.skills.append(skill)
+            for bucket, weight in zip(*_sparse_embedding(skill)):
+                ids, weights = self._postings.setdefault(int(bucket), ([], []))
+                ids.append(skill_id)
+                weights.append(float(weight))
+                self._arrays.pop(int(bucket), None)
+        return skill_id
+
+    def _bucket(self, bucket: int) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(bucket)
+        if arrays is None:
+            ids, weights = self._postings.get(bucket, ([], []))
+            arrays = self._arrays[bucket] = (np.array(ids, dtype=np.int64), np.array(weights, dtype=np.float32))
+        return arrays
+
+    def similar(self, skill: str, threshold: float = SKILL_MATCH_THRESHOLD) -> List[str]:
+        """
+        Vocabulary skills whose similarity to the normalized `skill` is at
+        least `threshold` (the skill itself included, if present).
+        """
+        ids, weights = [], []
+        for bucket, weight in zip(*_sparse_embedding(skill)):
+            bucket_ids, bucket_weights = self._bucket(int(bucket))
+            ids.append(bucket_ids)
+            weights.append(bucket_weights * weight)
+        if not ids or not self.skills:
+            return []
+        scores = np.bincount(np.concatenate(ids), np.concatenate(weights), minlength=len(self.skills))
+        found = {self.skills[i] for i in np.flatnonzero(scores >= threshold - 1e-6)}
+        if skill in self._ids:
+            found.add(skill)
+        return sorted(found)
+
+    def __len__(self) -> int:
+        return len(self.skills)
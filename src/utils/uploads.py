@@ -0,0 +1,60 @@
+import os
+import shutil
+from typing import BinaryIO
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+class UploadTooLarge(Exception):
+    pass
+
+def _check_size(upload: UploadFile, max_bytes: int) -> int:
+    # Starlette has already spooled the whole body, so seek/tell gives the size without reading it
+    file = upload.file
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    if size > max_bytes:
+        raise UploadTooLarge(f"{upload.filename} exceeds the {max_bytes} byte upload limit")
+    return size
+
+def _hash(file: BinaryIO, digest):
+    while chunk := file.read(UPLOAD_CHUNK_BYTES):
+        digest.update(chunk)
+    file.seek(0)
+
+async def checked_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES, digest=None) -> BinaryIO:
+    """
+    Returns the upload's own file, rewound, after checking it against
+    `max_bytes`. Starlette already spools uploads (small ones in memory,
+    large ones on disk), so there is no second copy. If given, `digest`
+    (a hashlib object) is fed the content on a worker thread. The file is
+    closed when the request finishes; closing it earlier is harmless.
+    """
+    size = _check_size(upload, max_bytes)
+    if digest is not None:
+        await run_in_threadpool(_hash, upload.file, digest)
+    logger.info(f"Received upload {upload.filename} ({size} bytes)")
+    return upload.file
+
+def _copy_to(file: BinaryIO, path: str):
+    try:
+        with open(path, "wb") as f:
+            shutil.copyfileobj(file, f, UPLOAD_CHUNK_BYTES)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+async def save_upload(upload: UploadFile, path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """
+    Copies an upload to `path` on a worker thread (same size limit as
+    checked_upload), for inputs that must outlive the request. Returns the size.
+    """
+    size = _check_size(upload, max_bytes)
+    await run_in_threadpool(_copy_to, upload.file, path)
+    return size
@@ -0,0 +1,51 @@
+import asyncio
+import io
+from src import graph
+from src.utils.blobs import blob_store
+from src.utils.cache import TwoTierCache
+
+class CountingGraph:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        return {**inputs, "analysis": {"score": 70 + self.calls}}
+
+def _inputs(resume_text="John Doe. Python expert.", **extra):
+    return {"resume_text": resume_text, "jd_text": "Senior Python Developer.", **extra}
+
+def test_repeat_analysis_is_served_from_cache(monkeypatch):
+    monkeypatch.setattr(graph, "analysis_cache", TwoTierCache("analysis", None))
+    fake = CountingGraph()
+
+    first = asyncio.run(graph.run_cached_analysis(_inputs(), graph=fake))
+    again = asyncio.run(graph.run_cached_analysis(_inputs("John  Doe.\nPython expert."), graph=fake))
+    assert fake.calls == 1
+    assert again["cached"] and again["analysis"] == first["analysis"]
+
+    # Bypass runs the graph and refreshes the entry; other options miss
+    fresh = asyncio.run(graph.run_cached_analysis(_inputs(), bypass_cache=True, graph=fake))
+    assert fake.calls == 2 and fresh["analysis"]["score"] == 72
+    assert asyncio.run(graph.run_cached_analysis(_inputs(), graph=fake))["analysis"]["score"] == 72
+    asyncio.run(graph.run_cached_analysis(_inputs(mode="fast"), graph=fake))
+    assert fake.calls == 3
+
+def test_file_inputs_are_keyed_by_content():
+    a = blob_store.put(io.BytesIO(b"resume bytes"))
+    b = blob_store.put(io.BytesIO(b"resume bytes"))
+    try:
+        key_a = graph.analysis_key({"resume_blob_id": a, "resume_filename": "a.txt", "jd_text": "JD"})
+        key_b = graph.analysis_key({"resume_blob_id": b, "resume_filename": "b.txt", "jd_text": "JD"})
+        assert key_a == key_b
+        assert graph.analysis_key({"resume_blob_id": a, "jd_text": None}) is None
+    finally:
+        blob_store.release(a, b)
+
+def test_pipeline_version_tracks_budgets_and_hedge_fallback(monkeypatch):
+    base = graph.pipeline_version()
+    monkeypatch.setattr(graph, "RESUME_MAX_TOKENS", graph.RESUME_MAX_TOKENS + 1)
+    budget = graph.pipeline_version()
+    monkeypatch.setattr(graph.hedger, "enabled", True)
+    monkeypatch.setattr(graph.hedger, "fallback_model", "gpt-4o-mini")
+    assert len({base, budget, graph.pipeline_version()}) == 3
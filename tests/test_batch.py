@@ -0,0 +1,76 @@
+import asyncio
+from fastapi.testclient import TestClient
+from src import api, graph
+
+def stub_agents(monkeypatch, parse_delay=0.02):
+    """
+    Replaces the LLM agents with stubs. A resume text is "<name>:<score>";
+    "broken" fails to parse. Returns the call counters.
+    """
+    calls = {"jd": 0, "in_flight": 0, "peak": 0}
+
+    async def parse_jd(text):
+        calls["jd"] += 1
+        return {"job_title": "Backend Engineer", "required_skills": ["Python"], "min_years_experience": 0}
+
+    async def parse_resume(text):
+        calls["in_flight"] += 1
+        calls["peak"] = max(calls["peak"], calls["in_flight"])
+        try:
+            await asyncio.sleep(parse_delay)
+        finally:
+            calls["in_flight"] -= 1
+        if text == "broken":
+            return {"error": "Invalid json output"}
+        name, score = text.split(":")
+        return {"name": name, "skills": ["Python"], "experience_years": 3, "score": int(score)}
+
+    async def opinion(resume_data, jd_data):
+        return "fine"
+
+    async def rank(resume_data, jd_data, optimist, skeptic):
+        return {"score": resume_data["score"], "decision": "Interview", "reasoning": "stub"}
+
+    monkeypatch.setattr(graph, "CACHE_ENABLED", False)
+    monkeypatch.setattr(graph, "aparse_jd", parse_jd)
+    monkeypatch.setattr(graph, "aparse_resume", parse_resume)
+    monkeypatch.setattr(graph, "aget_optimist_opinion", opinion)
+    monkeypatch.setattr(graph, "aget_skeptic_opinion", opinion)
+    monkeypatch.setattr(graph, "arank_candidate", rank)
+    return calls
+
+def test_screen_batch_parses_jd_once_and_bounds_concurrency(monkeypatch):
+    calls = stub_agents(monkeypatch)
+    texts = ["Ada:70", "broken", "Grace:90", "Linus:80", "Barbara:90", "Ken:60"]
+
+    batch = asyncio.run(graph.screen_batch(
+        [{"resume_blob_id": None, "resume_filename": None, "resume_text": t} for t in texts],
+        {"jd_blob_id": None, "jd_filename": None, "jd_text": "Backend engineer, Python."},
+        concurrency=2,
+    ))
+
+    assert calls["jd"] == 1
+    assert calls["peak"] == 2
+    assert batch["jd_data"]["job_title"] == "Backend Engineer"
+    # Sorted by score, ties by input order, and the failed resume last without sinking the rest
+    assert [r["candidate_name"] for r in batch["results"][:-1]] == ["Grace", "Barbara", "Linus", "Ada", "Ken"]
+    assert [r["score"] for r in batch["results"][:-1]] == [90, 90, 80, 70, 60]
+    assert batch["results"][-1] == {"index": 1, "filename": None, "error": "Invalid json output"}
+
+def test_analyze_batch_endpoint(monkeypatch):
+    calls = stub_agents(monkeypatch, parse_delay=0)
+    client = TestClient(api.app)
+
+    response = client.post("/analyze/batch", data={
+        "resume_texts": ["Ada:70", "broken", "Grace:90"],
+        "jd_text": "Backend engineer, Python.",
+        "concurrency": "2",
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert calls["jd"] == 1
+    assert body["job_title"] == "Backend Engineer"
+    assert body["total"] == 3
+    assert [r.get("score") for r in body["results"]] == [90, 70, None]
+    assert body["results"][-1]["error"] == "Invalid json output"
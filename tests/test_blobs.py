@@ -0,0 +1,17 @@
+import io
+import pytest
+from src.utils.blobs import BlobStore
+
+def test_blob_store_open_and_release():
+    store = BlobStore()
+    file = io.BytesIO(b"resume bytes")
+    blob_id = store.put(file)
+
+    file.read()
+    assert store.open(blob_id).read() == b"resume bytes"
+
+    store.release(blob_id)
+    store.release(blob_id, None)  # idempotent
+    assert file.closed and len(store) == 0
+    with pytest.raises(KeyError):
+        store.open(blob_id)
@@ -0,0 +1,59 @@
+import asyncio
+import sqlite3
+from src.agents.resume_parser import ResumeData
+from src.agents.jd_parser import JobDescriptionData
+from src.utils.cache import TwoTierCache, parse_cache_key
+
+def test_key_ignores_whitespace_but_not_model_or_schema():
+    base = parse_cache_key("John Doe.\nPython", "m1", "1", ResumeData)
+    assert base == parse_cache_key("  John   Doe. Python \n", "m1", "1", ResumeData)
+    assert base != parse_cache_key("John Doe. Python", "m2", "1", ResumeData)
+    assert base != parse_cache_key("John Doe. Python", "m1", "2", ResumeData)
+    assert base != parse_cache_key("John Doe. Python", "m1", "1", JobDescriptionData)
+
+def test_lru_eviction_falls_back_to_disk(tmp_path):
+    cache = TwoTierCache("t", str(tmp_path / "cache.sqlite3"), max_entries=1)
+    cache.set("a", {"name": "A"})
+    cache.set("b", {"name": "B"})
+
+    assert cache.get("a") == {"name": "A"}
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["disk_hits"] == 1 and stats["misses"] == 1
+
+    # A fresh process sees the persisted entries.
+    reopened = TwoTierCache("t", str(tmp_path / "cache.sqlite3"))
+    assert reopened.get("b") == {"name": "B"}
+
+def test_entries_expire_after_ttl(tmp_path):
+    now = [1000.0]
+    cache = TwoTierCache("t", str(tmp_path / "cache.sqlite3"), ttl=60, clock=lambda: now[0])
+    cache.set("a", {"score": 80})
+    now[0] += 59
+    assert cache.get("a") == {"score": 80}
+
+    now[0] += 2
+    assert cache.get("a") is None
+    # Expired on disk too, not just in memory
+    reopened = TwoTierCache("t", str(tmp_path / "cache.sqlite3"), clock=lambda: now[0])
+    assert reopened.get("a") is None
+
+def test_async_access_and_disk_errors(tmp_path, monkeypatch):
+    cache = TwoTierCache("t", str(tmp_path / "cache.sqlite3"), max_entries=1)
+
+    async def scenario():
+        await cache.aset("a", {"name": "A"})
+        await cache.aset("b", {"name": "B"})
+        return await cache.aget("a")  # evicted from memory, read from disk
+
+    assert asyncio.run(scenario()) == {"name": "A"}
+    assert cache.stats()["disk_hits"] == 1
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    # Like get/set, delete and clear log disk failures instead of raising
+    monkeypatch.setattr(cache, "_db", locked)
+    cache.delete("a")
+    cache.clear()
+    assert cache.get("b") is None
@@ -0,0 +1,59 @@
+from src.utils.candidates import CandidateStore
+
+JD = {"job_title": "Backend", "required_skills": ["Python", "Docker", "AWS"], "min_experience_years": 4}
+
+def _resume(name, skills, years):
+    return {"name": name, "skills": skills, "experience_years": years}
+
+def test_search_ranks_by_coverage_and_filters(tmp_path):
+    store = CandidateStore(str(tmp_path))
+    ada = store.add(_resume("Ada", ["python", " Docker ", "AWS"], 5), "h1")
+    bob = store.add(_resume("Bob", ["Python", "Docker"], 8), "h2")
+    store.add(_resume("Cy", ["Java"], 2), "h3")
+
+    top = store.search(JD, top_k=2)
+    assert [m["id"] for m in top] == [ada, bob]
+    assert top[1]["missing_skills"] == ["AWS"] and top[1]["skill_coverage"] == round(2 / 3, 4)
+    assert [m["name"] for m in store.search(JD, min_years=6)] == ["Bob"]
+    assert [m["name"] for m in store.search(JD, min_coverage=0.5)] == ["Ada", "Bob"]
+
+def test_updates_and_deletes_keep_index_in_sync(tmp_path):
+    store = CandidateStore(str(tmp_path))
+    ada = store.add(_resume("Ada", ["Java"], 5), "h1")
+    assert store.search(JD, min_coverage=0.1) == []
+
+    # Same resume text parsed again with different output: updated in place
+    assert store.add(_resume("Ada", ["Python", "AWS"], 5), "h1") == ada
+    assert [m["id"] for m in store.search(JD, min_coverage=0.1)] == [ada]
+    assert len(CandidateStore(str(tmp_path))) == 1  # persisted
+    assert store.knows("h1") and not CandidateStore(str(tmp_path)).knows("h1")
+
+    assert store.delete(ada) and not store.delete(ada)
+    assert store.search(JD) == []
+    assert not store.knows("h1")
+
+def test_non_numeric_experience_is_coerced(tmp_path):
+    store = CandidateStore(str(tmp_path))
+    store.add(_resume("Ada", ["Python", "Docker", "AWS"], "5+ years"), "h1")
+    [match] = store.search({**JD, "min_experience_years": "4 years"}, min_years=4)
+    assert match["experience_years"] == 5.0 and match["score"] == 1.0
+
+def test_shortlist_isolates_failed_candidates(tmp_path, monkeypatch):
+    import asyncio
+    from src import graph
+
+    store = CandidateStore(str(tmp_path))
+    ada = store.add(_resume("Ada", ["Python", "Docker", "AWS"], 5), "h1")
+    bob = store.add(_resume("Bob", ["Python"], 5), "h2")
+
+    async def fake_run_analysis(inputs, app=None):
+        if inputs["resume_data"]["name"] == "Ada":
+            raise RuntimeError("provider exploded")
+        return {**inputs, "analysis": {"score": 60}}
+
+    monkeypatch.setattr(graph, "candidate_store", store)
+    monkeypatch.setattr(graph, "run_analysis", fake_run_analysis)
+    results = asyncio.run(graph.screen_shortlist(JD, top_k=2))["results"]
+
+    assert [r["candidate_id"] for r in results] == [bob, ada]  # failures last
+    assert results[0]["score"] == 60 and results[1]["error"] == "provider exploded"
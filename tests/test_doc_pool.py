@@ -0,0 +1,38 @@
+import asyncio
+import os
+import time
+import pytest
+from src.utils.doc_pool import DocumentPool
+
+def test_tasks_run_in_recycled_worker_processes():
+    pool = DocumentPool(workers=1, max_tasks_per_child=2, timeout=30)
+
+    async def run():
+        return [await pool.run(os.getpid) for _ in range(4)]
+
+    try:
+        pids = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert os.getpid() not in pids
+    # Each worker retires after two tasks
+    assert pids[0] == pids[1] and pids[2] == pids[3] and pids[1] != pids[2]
+
+def test_timeout_replaces_the_pool():
+    pool = DocumentPool(workers=1, timeout=30)
+
+    async def run():
+        with pytest.raises(TimeoutError):
+            await pool.run(time.sleep, 10, timeout=0.5)
+        return await pool.run(os.getpid)
+
+    try:
+        start = time.perf_counter()
+        assert asyncio.run(run()) != os.getpid()
+        assert time.perf_counter() - start < 8 and pool.restarts == 1
+    finally:
+        pool.shutdown()
+
+def test_zero_workers_uses_threads():
+    pool = DocumentPool(workers=0)
+    assert asyncio.run(pool.run(os.getpid)) == os.getpid()
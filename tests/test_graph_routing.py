@@ -0,0 +1,45 @@
+import asyncio
+import time
+from langgraph.graph import END
+from src import graph
+from src.graph import route_after_prescreen
+
+def test_route_after_prescreen_by_mode():
+    assert route_after_prescreen({"mode": None}) == ["optimist", "skeptic"]
+    assert route_after_prescreen({"mode": "debate"}) == ["optimist", "skeptic"]
+    assert route_after_prescreen({"mode": "fast"}) == "fast_debate"
+    assert route_after_prescreen({"mode": "fast", "analysis": {"score": 10}}) == END
+
+def test_failed_parse_aborts_run_and_cancels_sibling(monkeypatch):
+    cancelled = []
+
+    async def failing_parse(text):
+        await asyncio.sleep(0.05)
+        return {"error": "Invalid json output"}
+
+    async def slow_parse(text):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+        return {"job_title": "never"}
+
+    async def no_debate(*args):
+        raise AssertionError("debate must not run after an abort")
+
+    monkeypatch.setattr(graph, "CACHE_ENABLED", False)
+    monkeypatch.setattr(graph, "aparse_resume", failing_parse)
+    monkeypatch.setattr(graph, "aparse_jd", slow_parse)
+    monkeypatch.setattr(graph, "aget_optimist_opinion", no_debate)
+    monkeypatch.setattr(graph, "arank_candidate", no_debate)
+
+    start = time.perf_counter()
+    final_state = asyncio.run(graph.run_analysis(
+        {"resume_text": "Ada. Python.", "jd_text": "Backend engineer.", "resume_data": {}, "jd_data": {}}
+    ))
+
+    assert final_state["error"] == "Invalid json output"
+    assert "analysis" not in final_state
+    assert cancelled == ["Backend engineer."]
+    assert time.perf_counter() - start < 5
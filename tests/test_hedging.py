@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from src.utils.hedging import Hedger
+
+class FakeChain:
+    """
+    Stands in for a prompt | llm | parser chain: each ainvoke takes the next
+    delay from `delays` and returns `name`, or raises if the delay is None.
+    """
+
+    def __init__(self, name, delays):
+        self.name, self.delays = name, list(delays)
+        self.cancelled = 0
+
+    async def ainvoke(self, inputs):
+        delay = self.delays.pop(0)
+        try:
+            await asyncio.sleep(delay or 0)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if delay is None:
+            raise ValueError("Invalid json output")
+        return self.name
+
+def _hedger(**kwargs):
+    options = dict(enabled=True, min_samples=1, min_delay=0.05, budget=1.0, burst=1.0)
+    return Hedger(**{**options, **kwargs})
+
+def test_slow_call_is_hedged_to_fallback_and_loser_cancelled():
+    hedger = _hedger(fallback_model="fallback")
+    primary = FakeChain("primary", [0.01, 5])
+    fallback = FakeChain("fallback", [0.01])
+
+    async def scenario():
+        await hedger.acall(primary, {}, "model-a")  # warm-up: the first latency sample
+        start = time.perf_counter()
+        result = await hedger.acall(primary, {}, "model-a", chain_for=lambda model: fallback)
+        await asyncio.sleep(0)  # let the cancellation land
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(scenario())
+
+    assert result == "fallback"
+    assert elapsed < 1
+    assert primary.cancelled == 1
+    stats = hedger.stats()["agents"]["unknown"]
+    assert (stats["calls"], stats["hedged"], stats["hedge_wins"]) == (2, 1, 1)
+
+def test_invalid_hedge_result_loses_and_budget_limits_hedges():
+    # The hedge fails to parse, so the slower primary still wins
+    hedger = _hedger()
+    chain = FakeChain("ok", [0.01, 0.3, None])
+    assert asyncio.run(_calls(hedger, chain, 2)) == ["ok", "ok"]
+    assert hedger.stats()["agents"]["unknown"]["hedge_wins"] == 0
+
+    # 10% budget: the first slow calls can't earn a whole hedge
+    hedger = _hedger(budget=0.1)
+    chain = FakeChain("ok", [0.01] + [0.1] * 5)
+    asyncio.run(_calls(hedger, chain, 6))
+    assert hedger.stats()["agents"]["unknown"]["hedged"] == 0
+
+async def _calls(hedger, chain, count):
+    return [await hedger.acall(chain, {}, "model-a") for _ in range(count)]
+
+def test_scheduler_queueing_is_not_latency_and_throttled_models_are_not_hedged(monkeypatch):
+    async def queued_acall(chain, inputs, model, est_tokens=None, on_granted=None):
+        await asyncio.sleep(0.2)  # waiting for rate-limit quota
+        if on_granted:
+            on_granted()
+        return await chain.ainvoke(inputs)
+
+    monkeypatch.setattr("src.utils.hedging.acall", queued_acall)
+    hedger = _hedger()
+    chain = FakeChain("ok", [0.01, 0.01])
+    asyncio.run(_calls(hedger, chain, 2))
+    stats = hedger.stats()["agents"]["unknown"]
+    assert stats["hedged"] == 0 and max(hedger.agents["unknown"].latencies) < 0.15
+
+    # Slow enough to hedge, but the model is held back by the scheduler
+    hedger = _hedger(throttled=lambda model: True)
+    chain = FakeChain("ok", [0.01, 0.3])
+    assert asyncio.run(_calls(hedger, chain, 2)) == ["ok", "ok"]
+    assert hedger.stats()["agents"]["unknown"]["hedged"] == 0
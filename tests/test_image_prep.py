@@ -0,0 +1,33 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from src.utils.image_prep import prepare_image
+
+def _scan(mode="RGB", size=(2550, 3300)):
+    # A letter page at 300 DPI with one block of "text" in the middle
+    page = Image.new(mode, size, "white")
+    ImageDraw.Draw(page).rectangle((800, 1200, 1700, 1500), fill="black")
+    return page
+
+def test_prepare_image_crops_downscales_and_grays():
+    original = io.BytesIO()
+    _scan().save(original, format="PNG")
+
+    prepared = prepare_image(original.getvalue(), grayscale=True, max_dimension=600, crop=True, quality=75)
+    image = Image.open(io.BytesIO(prepared))
+
+    assert image.format == "JPEG"
+    assert image.mode == "L"
+    # Cropped to the content (wider than tall), then capped at 600px
+    assert max(image.size) == 600
+    assert image.width > image.height
+    assert len(prepared) < len(original.getvalue())
+
+def test_prepare_image_flattens_transparency_onto_white():
+    page = Image.new("RGBA", (200, 100), (0, 0, 0, 0))
+    prepared = prepare_image(page, grayscale=False, max_dimension=0, crop=False, quality=90)
+    image = Image.open(io.BytesIO(prepared))
+
+    assert image.size == (200, 100)
+    assert image.convert("L").getextrema()[0] > 240
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+# Wall-clock budget for `import src.api` in a fresh interpreter. Generous, since CI
+# machines vary; the list of modules that must stay unloaded is the precise guard.
+IMPORT_TIME_BUDGET_S = float(os.getenv("IMPORT_TIME_BUDGET_S", "4"))
+
+# Loaded on first use only: LLM/vision clients, PDF and image libraries, the graph builder
+LAZY_MODULES = ["langchain_openai", "openai", "langchain_community", "pypdf", "pdf2image", "PIL", "langgraph.graph"]
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import src.api
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+def _slowest_imports(stderr: str, count: int = 10) -> str:
+    # `-X importtime` lines: "import time: self [us] | cumulative | name"
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    return ", ".join(f"{name} {us / 1000:.0f}ms" for us, name in sorted(rows, reverse=True)[:count])
+
+def test_api_import_time_budget():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE], cwd=root, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    print(f"import src.api: {report['seconds']:.2f}s; slowest: {_slowest_imports(result.stderr)}")
+
+    assert report["loaded"] == [], f"imported eagerly: {report['loaded']}"
+    assert report["seconds"] < IMPORT_TIME_BUDGET_S, _slowest_imports(result.stderr)
@@ -0,0 +1,151 @@
+import asyncio
+import sqlite3
+from src.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobFailed, JobStore, JobWorkerPool
+
+def test_job_store_idempotency_and_retries(tmp_path):
+    store = JobStore(str(tmp_path))
+    job, created = store.create("a", {"resume_text": "cv"}, idempotency_key="k1")
+    assert created and job["status"] == QUEUED
+    duplicate, created = store.create("b", {"resume_text": "cv"}, idempotency_key="k1")
+    assert not created and duplicate["id"] == "a"
+
+    claimed = store.claim()
+    assert claimed["id"] == "a" and claimed["status"] == RUNNING and claimed["attempts"] == 1
+    assert store.claim() is None
+    assert store.fail("a", "boom", max_attempts=2) == QUEUED
+    assert store.claim() is None  # backing off
+
+    assert store.requeue_expired() == (0, [])
+    assert store.get("a")["status"] == QUEUED and store.get("a")["error"] == "boom"
+
+def test_only_expired_leases_are_requeued(tmp_path):
+    mine = JobStore(str(tmp_path), lease_seconds=60)
+    other = JobStore(str(tmp_path), lease_seconds=-1)  # its leases are already expired
+    mine.create("a", {})
+    mine.create("b", {})
+    assert mine.claim()["id"] == "a"
+    assert other.claim()["id"] == "b"
+
+    # A healthy owner's job stays running; the dead one's goes back to the queue
+    assert mine.requeue_expired() == (1, [])
+    assert mine.get("a")["status"] == RUNNING and mine.get("b")["status"] == QUEUED
+    assert mine.renew(["a", "b"]) == 1
+
+    # The old owner lost "b" and can't overwrite the new claim
+    assert mine.claim()["id"] == "b"
+    assert other.fail("b", "late") is None and not other.complete("b", {})
+    assert mine.complete("b", {"score": 1}) and mine.get("b")["status"] == SUCCEEDED
+
+def test_worker_pool_runs_and_retries_jobs(tmp_path):
+    store = JobStore(str(tmp_path))
+    calls = []
+
+    async def run(job):
+        calls.append(job["id"])
+        if job["inputs"].get("fail"):
+            raise RuntimeError("LLM unavailable")
+        if job["inputs"].get("invalid"):
+            raise JobFailed("Error: unreadable PDF")
+        return {"score": 90}
+
+    async def main():
+        pool = JobWorkerPool(store, run=run, workers=2, max_attempts=1)
+        pool.start()
+        store.create("ok", {})
+        store.create("bad", {"fail": True})
+        pool.notify()
+        for _ in range(100):
+            if store.get("ok")["status"] == SUCCEEDED and store.get("bad")["status"] == FAILED:
+                break
+            await asyncio.sleep(0.02)
+        await pool.stop()
+
+        # Not retried even with attempts to spare
+        pool = JobWorkerPool(store, run=run, workers=1, max_attempts=3)
+        pool.start()
+        store.create("invalid", {"invalid": True})
+        pool.notify()
+        for _ in range(100):
+            if store.get("invalid")["status"] == FAILED:
+                break
+            await asyncio.sleep(0.02)
+        await pool.stop()
+
+    asyncio.run(main())
+    assert store.get("ok")["result"] == {"score": 90}
+    assert store.get("bad")["error"] == "LLM unavailable"
+    assert sorted(calls) == ["bad", "invalid", "ok"]
+    assert store.get("invalid")["attempts"] == 1
+
+def test_worker_survives_store_errors(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path))
+    claim, errors = store.claim, []
+
+    def flaky_claim():
+        if not errors:
+            errors.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        return claim()
+
+    async def run(job):
+        return {"score": 1}
+
+    async def main():
+        monkeypatch.setattr("src.jobs.JOB_POLL_INTERVAL", 0.01)
+        monkeypatch.setattr(store, "claim", flaky_claim)
+        pool = JobWorkerPool(store, run=run, workers=1)
+        pool.start()
+        store.create("a", {})
+        for _ in range(100):
+            if store.get("a")["status"] == SUCCEEDED:
+                break
+            await asyncio.sleep(0.02)
+        await pool.stop()
+
+    asyncio.run(main())
+    assert errors and store.get("a")["status"] == SUCCEEDED
+
+def test_transient_llm_failure_is_retried(tmp_path, monkeypatch):
+    import httpx
+    import openai
+    from src.jobs import run_job
+    from src.utils.llm import error_result
+
+    timeout = openai.APITimeoutError(request=httpx.Request("POST", "http://llm/v1/chat/completions"))
+    assert error_result(timeout)["retryable"] and not error_result(ValueError("Invalid json output"))["retryable"]
+
+    outcomes = [error_result(timeout), {"analysis": {"score": 75}}]
+
+    async def fake_run_analysis(inputs, graph=None):
+        outcome = outcomes.pop(0)
+        if "error" in outcome:
+            return {**inputs, "error": outcome["error"], "error_retryable": outcome["retryable"]}
+        return {**inputs, **outcome}
+
+    monkeypatch.setattr("src.jobs.run_analysis", fake_run_analysis)
+    monkeypatch.setattr("src.jobs.JOB_RETRY_BACKOFF", 0)
+    store = JobStore(str(tmp_path))
+
+    async def main():
+        pool = JobWorkerPool(store, run=run_job, workers=1, max_attempts=2)
+        pool.start()
+        store.create("a", {"resume_text": "cv", "jd_text": "jd"})
+        pool.notify()
+        for _ in range(200):
+            if store.get("a")["status"] == SUCCEEDED:
+                break
+            await asyncio.sleep(0.02)
+        await pool.stop()
+
+    asyncio.run(main())
+    job = store.get("a")
+    assert job["status"] == SUCCEEDED and job["attempts"] == 2 and job["result"] == {"score": 75}
+
+def test_job_that_keeps_killing_its_worker_fails(tmp_path):
+    store = JobStore(str(tmp_path), lease_seconds=-1)  # every claim is already expired
+    store.create("oom", {})
+    for attempt in (1, 2):
+        assert store.claim()["attempts"] == attempt
+        assert store.requeue_expired(max_attempts=2) == ((1, []) if attempt == 1 else (0, ["oom"]))
+    job = store.get("oom")
+    assert job["status"] == FAILED and "lease expired" in job["error"]
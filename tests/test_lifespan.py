@@ -0,0 +1,24 @@
+import time
+from fastapi.testclient import TestClient
+from src import api
+
+def test_startup_tasks_are_kept_and_stopped_on_shutdown(monkeypatch):
+    def slow_preload():
+        time.sleep(0.5)
+
+    def failing_warm():
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(api, "JOB_WORKERS", 0)
+    monkeypatch.setattr(api, "CANDIDATE_STORE_ENABLED", True)
+    monkeypatch.setattr(api, "preload_llm_libraries", slow_preload)
+    monkeypatch.setattr(api, "load_encoding", lambda: None)
+    monkeypatch.setattr(api.candidate_store, "warm", failing_warm)
+
+    with TestClient(api.app):
+        tasks = api.app.state.startup_tasks
+        assert len(tasks) == 3
+
+    # Shutdown cancelled the still-running preload and collected the rest
+    assert all(task.done() for task in tasks)
+    assert tasks[0].cancelled()
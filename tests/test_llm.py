@@ -0,0 +1,54 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from src.utils import llm
+
+class FlakyRunnable:
+    """
+    Fails with the given errors in turn, then answers.
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.attempts = 0
+
+    async def ainvoke(self, inputs):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+def server_error(status: int) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+    response = httpx.Response(status, request=request, json={"error": {"message": "boom"}})
+    return openai.APIStatusError("boom", response=response, body=None)
+
+def test_acall_owns_transient_retries(monkeypatch):
+    monkeypatch.setattr(llm, "backoff_delay", lambda attempt, retry_after=0.0: 0.0)
+    connection_lost = openai.APIConnectionError(request=httpx.Request("POST", "http://llm.test"))
+
+    flaky = FlakyRunnable(server_error(503), connection_lost)
+    assert asyncio.run(llm.acall(flaky, "hi", "test-model")) == "ok"
+    assert flaky.attempts == 3
+
+    # Gives up after LLM_TRANSIENT_RETRIES, and never retries a request the provider rejected
+    down = FlakyRunnable(*(server_error(502) for _ in range(llm.LLM_TRANSIENT_RETRIES + 1)))
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(llm.acall(down, "hi", "test-model"))
+    assert down.attempts == llm.LLM_TRANSIENT_RETRIES + 1
+
+    rejected = FlakyRunnable(server_error(400))
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(llm.acall(rejected, "hi", "test-model"))
+    assert rejected.attempts == 1
+
+def test_reset_closes_the_async_pool_on_the_running_loop():
+    async def reset():
+        _, async_client = llm._get_http_clients()
+        llm.reset_llm_clients()
+        await asyncio.gather(*llm._closing)
+        return async_client
+
+    assert asyncio.run(reset()).is_closed
+    assert not llm._closing
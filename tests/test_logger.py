@@ -0,0 +1,29 @@
+import json
+import logging
+
+from src.utils.logger import ContextFilter, JsonFormatter, log_context, setup_logger
+
+def test_setup_logger_is_idempotent():
+    first = setup_logger("tests.logger.idempotent")
+    second = setup_logger("tests.logger.idempotent")
+
+    assert first is second
+    assert len(first.handlers) == 1
+    # One queue handler shared by every module's logger
+    assert setup_logger("tests.logger.other").handlers[0] is first.handlers[0]
+
+def test_context_ids_and_sampling():
+    logger = logging.getLogger("tests.logger.noisy.child")
+    context = ContextFilter({"tests.logger.noisy": 0.0})
+    info = logger.makeRecord(logger.name, logging.INFO, __file__, 1, "routine %s", ("detail",), None)
+    warning = logger.makeRecord(logger.name, logging.WARNING, __file__, 1, "unusual", None, None)
+
+    with log_context(request_id="req-1", run_id="run-1"):
+        assert not context.filter(info)  # sampled out at rate 0
+        assert context.filter(warning)  # warnings are always kept
+    assert context.sampled_out == 1
+
+    entry = json.loads(JsonFormatter().format(warning))
+    assert entry["message"] == "unusual"
+    assert entry["level"] == "WARNING"
+    assert (entry["request_id"], entry["run_id"]) == ("req-1", "run-1")
@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.messages import AIMessage
+from src.utils import metrics
+from src.utils.logger import _queue_handler
+from src.utils.metrics import (
+    LLM_CALLS, LLM_COST, LLM_TOKENS, NODE_FAILURES, Histogram, LLMMetricsCallback, _token_usage, instrument_node,
+)
+
+def test_histogram_buckets_and_exposition():
+    histogram = Histogram("test_seconds", "Test latency", ["node"], buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, node='a"b')
+
+    assert histogram.count(node='a"b') == 4 and histogram.sum(node='a"b') == 3.65
+    assert histogram.render().splitlines() == [
+        "# HELP test_seconds Test latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{node="a\\"b",le="0.1"} 2',  # bucket bounds are inclusive
+        'test_seconds_bucket{node="a\\"b",le="1"} 3',
+        'test_seconds_bucket{node="a\\"b",le="+Inf"} 4',
+        'test_seconds_sum{node="a\\"b"} 3.65',
+        'test_seconds_count{node="a\\"b"} 4',
+    ]
+
+def test_token_usage_and_cost_accounting(monkeypatch):
+    usage = {"token_usage": {"prompt_tokens": 1000, "completion_tokens": 200}}
+    assert _token_usage(LLMResult(generations=[[]], llm_output=usage)) == (1000, 200)
+    # Streaming: usage only on the message
+    message = AIMessage("ok", usage_metadata={"input_tokens": 30, "output_tokens": 5, "total_tokens": 35})
+    assert _token_usage(LLMResult(generations=[[ChatGeneration(message=message)]])) == (30, 5)
+
+    monkeypatch.setitem(metrics.LLM_PRICES_PER_1M, "test-model", (2.0, 10.0))
+    callback, run_id = LLMMetricsCallback(), uuid.uuid4()
+    token = metrics.current_agent.set("test_agent")
+    try:
+        callback.on_chat_model_start({}, [], run_id=run_id, invocation_params={"model": "test-model"})
+        callback.on_llm_end(LLMResult(generations=[[]], llm_output=usage), run_id=run_id)
+    finally:
+        metrics.current_agent.reset(token)
+
+    labels = {"agent": "test_agent", "model": "test-model"}
+    assert LLM_CALLS.value(**labels, status="ok") == 1
+    assert LLM_TOKENS.value(**labels, kind="prompt") == 1000
+    assert LLM_TOKENS.value(**labels, kind="completion") == 200
+    assert LLM_COST.value(**labels) == (1000 * 2.0 + 200 * 10.0) / 1e6
+
+def test_cancelled_node_is_not_a_failure():
+    @instrument_node("test_cancelled")
+    async def slow():
+        await asyncio.sleep(10)
+
+    @instrument_node("test_failed")
+    async def broken():
+        raise ValueError("bad")
+
+    async def scenario():
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, broken(), return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert NODE_FAILURES.value(node="test_cancelled") == 0
+    assert NODE_FAILURES.value(node="test_failed") == 1
+    assert metrics.NODE_DURATION.count(node="test_cancelled") == 1
+
+def test_log_discards_are_exported(monkeypatch):
+    handler = _queue_handler()
+    monkeypatch.setattr(handler, "dropped", 7)
+
+    lines = metrics.render_metrics().splitlines()
+    assert "# TYPE log_records_discarded_total counter" in lines
+    assert 'log_records_discarded_total{reason="dropped"} 7.0' in lines
+    assert any(line.startswith('log_records_discarded_total{reason="sampled_out"} ') for line in lines)
@@ -0,0 +1,36 @@
+from src.utils.model_router import ModelRouter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_faster_healthy_model_moves_ahead():
+    router = ModelRouter(["slow", "fast"], clock=FakeClock())
+    router.record_success("slow", 8.0)
+    router.record_success("fast", 1.0)
+    assert router.candidates() == ["fast", "slow"]
+
+def test_breaker_opens_then_probes_after_cooldown():
+    clock = FakeClock()
+    router = ModelRouter(["flaky", "backup"], failure_threshold=2, cooldown=30, clock=clock)
+
+    router.record_failure("flaky", 0.5, "429")
+    router.record_failure("flaky", 0.5, "429")
+    assert router.stats()["models"]["flaky"]["state"] == "open"
+    assert router.candidates() == ["backup", "flaky"]
+
+    clock.now = 31
+    assert router.candidates()[0] == "flaky"
+    # Only one probe at a time while it is in flight
+    assert router.candidates()[0] == "backup"
+
+    router.record_failure("flaky", 0.5, "still down")
+    assert router.stats()["models"]["flaky"]["state"] == "open"
+
+    clock.now = 62
+    assert router.candidates()[0] == "flaky"
+    router.record_success("flaky", 0.4)
+    assert router.stats()["models"]["flaky"]["state"] == "closed"
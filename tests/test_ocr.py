@@ -0,0 +1,41 @@
+import asyncio
+from src.utils import ocr
+
+class FakeDocPool:
+    """
+    Stands in for the document pool with a scanned PDF of `page_count` pages.
+    Tracks how many pages are between render and OCR result.
+    """
+
+    def __init__(self, page_count: int):
+        self.page_count = page_count
+        self.in_flight = 0
+        self.peak = 0
+
+    async def run(self, fn, *args, timeout=None):
+        if fn is ocr.read_pdf_text:
+            return "", self.page_count
+        assert fn is ocr.render_pdf_page
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.005 * (args[1] % 3))
+        return f"page-{args[1]}".encode()
+
+def test_scanned_pdf_pages_come_back_in_order_with_bounded_concurrency(monkeypatch):
+    pool = FakeDocPool(page_count=6)
+
+    async def ocr_image(image_bytes):
+        page = int(image_bytes.decode().split("-")[1])
+        # Later pages finish first
+        await asyncio.sleep(0.01 * (pool.page_count - page))
+        pool.in_flight -= 1
+        return f"text of page {page}"
+
+    monkeypatch.setattr(ocr, "doc_pool", pool)
+    monkeypatch.setattr(ocr, "aextract_text_from_image", ocr_image)
+    monkeypatch.setattr(ocr, "OCR_PAGE_CONCURRENCY", 2)
+
+    text = asyncio.run(ocr.aextract_text_from_file(b"%PDF-1.4 scanned", "scan.pdf"))
+
+    assert text == "\n".join(f"--- Page {n} ---\ntext of page {n}" for n in range(1, 7))
+    assert pool.peak == 2
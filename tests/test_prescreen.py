@@ -0,0 +1,30 @@
+from src.utils.prescreen import prescreen, prescreen_scores
+
+JD = {"job_title": "Backend Engineer", "required_skills": ["Python", "Docker", "Go", "SQL"], "min_experience_years": 4}
+
+def test_prescreen_scores_skills_and_experience():
+    result = prescreen({"skills": ["python", " SQL ", "React"], "experience_years": 2}, JD)
+    assert result["skill_score"] == 0.5
+    assert result["experience_score"] == 0.5
+    assert result["missing_skills"] == ["Docker", "Go"]
+    assert 0.49 < result["score"] < 0.51
+
+def test_prescreen_scores_batch_matches_single():
+    resumes = [
+        {"skills": ["Python", "Docker", "Go", "SQL"], "experience_years": 10},
+        {"skills": [], "experience_years": 0},
+        {"skills": ["go"], "experience_years": 4},
+    ]
+    scores = prescreen_scores(resumes, JD)
+    assert scores["matches"].shape == (3, 4)
+    assert scores["score"][0] == 1.0 and scores["score"][1] == 0.0
+    assert abs(scores["score"][2] - prescreen(resumes[2], JD)["score"]) < 1e-9
+
+def test_prescreen_without_requirements_passes():
+    assert prescreen({"skills": ["Python"], "experience_years": 1}, {"required_skills": []})["score"] == 1.0
+
+def test_non_numeric_experience_from_the_llm():
+    jd = {**JD, "min_experience_years": "4+ years"}
+    result = prescreen({"skills": ["Python"], "experience_years": "2 years"}, jd)
+    assert result["experience_score"] == 0.5
+    assert prescreen({"skills": [], "experience_years": "N/A"}, jd)["experience_score"] == 0.0
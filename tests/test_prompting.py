@@ -0,0 +1,41 @@
+import asyncio
+from src.utils import prompting
+from src.utils.prompting import clean_document_text, count_tokens, fit_to_budget, serialize_jd, serialize_resume
+
+def test_clean_document_text_drops_boilerplate_and_repeats():
+    footer = "Jane Doe | jane@example.com | +1 555 0100"
+    text = (
+        f"--- Page 1 ---\nCurriculum Vitae\n{footer}\nSkills:   Python,\tDocker\n\n\n\nPython\n"
+        f"--- Page 2 ---\n{footer}\nPython\nReferences available upon request"
+    )
+    assert clean_document_text(text) == f"{footer}\nSkills: Python, Docker\n\nPython\nPython"
+
+def test_serializers_are_compact_and_canonical():
+    resume = {"name": "Jane", "email": "j@x.io", "skills": ["Python", "python ", "Go"], "experience_years": 6.0,
+              "education": [], "recent_role": None}
+    assert serialize_resume(resume) == "Name: Jane\nExperience: 6 years\nSkills: Python, Go"
+    jd = {"job_title": "SRE", "required_skills": ["Go"], "min_experience_years": 3, "preferred_qualifications": []}
+    assert serialize_jd(jd) == "Job title: SRE\nRequired skills: Go\nMinimum experience: 3 years"
+    assert len(serialize_resume(resume)) < len(str(resume)) / 2
+
+def test_fit_to_budget_keeps_the_beginning():
+    text = " ".join(f"word{i}" for i in range(2000))
+    fitted = fit_to_budget(text, 100)
+    assert text.startswith(fitted) and count_tokens(fitted) <= 101
+    assert fit_to_budget("short", 100) == "short"
+
+def test_encoding_is_never_loaded_on_the_event_loop(monkeypatch):
+    loads = []
+    monkeypatch.setattr(prompting, "_encoding", None)
+    monkeypatch.setattr(prompting, "_encoding_failed", False)
+    monkeypatch.setattr(prompting, "load_encoding", lambda: loads.append(1))
+
+    async def count_on_loop():
+        return count_tokens("x" * 40)
+
+    # Not loaded yet: requests fall back to the length estimate instead of waiting on a download
+    assert asyncio.run(count_on_loop()) == 10
+    assert loads == []
+    # Off the loop (scripts, threads) the first use loads it
+    count_tokens("x" * 40)
+    assert loads == [1]
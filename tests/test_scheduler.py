@@ -0,0 +1,38 @@
+import asyncio
+from src.utils.scheduler import BATCH, LLMScheduler, TokenBucket, backoff_delay, current_priority, priority_class
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(per_minute=600, burst_seconds=1, now=0.0)  # 10/s, capacity 10
+    assert bucket.wait_time(10, 0.0) == 0
+    bucket.consume(10, 0.0)
+    assert abs(bucket.wait_time(1, 0.0) - 0.1) < 1e-9
+    assert bucket.wait_time(1, 0.1) == 0
+    assert TokenBucket(per_minute=0).wait_time(10**9, 0.0) == 0  # unlimited
+
+def test_scheduler_releases_waiters_by_priority():
+    scheduler = LLMScheduler(rpm=1200, tpm=0, limits={}, burst_seconds=0.05)  # 1 request per 50ms
+    order = []
+
+    async def caller(name, priority):
+        await scheduler.acquire("m", 100, priority=priority)
+        order.append(name)
+
+    async def main():
+        await caller("first", 5)  # drains the bucket
+        await asyncio.gather(caller("batch-parse", 12), caller("batch-rank", 10), caller("interactive-rank", 0))
+
+    asyncio.run(main())
+    assert order == ["first", "interactive-rank", "batch-rank", "batch-parse"]
+
+def test_penalize_blocks_model_and_backoff_honors_retry_after():
+    clock = [0.0]
+    scheduler = LLMScheduler(rpm=0, tpm=0, limits={}, clock=lambda: clock[0])
+    scheduler.penalize("m", 2.0)
+    assert scheduler.stats()["m"]["blocked_for"] == 2.0
+    assert backoff_delay(0, retry_after=7.5) == 7.5
+    assert 0.5 <= backoff_delay(0) <= 1.0
+
+def test_priority_class_lowers_priority():
+    interactive = current_priority()
+    with priority_class(BATCH):
+        assert current_priority() == interactive + 10
@@ -0,0 +1,36 @@
+import numpy as np
+from src.utils.candidates import CandidateStore
+from src.utils.skills import SkillVocabulary, match_matrix, missing_skills, normalize_skill, similarity_matrix
+
+def test_normalization_resolves_aliases_and_versions():
+    assert normalize_skill(" K8s ") == "kubernetes"
+    assert normalize_skill("Python 3.11") == "python"
+    assert normalize_skill("Machine-Learning") == "machine learning"
+    assert normalize_skill("S3") == "s3"
+
+def test_matching_is_fuzzy_but_not_loose():
+    required = ["Kubernetes", "PyTorch", "REST API", "JavaScript", "Go"]
+    matches = match_matrix([["k8s", "torch", "REST APIs", "Java"], [], ["golang"]], required)
+    assert matches.tolist() == [
+        [True, True, True, False, False],
+        [False] * 5,
+        [False, False, False, False, True],
+    ]
+    assert missing_skills(["k8s", "Java"], ["Kubernetes", "JavaScript", "kubernetes"]) == ["JavaScript"]
+
+def test_vocabulary_agrees_with_dense_similarity():
+    skills = ["python", "python3", "java", "javascript", "rest api", "rest apis"]
+    vocabulary = SkillVocabulary()
+    for skill in skills:
+        vocabulary.add(skill)
+    sims = similarity_matrix(skills, skills)
+    for i, skill in enumerate(skills):
+        expected = sorted(s for s, sim in zip(skills, sims[i]) if sim >= 0.75 - 1e-6)
+        assert vocabulary.similar(skill) == expected
+    assert np.allclose(np.diag(sims), 1.0)
+
+def test_candidate_index_matches_aliases(tmp_path):
+    store = CandidateStore(str(tmp_path))
+    store.add({"name": "Ada", "skills": ["k8s", "Python 3"], "experience_years": 5}, "h1")
+    [match] = store.search({"required_skills": ["Kubernetes", "Python", "Terraform"]})
+    assert match["matched_skills"] == ["Kubernetes", "Python"] and match["missing_skills"] == ["Terraform"]
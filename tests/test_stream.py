@@ -0,0 +1,70 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.fake_llm_server import RANKING, start_fake_server
+from src import api, graph
+from src.utils.llm import reset_llm_clients
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    An API client whose LLM calls go to the offline fake provider.
+    """
+    server, base_url = start_fake_server()
+    for name in ("OPENAI_API_BASE", "OPENAI_BASE_URL"):
+        monkeypatch.setenv(name, base_url)
+    for name in ("OPENAI_API_KEY", "OPENROUTER_API_KEY"):
+        monkeypatch.setenv(name, "sk-fake")
+    monkeypatch.setenv("LANGCHAIN_TRACING_V2", "false")
+    monkeypatch.setattr(graph, "CACHE_ENABLED", False)
+    monkeypatch.setattr(graph, "ANALYSIS_CACHE_ENABLED", False)
+    reset_llm_clients()
+    yield TestClient(api.app)
+    # The shared clients point at this server and the TestClient's event loop
+    reset_llm_clients()
+    server.shutdown()
+
+def read_events(response):
+    """
+    Splits an SSE body into (event, data) pairs, checking each frame's shape.
+    """
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for frame in response.text.split("\n\n"):
+        if not frame:
+            continue
+        event_line, data_line = frame.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    assert response.text.endswith("\n\n")
+    return events
+
+def test_stream_event_order(client):
+    response = client.post("/analyze/stream", data={
+        "resume_text": "Jane Doe. Python, Docker, LangGraph. 6 years.",
+        "jd_text": "Senior Python Engineer with LangGraph and Kubernetes.",
+    })
+
+    assert response.status_code == 200
+    events = read_events(response)
+    names = [name for name, _ in events]
+
+    # The parses and the two debate agents run in parallel; only their stage order is fixed
+    assert set(names[:2]) == {"resume", "jd"}
+    assert names[2] == "prescreen"
+    tokens = [data["content"] for name, data in events if name == "token"]
+    assert set(names[3:5]) == {"optimist", "skeptic"}
+    assert names[5:] == ["token"] * len(tokens) + ["result", "done"]
+
+    assert tokens and "".join(tokens) == json.dumps(RANKING)
+    result = events[-2][1]
+    assert result["score"] == RANKING["score"]
+    assert result["candidate_name"] == "Jane Doe"
+
+def test_stream_reports_invalid_input_as_error_event(client):
+    response = client.post("/analyze/stream", data={"resume_text": "string", "jd_text": "Senior Python Engineer."})
+
+    assert response.status_code == 200
+    events = read_events(response)
+    assert events[-1] == ("error", {"detail": "No valid resume text or file provided"})
+    assert "done" not in [name for name, _ in events]
@@ -0,0 +1,27 @@
+import asyncio
+import hashlib
+import io
+import pytest
+from fastapi import UploadFile
+from src.utils.uploads import UploadTooLarge, checked_upload, save_upload
+
+def test_checked_upload_uses_the_upload_file_rewound():
+    payload = b"%PDF-1.4 " + b"x" * 300_000
+    upload = UploadFile(io.BytesIO(payload), filename="cv.pdf")
+    upload.file.seek(100)
+    digest = hashlib.sha256()
+    file = asyncio.run(checked_upload(upload, max_bytes=len(payload), digest=digest))
+    assert file is upload.file  # no second copy
+    assert file.read() == payload
+    assert digest.hexdigest() == hashlib.sha256(payload).hexdigest()
+
+def test_oversized_uploads_are_rejected(tmp_path):
+    upload = UploadFile(io.BytesIO(b"x" * 1000), filename="big.pdf")
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(checked_upload(upload, max_bytes=999))
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(save_upload(upload, str(tmp_path / "big.pdf"), max_bytes=999))
+    assert not (tmp_path / "big.pdf").exists()
+
+    assert asyncio.run(save_upload(upload, str(tmp_path / "ok.pdf"), max_bytes=1000)) == 1000
+    assert (tmp_path / "ok.pdf").read_bytes() == b"x" * 1000